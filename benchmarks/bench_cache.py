@@ -0,0 +1,51 @@
+"""
+Benchmark: extract through the raw-input cache (src/cache.py) vs parsing the CSV.
+
+    python -m benchmarks.bench_cache --copies 100
+
+The Esophageal dataset is replicated `copies` times into a temporary file and
+extracted with the projection main() uses, once without the cache, once cold
+(parse and store) and once warm. Cached timings include fingerprinting the
+file, which transform_source does on every run anyway.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src import cache, manifest
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES
+
+from . import results as bench_results
+from .bench_extract import _replicate
+
+def run(copies: int) -> dict:
+    results = {"copies": copies}
+    options = {"usecols": SOURCE_COLUMNS, "dtype": SOURCE_DTYPES}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(_replicate(copies, tmp))
+        cache_dir = Path(tmp) / "cache"
+
+        def cached():
+            return cache.extract(csv_reader, path, manifest.file_fingerprint(path), cache_dir=cache_dir, **options)
+
+        for name, fn in {
+            "uncached": lambda: csv_reader.extract(path, **options),
+            "cold": cached,
+            "warm": cached,
+        }.items():
+            start = time.perf_counter()
+            df = fn()
+            results[f"{name}_s"] = round(time.perf_counter() - start, 3)
+        results["rows"] = len(df)
+        results["entry_mb"] = round(sum(p.stat().st_size for p in cache_dir.glob("*.arrow")) / 1e6, 1)
+    results["warm_speedup"] = round(results["uncached_s"] / results["warm_s"], 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=100)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("cache", run(args.copies), args)
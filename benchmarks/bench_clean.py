@@ -0,0 +1,65 @@
+"""
+Benchmark: string normalization and blank detection in clean().
+
+    python -m benchmarks.bench_clean --rows 1000000
+
+The Esophageal dataset is replicated to about `rows` rows and read both with
+every column and with the projected columns main() uses. On each frame the
+previous approach (strip/lower every object column, then a full-frame blank
+regex) is timed against clean.normalize_strings(), which turns low-cardinality
+text columns into categoricals and nulls blanks in the same pass.
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from src import clean
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES
+
+from . import results as bench_results
+from .bench_extract import SOURCE_PATH, _replicate
+
+def _previous_normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    df.columns = df.columns.str.strip().str.lower()
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].str.strip().str.lower()
+    for col in df.select_dtypes(include="category").columns:
+        df[col] = clean.normalize_categorical(df[col])
+    return df.replace(r"^\s*$", pd.NA, regex=True)
+
+def _timed(fn, df: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    out = fn(df)
+    return round(time.perf_counter() - start, 3), out
+
+def run(rows: int) -> dict:
+    copies = max(1, rows // (sum(1 for _ in SOURCE_PATH.open()) - 1))
+    results = {"copies": copies}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(_replicate(copies, tmp))
+        frames = {
+            "full": csv_reader.extract(path),
+            "projected": csv_reader.extract(path, usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES),
+        }
+    results["rows"] = len(frames["full"])
+
+    for name, raw in frames.items():
+        results[f"{name}_columns"] = raw.shape[1]
+        results[f"{name}_previous_s"], before = _timed(_previous_normalize, raw)
+        results[f"{name}_normalize_s"], after = _timed(clean.normalize_strings, raw)
+        results[f"{name}_clean_s"], _ = _timed(clean.clean, raw)
+        results[f"{name}_speedup"] = round(results[f"{name}_previous_s"] / results[f"{name}_normalize_s"], 2)
+        results[f"{name}_previous_mb"] = round(float(before.memory_usage(deep=True).sum()) / 1e6, 1)
+        results[f"{name}_normalize_mb"] = round(float(after.memory_usage(deep=True).sum()) / 1e6, 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("clean", run(args.rows), args)
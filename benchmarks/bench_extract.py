@@ -0,0 +1,60 @@
+"""
+Benchmark: full CSV parse vs the projected, dtype-pushed-down parse used by main().
+
+    python -m benchmarks.bench_extract --copies 100
+
+The Esophageal dataset is replicated `copies` times into a temporary file so the
+parse is long enough to time. Memory is the size of the resulting frame.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES
+
+from . import results as bench_results
+
+SOURCE_PATH = Path("data/Esophageal_Dataset.csv")
+
+def _replicate(copies: int, directory: str) -> Path:
+    path = Path(directory) / "esophageal_scaled.csv"
+    lines = SOURCE_PATH.read_text().splitlines(keepends=True)
+    with path.open("w") as f:
+        f.write(lines[0])
+        for _ in range(copies):
+            f.writelines(lines[1:])
+    return path
+
+def _measure(fn) -> tuple[float, int]:
+    start = time.perf_counter()
+    df = fn()
+    return time.perf_counter() - start, int(df.memory_usage(deep=True).sum())
+
+def run(copies: int) -> dict:
+    results = {"copies": copies}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(_replicate(copies, tmp))
+        variants = {
+            "full": lambda: csv_reader.extract(path),
+            "projected": lambda: csv_reader.extract(path, usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES),
+        }
+        try:
+            import pyarrow  # noqa: F401
+            variants["projected_pyarrow"] = lambda: csv_reader.extract(
+                path, usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES, engine="pyarrow")
+        except ImportError:
+            pass
+        for name, fn in variants.items():
+            seconds, nbytes = _measure(fn)
+            results[f"{name}_s"] = round(seconds, 3)
+            results[f"{name}_mb"] = round(nbytes / 1e6, 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=100)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("extract", run(args.copies), args)
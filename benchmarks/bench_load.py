@@ -0,0 +1,75 @@
+"""
+Benchmark: execute_values upsert vs COPY + merge loader.
+
+    python -m benchmarks.bench_load --rows 200000
+
+Against a reachable Postgres (PG* env vars, see src/repo.py) both loaders write
+into a throwaway `bench_esophageal` table. Without one, only the client-side
+work (record conversion vs CSV rendering) is timed against a fake connection.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import load
+from src.repo import get_conn
+from src.rules import ESOPHAGEAL_COLUMNS
+
+from . import results as bench_results
+from .fakes import NullConn, null_execute_values, db_available
+
+BENCH_TABLE = "bench_esophageal"
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    height = rng.uniform(145, 202, rows).round(1)
+    weight = rng.uniform(41, 198, rows).round(1)
+    df = pd.DataFrame({c: rng.choice(["a", "b", "c"], rows) for c in ESOPHAGEAL_COLUMNS})
+    df["patient_barcode"] = [f"tcga-{i:08d}" for i in range(rows)]
+    df["height"] = height
+    df["weight"] = weight
+    df["bmi"] = (weight / (height / 100) ** 2).round(2)
+    df["total_drinks_per_week"] = rng.integers(0, 50, rows).astype(float)
+    df["age_at_diagnosis"] = rng.integers(20, 90, rows).astype(float)
+    return df
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def run(rows: int) -> dict:
+    df = make_frame(rows)
+    results = {"rows": rows}
+
+    if db_available():
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+            cur.execute(f"CREATE TABLE {BENCH_TABLE} (LIKE stg_esophageal INCLUDING ALL);")
+            conn.commit()
+        try:
+            results["mode"] = "postgres"
+            results["execute_values_s"] = _time(lambda: load.upsert_dataframe(df, BENCH_TABLE, ["patient_barcode"]))
+            results["copy_s"] = _time(lambda: load.copy_upsert_dataframe(df, BENCH_TABLE, ["patient_barcode"]))
+        finally:
+            with get_conn() as conn, conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+                conn.commit()
+    else:
+        results["mode"] = "client-only"
+        results["execute_values_s"] = _time(lambda: load.upsert_dataframe(
+            df, BENCH_TABLE, ["patient_barcode"], conn_factory=NullConn, execute_values_fn=null_execute_values))
+        results["copy_s"] = _time(lambda: load.copy_upsert_dataframe(
+            df, BENCH_TABLE, ["patient_barcode"], conn_factory=NullConn))
+
+    results["speedup"] = round(results["execute_values_s"] / results["copy_s"], 2)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("load", run(args.rows), args)
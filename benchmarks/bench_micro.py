@@ -0,0 +1,65 @@
+"""
+Microbenchmarks for the individual transform and load-preparation steps.
+
+    python -m benchmarks.bench_micro --rows 500000 --save --baseline latest
+
+A synthetic file (see benchmarks/synthetic.py) is extracted once; each step then
+runs `repeat` times on the output of the steps before it, and the best time is
+reported. Steps that modify their input get a fresh shallow copy per run.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src import clean, load, validate
+from src.pipeline import to_table_columns
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES, NUMERIC_COLUMNS, ESOPHAGEAL_COLUMNS
+
+from . import results as bench_results
+from .synthetic import write_csv
+
+def _best(fn, make_input, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        arg = make_input()
+        start = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return round(best, 4), out
+
+def run(rows: int, repeat: int = 3, reject_ratio: float = 0.2) -> dict:
+    results = {"rows": rows, "repeat": repeat}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_csv(Path(tmp) / "esophageal_synthetic.csv", rows, reject_ratio=reject_ratio)
+        raw = csv_reader.extract(str(path), usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES)
+
+    results["clean_s"], cleaned = _best(clean.clean, lambda: raw, repeat)
+
+    steps = {
+        "cast_numeric": lambda df: validate.cast_numeric(df, NUMERIC_COLUMNS),
+        "derive_features": validate.derive_features,
+        "evaluate_rules": lambda df: (validate.RULES.evaluate(df), df)[1],
+    }
+    frame = cleaned.copy(deep=False)
+    for name, fn in steps.items():
+        results[f"validate.{name}_s"], frame = _best(fn, lambda: frame.copy(deep=False), repeat)
+    results["validate_s"], (valid, rejects) = _best(
+        lambda df: validate.validate(df, write_rejects_path=None), lambda: cleaned, repeat)
+
+    table_rows, _ = to_table_columns(valid, rejects)
+    results["build_upsert_sql_s"], _ = _best(
+        lambda cols: load.build_upsert_sql("stg_esophageal", cols, ["patient_barcode"]), lambda: ESOPHAGEAL_COLUMNS, repeat)
+    results["to_records_s"], _ = _best(
+        lambda df: load.to_object_frame(df).to_numpy().tolist(), lambda: table_rows, repeat)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--reject-ratio", type=float, default=0.2)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("micro", run(args.rows, args.repeat, args.reject_ratio), args)
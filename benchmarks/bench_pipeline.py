@@ -0,0 +1,106 @@
+"""
+End-to-end benchmark: extract -> clean -> validate -> load for a synthetic source.
+
+    python -m benchmarks.bench_pipeline --rows 500000 --loader copy --save
+
+Against a reachable Postgres (PG* env vars, see src/repo.py) the rows are loaded
+into throwaway `bench_esophageal`/`bench_rejects` tables that are dropped
+afterwards. Without one the loaders run against the stand-in connection from
+benchmarks/fakes.py, so only the client-side load work is timed. Per-stage
+timings come from src/metrics.py.
+"""
+import argparse
+import functools
+import tempfile
+import time
+from pathlib import Path
+
+from src import load, metrics, pipeline, schema_init
+from src.repo import pooled_conn, close_pool
+
+from . import results as bench_results
+from .fakes import NullConn, null_execute_values, db_available
+from .synthetic import write_csv
+
+BENCH_TABLES = {"table": ("bench_esophageal", "stg_esophageal"), "rejects_table": ("bench_rejects", "stg_rejects")}
+
+# Loaders bound to the stand-in connection, for runs without Postgres.
+NULL_LOADERS = {
+    "upsert": functools.partial(load.upsert_dataframe, conn_factory=NullConn, execute_values_fn=null_execute_values),
+    "copy": functools.partial(load.copy_upsert_dataframe, conn_factory=NullConn),
+}
+
+def _bench_source(path: Path) -> dict:
+    return {
+        "name": "bench",
+        "path": str(path),
+        "reader": "csv",
+        "rules": "esophageal",
+        "table": BENCH_TABLES["table"][0],
+        "rejects_table": BENCH_TABLES["rejects_table"][0],
+        "pk": ["patient_barcode"],
+        "cleaned_output": None,
+        "rejected_output": None,
+        "rejects_log": None,
+        "output_partition_by": None,
+        "pk_policy": "last",
+    }
+
+def _create_tables() -> None:
+    schema_init.run_schema(reset=False)
+    with pooled_conn() as conn, conn.cursor() as cur:
+        for bench_table, like in BENCH_TABLES.values():
+            cur.execute(f"DROP TABLE IF EXISTS {bench_table};")
+            cur.execute(f"CREATE TABLE {bench_table} (LIKE {like} INCLUDING ALL);")
+        conn.commit()
+
+def _drop_tables() -> None:
+    with pooled_conn() as conn, conn.cursor() as cur:
+        for bench_table, _ in BENCH_TABLES.values():
+            cur.execute(f"DROP TABLE IF EXISTS {bench_table};")
+        conn.commit()
+    close_pool()
+
+def run(rows: int, loader: str = "upsert", reject_ratio: float = 0.2) -> dict:
+    results = {"rows": rows, "loader": loader, "reject_ratio": reject_ratio}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = _bench_source(write_csv(Path(tmp) / "esophageal_synthetic.csv", rows, reject_ratio=reject_ratio))
+
+        if db_available():
+            results["mode"] = "postgres"
+            _create_tables()
+            run_loader = loader
+        else:
+            results["mode"] = "client-only"
+            run_loader = f"null_{loader}"
+            pipeline.LOADERS[run_loader] = NULL_LOADERS[loader]
+
+        metrics.reset()
+        start = time.perf_counter()
+        try:
+            summary = pipeline.run_source(source, loader=run_loader)
+        finally:
+            if results["mode"] == "postgres":
+                _drop_tables()
+            else:
+                del pipeline.LOADERS[run_loader]
+        results["total_s"] = round(time.perf_counter() - start, 4)
+
+    results.update(summary)
+    results["rows_per_s"] = round(rows / results["total_s"], 1)
+    # Stages that repeat (e.g. one per load batch) are summed.
+    for record in metrics.records():
+        key = f"{record['stage']}_s"
+        results[key] = round(results.get(key, 0) + record["wall_s"], 4)
+    results["bytes_sent"] = sum(r["bytes_sent"] or 0 for r in metrics.records())
+    results["peak_rss_mb"] = round((metrics.peak_rss_bytes() or 0) / 1e6, 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--loader", choices=sorted(NULL_LOADERS), default="upsert")
+    parser.add_argument("--reject-ratio", type=float, default=0.2)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report(f"pipeline_{args.loader}", run(args.rows, args.loader, args.reject_ratio), args)
@@ -0,0 +1,57 @@
+"""
+Benchmark: sequential streaming (run_streaming) vs pipelined streaming (run_pipelined).
+
+    python -m benchmarks.bench_pipelined --rows 500000 --chunksize 50000 --load-ms-per-1k 20
+
+The loader stands in for a database round trip by sleeping `load_ms_per_1k`
+milliseconds per 1000 rows, which releases the GIL as waiting on Postgres does.
+Pipelined wall time should approach max(transform, load) rather than their sum,
+plus the null-threshold pre-pass, which has to finish before the first chunk.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src import metrics, pipeline
+
+from . import results as bench_results
+from .bench_pipeline import _bench_source
+from .synthetic import write_csv
+
+def _sleeping_loader(ms_per_1k: float):
+    def load(df, table_name, pk_columns):
+        time.sleep(len(df) * ms_per_1k / 1e6)
+        return df.iloc[:0]
+    return load
+
+def run(rows: int, chunksize: int, load_ms_per_1k: float, queue_size: int) -> dict:
+    results = {"rows": rows, "chunksize": chunksize, "load_ms_per_1k": load_ms_per_1k, "queue_size": queue_size}
+    pipeline.LOADERS["bench_sleep"] = _sleeping_loader(load_ms_per_1k)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = _bench_source(write_csv(Path(tmp) / "esophageal_synthetic.csv", rows))
+            for name, fn in {
+                "sequential": lambda: pipeline.run_streaming(source, chunksize, loader="bench_sleep"),
+                "pipelined": lambda: pipeline.run_pipelined(source, chunksize, loader="bench_sleep", queue_size=queue_size),
+            }.items():
+                metrics.reset()
+                start = time.perf_counter()
+                fn()
+                results[f"{name}_s"] = round(time.perf_counter() - start, 3)
+            loads = sum(r["wall_s"] for r in metrics.records() if r["stage"] == "bench.load")
+            results["load_stage_s"] = round(loads, 3)
+    finally:
+        del pipeline.LOADERS["bench_sleep"]
+    results["speedup"] = round(results["sequential_s"] / results["pipelined_s"], 2)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--load-ms-per-1k", type=float, default=20.0)
+    parser.add_argument("--queue-size", type=int, default=pipeline.DEFAULT_QUEUE_SIZE)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("pipelined", run(args.rows, args.chunksize, args.load_ms_per_1k, args.queue_size), args)
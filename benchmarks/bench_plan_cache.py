@@ -0,0 +1,87 @@
+"""
+Benchmark: per-batch latency of small loads with and without the plan cache.
+
+    python -m benchmarks.bench_plan_cache --batches 500 --rows 10
+
+Each of `batches` frames of `rows` rows is loaded on its own, as a trickle of
+small files or chunks would be. Client side, building the upsert statement and
+the compiled rule set afresh for every batch is timed against the cached
+builders (src/plan_cache.py). Against a reachable Postgres (PG* env vars) the
+"upsert" loader, which sends the statement text with every batch, is timed
+against "prepared", which PREPAREs it once per connection and EXECUTEs it,
+both writing into a throwaway `bench_esophageal` table.
+"""
+import argparse
+import statistics
+import time
+
+from src import load, plan_cache, rule_engine, validate
+from src.repo import get_conn
+from src.rules import REQUIRED_COLUMNS
+
+from . import results as bench_results
+from .bench_load import BENCH_TABLE, make_frame
+from .fakes import db_available
+
+PK = ["patient_barcode"]
+
+def _per_batch_ms(fn, batches: list) -> dict:
+    """Median and p95 latency of fn(batch) over `batches`, in milliseconds."""
+    times = []
+    for batch in batches:
+        start = time.perf_counter()
+        fn(batch)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {"median": round(statistics.median(times), 4), "p95": round(times[int(len(times) * 0.95) - 1], 4)}
+
+def _plans_uncached(batch):
+    cols = batch.columns.tolist()
+    load.build_upsert_sql.__wrapped__(BENCH_TABLE, cols, PK)
+    rule_engine.compile_rules(required=list(REQUIRED_COLUMNS[:-1]))
+
+def _plans_cached(batch):
+    cols = batch.columns.tolist()
+    load.build_upsert_sql(BENCH_TABLE, cols, PK)
+    validate.rules_for(REQUIRED_COLUMNS[:-1])
+
+def run(batches: int, rows: int) -> dict:
+    df = make_frame(batches * rows)
+    frames = [df.iloc[i:i + rows] for i in range(0, len(df), rows)]
+    results = {"batches": batches, "rows_per_batch": rows}
+
+    plan_cache.reset()
+    for name, fn in (("uncached", _plans_uncached), ("cached", _plans_cached)):
+        latency = _per_batch_ms(fn, frames)
+        results[f"plans_{name}_median_ms"] = latency["median"]
+        results[f"plans_{name}_p95_ms"] = latency["p95"]
+
+    if db_available():
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+            cur.execute(f"CREATE TABLE {BENCH_TABLE} (LIKE stg_esophageal INCLUDING ALL);")
+            conn.commit()
+        try:
+            results["mode"] = "postgres"
+            for name, loader in (("upsert", load.upsert_dataframe), ("prepared", load.prepared_upsert_dataframe)):
+                latency = _per_batch_ms(lambda batch: loader(batch, BENCH_TABLE, PK), frames)
+                results[f"{name}_median_ms"] = latency["median"]
+                results[f"{name}_p95_ms"] = latency["p95"]
+            results["speedup"] = round(results["upsert_median_ms"] / results["prepared_median_ms"], 2)
+        finally:
+            with get_conn() as conn, conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+                conn.commit()
+    else:
+        results["mode"] = "client-only"
+
+    results["plan_cache"] = plan_cache.stats()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=10)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("plan_cache", run(args.batches, args.rows), args)
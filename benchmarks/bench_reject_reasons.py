@@ -0,0 +1,73 @@
+"""
+Benchmark: vectorized validate.build_reject_reasons vs the previous iterrows loop.
+
+    python -m benchmarks.bench_reject_reasons --rows 1000000
+
+Rows are synthetic with roughly the Esophageal reject mix (~70% invalid). The
+legacy implementation is kept here verbatim as the baseline and parity oracle.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import validate
+from src.rules import REQUIRED_COLUMNS
+
+from . import results as bench_results
+
+def legacy_build_reject_reasons(df: pd.DataFrame, invalid_mask: pd.Series, existing_required: list[str]) -> list[str]:
+    reasons = []
+    for _, row in df[invalid_mask].iterrows():
+        row_reasons = []
+        missing_fields = [c for c in existing_required if pd.isna(row[c])]
+        if missing_fields:
+            row_reasons.append("Missing fields: " + ", ".join(missing_fields))
+        if "height" in df.columns and not pd.isna(row.get("height")) and (row["height"] <= 0 or row["height"] > 300):
+            row_reasons.append("Invalid height value")
+        if "weight" in df.columns and not pd.isna(row.get("weight")) and (row["weight"] <= 0 or row["weight"] > 500):
+            row_reasons.append("Invalid weight value")
+        if not row_reasons:
+            row_reasons.append("Failed validation")
+        reasons.append("; ".join(row_reasons))
+    return reasons
+
+def make_frame(rows: int, reject_ratio: float = 0.7, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: np.full(rows, "x", dtype=object) for c in REQUIRED_COLUMNS})
+    df["height"] = rng.uniform(145, 202, rows)
+    df["weight"] = rng.uniform(41, 198, rows)
+    # Spread the rejects over the rules: missing fields, out-of-range height/weight.
+    bad = rng.random(rows) < reject_ratio
+    rule = rng.integers(0, 4, rows)
+    for i, c in enumerate(["gender", "race_list", "reflux_history"]):
+        df.loc[bad & (rule == i) | bad & (rng.random(rows) < 0.2), c] = None
+    df.loc[bad & (rule == 3), "height"] = rng.choice([-1.0, 0.0, 350.0], rows)[bad & (rule == 3)]
+    df.loc[bad & (rng.random(rows) < 0.1), "weight"] = 600.0
+    return df
+
+def run(rows: int, legacy: bool = True) -> dict:
+    df = make_frame(rows)
+    invalid_mask, existing_required = validate.build_invalid_mask(df, REQUIRED_COLUMNS)
+    results = {"rows": rows, "rejects": int(invalid_mask.sum())}
+
+    start = time.perf_counter()
+    reasons = validate.build_reject_reasons(df, invalid_mask, existing_required)
+    results["vectorized_s"] = time.perf_counter() - start
+
+    if legacy:
+        start = time.perf_counter()
+        expected = legacy_build_reject_reasons(df, invalid_mask, existing_required)
+        results["iterrows_s"] = time.perf_counter() - start
+        results["identical"] = reasons == expected
+        results["speedup"] = round(results["iterrows_s"] / results["vectorized_s"], 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorized builder")
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("reject_reasons", run(args.rows, legacy=not args.skip_legacy), args)
@@ -0,0 +1,51 @@
+"""
+Benchmark: clean/validate in one process vs sharded across 1..N (src/sharded.py).
+
+    python -m benchmarks.bench_sharded --rows 1000000 --max-shards 8
+
+A synthetic frame of `rows` rows (projected to the source columns, as extract()
+returns it) goes through clean(), resolve_pk_conflicts(), the manifest's row
+hashes and validate() in this process, then through sharded.clean_validate()
+with each shard count up to `max_shards` (the CPU count by default). Sharded
+timings include splitting the frame, the Arrow transport and the merge, so
+the 1-shard run measures that overhead alone.
+"""
+import argparse
+import os
+import time
+
+from src import clean, manifest, sharded, validate
+from src.rules import SOURCE_COLUMNS
+
+from . import results as bench_results
+from .synthetic import make_raw_frame
+
+PK = ["patient_barcode"]
+
+def _single_process(raw, policy: str):
+    cleaned_raw = clean.resolve_pk_conflicts(clean.clean(raw), PK, policy)
+    manifest.changed_rows(cleaned_raw, PK, {})
+    return validate.validate(cleaned_raw, write_rejects_path=None)
+
+def run(rows: int, max_shards: int, policy: str = "last") -> dict:
+    raw = make_raw_frame(rows, duplicate_ratio=0.05, extra_columns=0)[SOURCE_COLUMNS]
+    results = {"rows": len(raw), "cpus": os.cpu_count()}
+
+    start = time.perf_counter()
+    _single_process(raw, policy)
+    results["single_process_s"] = round(time.perf_counter() - start, 3)
+
+    for shards in range(1, max_shards + 1):
+        start = time.perf_counter()
+        sharded.clean_validate(raw, PK, policy, shards=shards)
+        results[f"shards_{shards}_s"] = round(time.perf_counter() - start, 3)
+        results[f"shards_{shards}_speedup"] = round(results["single_process_s"] / results[f"shards_{shards}_s"], 2)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("sharded", run(args.rows, args.max_shards), args)
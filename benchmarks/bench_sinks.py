@@ -0,0 +1,61 @@
+"""
+Benchmark: write time, read time and size of each output format (src/sinks.py).
+
+    python -m benchmarks.bench_sinks --rows 500000
+
+The validated rows of a synthetic file (see benchmarks/synthetic.py) are
+written and read back once per format.
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src import clean, sinks, validate
+from src.pipeline import to_table_columns
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES
+
+from . import results as bench_results
+from .synthetic import write_csv
+
+READERS = {
+    ".csv": pd.read_csv,
+    ".json": pd.read_json,
+    ".parquet": pd.read_parquet,
+    ".arrow": pd.read_feather,
+}
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return os.path.getsize(path)
+
+def run(rows: int) -> dict:
+    results = {"rows": rows}
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = csv_reader.extract(str(write_csv(Path(tmp) / "synthetic.csv", rows)), usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES)
+        valid, rejects = validate.validate(clean.clean(raw), write_rejects_path=None)
+        df, _ = to_table_columns(valid, rejects)
+
+        for suffix, read in READERS.items():
+            name = suffix[1:]
+            path = Path(tmp) / f"cleaned{suffix}"
+            start = time.perf_counter()
+            sinks.write_frame(df, path)
+            results[f"{name}_write_s"] = round(time.perf_counter() - start, 3)
+            start = time.perf_counter()
+            read(path)
+            results[f"{name}_read_s"] = round(time.perf_counter() - start, 3)
+            results[f"{name}_mb"] = round(_size(path) / 1e6, 2)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("sinks", run(args.rows), args)
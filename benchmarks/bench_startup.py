@@ -0,0 +1,78 @@
+"""
+Benchmark: start-up time of the command-line entry point (src/cli.py).
+
+    python -m benchmarks.bench_startup --repeat 5 --rows 1000
+
+Each command runs in a fresh interpreter, `repeat` times, and the best wall
+time is reported. The commands run from a temporary directory against a
+registry holding one small synthetic source, so the tracked logs and outputs
+are left alone. `<command>_modules` counts the modules each one imported and
+`<command>_psycopg2` whether psycopg2 was among them.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import results as bench_results
+from .synthetic import write_csv
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Run in the child interpreter: the CLI with the given arguments, then the modules it imported.
+CHILD = """
+import json, sys
+from src.cli import main
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+print(json.dumps({"modules": len(sys.modules), "psycopg2": "psycopg2" in sys.modules}))
+"""
+
+def _registry(directory: Path, rows: int) -> Path:
+    csv_path = write_csv(directory / "esophageal_synthetic.csv", rows)
+    config = directory / "sources.yaml"
+    config.write_text(json.dumps({"sources": {"bench": {
+        "path": str(csv_path), "reader": "csv", "rules": "esophageal",
+        "table": "bench_esophageal", "rejects_table": "bench_rejects", "pk": ["patient_barcode"],
+    }}}))
+    return config
+
+def _best(argv: list[str], cwd: str, repeat: int) -> tuple[float, dict]:
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    best, info = float("inf"), {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", CHILD, *argv], cwd=cwd, env=env,
+                             capture_output=True, text=True, check=True)
+        best = min(best, time.perf_counter() - start)
+        info = json.loads(out.stdout.strip().splitlines()[-1])
+    return round(best, 4), info
+
+def run(repeat: int, rows: int) -> dict:
+    results = {"repeat": repeat, "rows": rows}
+    with tempfile.TemporaryDirectory() as tmp:
+        config = str(_registry(Path(tmp), rows))
+        commands = {
+            "help": ["ingest", "--help"],
+            "validate_only": ["ingest", "--config", config, "--validate-only"],
+            "dry_run": ["ingest", "--config", config, "--dry-run"],
+        }
+        for name, argv in commands.items():
+            results[f"{name}_s"], info = _best(argv, tmp, repeat)
+            results[f"{name}_modules"] = info["modules"]
+            results[f"{name}_psycopg2"] = info["psycopg2"]
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1000)
+    bench_results.add_arguments(parser)
+    args = parser.parse_args()
+    bench_results.report("startup", run(args.repeat, args.rows), args)
@@ -0,0 +1,34 @@
+"""
+Stand-ins for a Postgres connection when none is reachable: they accept every
+statement and do the client-side work psycopg2 would (rendering each row into the
+INSERT, draining the COPY stream), without a server.
+"""
+
+class NullCursor:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def execute(self, sql): pass
+    def copy_expert(self, sql, file):
+        while file.read(8192):
+            pass
+
+class NullConn:
+    def cursor(self): return NullCursor()
+    def commit(self): pass
+    def rollback(self): pass
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+def null_execute_values(cur, sql, records, template=None):
+    # Mirrors the per-row template rendering execute_values does client-side,
+    # and leaves the statement in cur.query like psycopg2 does.
+    values = ",".join(template % tuple(repr(v) for v in row) for row in records)
+    cur.query = sql.replace("%s", values, 1).encode()
+
+def db_available() -> bool:
+    from src.repo import get_conn
+    try:
+        get_conn().close()
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,76 @@
+"""
+JSON results for the benchmarks, so runs can be compared.
+
+Each benchmark's __main__ accepts --save (write benchmarks/results/<name>_<timestamp>.json)
+and --baseline PATH|latest (flag timings that got slower than the baseline by more
+than --threshold, exiting with status 1). Timings are the result keys ending in "_s".
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = Path("benchmarks/results")
+DEFAULT_THRESHOLD = 0.10
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+def save(name: str, results: dict, results_dir: Path = RESULTS_DIR) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{name}_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    path.write_text(json.dumps({"benchmark": name, "environment": environment(), "results": results}, indent=2))
+    return path
+
+def latest(name: str, results_dir: Path = RESULTS_DIR) -> Path | None:
+    # Timestamped names sort chronologically.
+    paths = sorted(results_dir.glob(f"{name}_*.json"))
+    return paths[-1] if paths else None
+
+def load(path: Path) -> dict:
+    return json.loads(Path(path).read_text())["results"]
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> dict[str, float]:
+    """Timings in `current` more than `threshold` slower than in `baseline`, as current/baseline ratios."""
+    regressions = {}
+    for key, seconds in current.items():
+        before = baseline.get(key)
+        if not key.endswith("_s") or not before or seconds is None:
+            continue
+        ratio = seconds / before
+        if ratio > 1 + threshold:
+            regressions[key] = round(ratio, 2)
+    return regressions
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--save", action="store_true", help=f"write the results to {RESULTS_DIR}/")
+    parser.add_argument("--baseline", help="results file to compare against, or 'latest'")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown ratio (default: %(default)s)")
+
+def report(name: str, results: dict, args: argparse.Namespace) -> None:
+    """Print `results`, then compare and save them as requested on the command line."""
+    print(results)
+    # Resolved before saving, so "latest" never means this run.
+    baseline = latest(name) if args.baseline == "latest" else args.baseline
+    if args.save:
+        print(f"Saved to {save(name, results)}")
+    if not args.baseline:
+        return
+    if baseline is None:
+        print(f"No saved results for {name} to compare against.")
+        return
+    regressions = compare(results, load(baseline), args.threshold)
+    if regressions:
+        print(f"Regressions against {baseline}: {regressions}")
+        sys.exit(1)
+    print(f"No regressions against {baseline}.")
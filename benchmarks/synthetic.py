@@ -0,0 +1,106 @@
+"""
+Synthetic data shaped like data/Esophageal_Dataset.csv.
+
+    python -m benchmarks.synthetic --rows 1000000 --out /tmp/esophageal_synthetic.csv
+
+Values are drawn from the same domains as the real file (raw column names and
+spellings, before clean() normalizes them). `reject_ratio` of the rows are made
+invalid, half by blanking a required field and half by an out-of-range height or
+weight; `duplicate_ratio` of the rows repeat an earlier row.
+
+`null_ratio` of the `NULL_COLUMN` cells are blank, half of them as empty fields
+and half as whitespace, which clean() turns into nulls. That column is projected
+and required, like every source column, so those rows are rejected as well
+(about reject_ratio + null_ratio * (1 - reject_ratio) of the rows in all), and
+above COLUMN_NULL_THRESHOLD clean() drops the column instead. The same share of
+the `extra_columns` filler columns, which extract() skips, is blank too.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.rules import REQUIRED_COLUMNS, HEIGHT_MAX, WEIGHT_MAX
+
+# Value pools for the text columns, as spelled in the source file.
+TEXT_VALUES = {
+    'gender': ['MALE', 'FEMALE'],
+    'race_list': ['WHITE', 'ASIAN', 'BLACK OR AFRICAN AMERICAN'],
+    'reflux_history': ['NO', 'YES'],
+    'barretts_esophagus': ['No', 'Yes-USA', 'Yes-UK'],
+    'primary_pathology_histological_type': ['Esophagus Adenocarcinoma, NOS', 'Esophagus Squamous Cell Carcinoma'],
+    'person_neoplasm_cancer_status': ['TUMOR FREE', 'WITH TUMOR'],
+    'vital_status': ['Alive', 'Dead'],
+}
+
+# The text column null_ratio blanks; the sparsest one in the source file (~20% blank).
+NULL_COLUMN = 'barretts_esophagus'
+
+def make_raw_frame(
+    rows: int,
+    *,
+    reject_ratio: float = 0.2,
+    null_ratio: float = 0.1,
+    duplicate_ratio: float = 0.0,
+    extra_columns: int = 20,
+    seed: int = 0,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'patient_barcode': [f"tcga-{i:08d}" for i in range(rows)],
+        'height': rng.uniform(145, 202, rows).round(1),
+        'weight': rng.uniform(41, 198, rows).round(1),
+        'primary_pathology_age_at_initial_pathologic_diagnosis': pd.array(rng.integers(27, 91, rows), dtype="Int64"),
+        'frequency_of_alcohol_consumption': rng.integers(0, 8, rows).astype(float),
+        'amount_of_alcohol_consumption_per_day': rng.integers(0, 8, rows).astype(float),
+        'tobacco_smoking_history': rng.integers(1, 5, rows).astype(float),
+    })
+    for col, values in TEXT_VALUES.items():
+        df[col] = rng.choice(np.array(values, dtype=object), rows)
+    df = df[REQUIRED_COLUMNS]
+
+    rejects = rng.choice(rows, int(rows * reject_ratio), replace=False)
+    blanked, out_of_range = rejects[:len(rejects) // 2], rejects[len(rejects) // 2:]
+    blank_cols = rng.integers(0, len(REQUIRED_COLUMNS), len(blanked))
+    for i, col in enumerate(REQUIRED_COLUMNS):
+        df.loc[blanked[blank_cols == i], col] = None
+    height_rows = out_of_range[:len(out_of_range) // 2]
+    weight_rows = out_of_range[len(out_of_range) // 2:]
+    df.loc[height_rows, 'height'] = rng.choice([0.0, HEIGHT_MAX + 50.0], len(height_rows))
+    df.loc[weight_rows, 'weight'] = rng.choice([0.0, WEIGHT_MAX + 50.0], len(weight_rows))
+
+    nulls = np.flatnonzero(rng.random(rows) < null_ratio)
+    df.loc[nulls[::2], NULL_COLUMN] = None
+    df.loc[nulls[1::2], NULL_COLUMN] = "  "
+
+    for i in range(extra_columns):
+        filler = rng.integers(0, 1000, rows).astype(str).astype(object)
+        filler[rng.random(rows) < null_ratio] = None
+        df[f"filler_{i}"] = filler
+
+    duplicates = int(rows * duplicate_ratio)
+    if duplicates:
+        df = pd.concat([df, df.iloc[rng.choice(rows, duplicates)]], ignore_index=True)
+
+    # Leading unnamed index column, as in the source file.
+    df.insert(0, "", range(len(df)))
+    return df
+
+def write_csv(path: str | Path, rows: int, **kwargs) -> Path:
+    path = Path(path)
+    make_raw_frame(rows, **kwargs).to_csv(path, index=False)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--reject-ratio", type=float, default=0.2)
+    parser.add_argument("--null-ratio", type=float, default=0.1)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--extra-columns", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(write_csv(args.out, args.rows, reject_ratio=args.reject_ratio, null_ratio=args.null_ratio,
+                    duplicate_ratio=args.duplicate_ratio, extra_columns=args.extra_columns, seed=args.seed))
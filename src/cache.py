@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import logging
+from pathlib import Path
+import pandas as pd
+
+logger = logging.getLogger("etl.cache")
+
+# Read-through cache of parsed raw inputs, enabled with ETL_CACHE=1. Entries are
+# uncompressed Arrow IPC (Feather) files, memory-mapped on read.
+ENABLED = os.getenv("ETL_CACHE", "") == "1"
+CACHE_DIR = Path(os.getenv("ETL_CACHE_DIR", "data/cache"))
+# Least recently used entries are evicted once the directory exceeds this size.
+MAX_BYTES = int(float(os.getenv("ETL_CACHE_MAX_MB", "1024")) * 1_000_000)
+
+SUFFIX = ".arrow"
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def entry_path(path: str, fingerprint: dict, options: dict, cache_dir: Path = CACHE_DIR) -> Path:
+    """
+    `<path>-<fingerprint>-<options>.arrow`, each part a digest: the file's
+    resolved path; its size, mtime and content hash; the reader and parse options.
+    """
+    parts = (
+        _digest(str(Path(path).resolve())),
+        _digest([fingerprint["size"], fingerprint["mtime_ns"], fingerprint["sha256"]]),
+        _digest(options),
+    )
+    return cache_dir / ("-".join(parts) + SUFFIX)
+
+def extract(reader, path: str, fingerprint: dict | None, *, cache_dir: Path | None = None, **options) -> pd.DataFrame:
+    """
+    reader.extract(path, **options), served from the cache when an entry for the
+    same file content and options exists, and stored in it otherwise.
+
+    `fingerprint` is the file's manifest.file_fingerprint(); without one (remote
+    sources) or with the cache disabled the reader is called directly. Passing
+    `cache_dir` enables the cache regardless of ETL_CACHE.
+    """
+    if cache_dir is None:
+        if not ENABLED:
+            return reader.extract(path, **options)
+        cache_dir = CACHE_DIR
+    if fingerprint is None:
+        return reader.extract(path, **options)
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        logger.warning("[cache] pyarrow is not installed, reading without the cache")
+        return reader.extract(path, **options)
+
+    entry = entry_path(path, fingerprint, {"reader": reader.__name__, **options}, cache_dir)
+    try:
+        df = feather.read_table(entry, memory_map=True).to_pandas()
+        os.utime(entry)  # Marks the entry as recently used.
+        logger.info(f"[cache] Hit for '{path}' ({len(df)} rows)")
+        return df
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"[cache] Discarding unreadable entry '{entry.name}': {e}")
+        entry.unlink(missing_ok=True)
+
+    df = reader.extract(path, **options)
+    store(df, entry)
+    return df
+
+def store(df: pd.DataFrame, entry: Path) -> None:
+    import pyarrow.feather as feather
+
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    # Entries for older versions of the same file can never be hit again.
+    path_digest, fingerprint_digest = entry.name.split("-")[:2]
+    for stale in entry.parent.glob(f"{path_digest}-*{SUFFIX}"):
+        if stale.name.split("-")[1] != fingerprint_digest:
+            stale.unlink(missing_ok=True)
+
+    # Written under a temporary name and renamed, so readers never see half an entry.
+    tmp_path = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+    try:
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+    except Exception as e:
+        # E.g. object columns mixing types, which Arrow cannot store.
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"[cache] Could not cache '{entry.name}': {e}")
+        return
+    os.replace(tmp_path, entry)
+    logger.info(f"[cache] Stored {len(df)} rows as '{entry.name}'")
+    evict(entry.parent)
+
+def evict(cache_dir: Path = CACHE_DIR, max_bytes: int | None = None) -> list[Path]:
+    """Delete the least recently used entries until the cache fits in `max_bytes`."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for entry in cache_dir.glob(f"*{SUFFIX}"):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:  # Evicted concurrently by another process.
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, entry))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        entry.unlink(missing_ok=True)
+        total -= size
+        evicted.append(entry)
+    if evicted:
+        logger.info(f"[cache] Evicted {len(evicted)} entries to stay within {max_bytes / 1e6:.0f} MB")
+    return evicted
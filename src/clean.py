@@ -1,21 +1,30 @@
+import numpy as np
 import pandas as pd
-from .rules import PLACEHOLDER_COLUMNS, COLUMN_NULL_THRESHOLD
+from typing import Iterable, Iterator
+from .rules import PLACEHOLDER_COLUMNS, COLUMN_NULL_THRESHOLD, CATEGORICAL_MAX_UNIQUE_RATIO, CARDINALITY_SAMPLE_ROWS
 import logging
 
 logger = logging.getLogger("etl.clean")
 
+# Arrow-backed strings (NaN for missing, like object columns) run the string
+# methods in vectorized Arrow kernels; None when pyarrow or pandas is too old.
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING = pd.StringDtype("pyarrow", na_value=np.nan)
+except (ImportError, TypeError):
+    ARROW_STRING = None
+
 def clean(df: pd.DataFrame) -> pd.DataFrame:
     """
     Perform generic, schema-agnostic cleaning on the input DataFrame.
 
     Steps:
     1. Work on a copy of the original DataFrame and normalize column names.
-    2. Trim leading/trailing whitespace from all string columns.
+    2. Trim and lower-case all string columns, turning blank strings into nulls.
     3. Remove duplicate rows.
     4. Drop columns that are completely empty.
     5. Drop placeholder/index columns like 'Unnamed: 0' or 'index' if present.
-    6. Normalize blank strings to null values (NaN).
-    7. Dropping columns that are missing more than a threshold percentage of their values.
+    6. Dropping columns that are missing more than a threshold percentage of their values.
 
     NOTE: This function does NOT decide which rows are valid vs rejected.
           That is handled by validation logic in validate.py.
@@ -25,17 +34,12 @@ def clean(df: pd.DataFrame) -> pd.DataFrame:
     """
     logger.info("Starting data cleaning process.")
 
-    # 1. Creates a copy of our DatFrame to avoid mutating the original data.
-    df = df.copy()
-    df.columns = df.columns.str.strip().str.lower()
-
-    # 2. Trims whitespace from string/object columns.
-    for col in df.select_dtypes(include="object").columns:
-        df[col] = df[col].str.strip().str.lower()
+    # 1. & 2. Copies the DataFrame, normalizes column names and string columns.
+    df = normalize_strings(df)
 
-    # 3. Removes duplicate rows.
+    # 3. Removes duplicate rows, comparing one 64-bit key per row instead of every column.
     before = len(df)
-    df = df.drop_duplicates()
+    df = df[first_occurrences(frame_row_keys(df))]
     after = len(df)
     logger.info(f"Removed {before - after} duplicate rows")
 
@@ -43,21 +47,335 @@ def clean(df: pd.DataFrame) -> pd.DataFrame:
     df = df.dropna(axis=1, how="all")
 
     # 5. Removes placeholder/index columns if present.
-    for col in PLACEHOLDER_COLUMNS:
-        if col in df.columns:
-            df = df.drop(columns=[col])
+    df = drop_placeholder_columns(df)
 
-    # 6. Normalizes blank strings / whitespace-only values to NaN.
-    df = df.replace(r"^\s*$", pd.NA, regex=True)
-
-    # 7. Dropping columns that are missing more than a null threshold of their values.
+    # 6. Dropping columns that are missing more than a null threshold of their values.
     null_pct = df.isnull().mean() * 100
     cols_to_drop = null_pct[null_pct > COLUMN_NULL_THRESHOLD].index
     if len(cols_to_drop) > 0:
         logger.info(f"Dropping {len(cols_to_drop)} columns for > {COLUMN_NULL_THRESHOLD}% nulls: {list(cols_to_drop)}")
 
     df = df.drop(columns=cols_to_drop, errors="ignore")
-    
+
     logger.info(f"Cleaning finished. Final shape: {df.shape}")
 
-    return df
\ No newline at end of file
+    return df
+
+def normalize_strings(df: pd.DataFrame) -> pd.DataFrame:
+    # Creates a shallow copy of our DataFrame: columns are replaced below, never
+    # written in place, so the original data is not mutated and nothing is copied up front.
+    df = df.copy(deep=False)
+    df.columns = df.columns.str.strip().str.lower()
+
+    # Categorical columns only need their categories normalized, not every row.
+    for col in df.select_dtypes(include="category").columns:
+        df[col] = normalize_categorical(df[col])
+
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = normalize_text(df[col])
+    return df
+
+def normalize_text(s: pd.Series) -> pd.Series:
+    """
+    Trim and lower-case a text column and turn blank values into nulls.
+
+    A low-cardinality column becomes a categorical so each distinct value is
+    normalized once; the rest go through the string methods, on Arrow-backed
+    strings when pyarrow is installed.
+    """
+    sample = s.iloc[:CARDINALITY_SAMPLE_ROWS]
+    if sample.nunique() <= CATEGORICAL_MAX_UNIQUE_RATIO * len(sample):
+        categorical = s.astype("category")
+        if pd.api.types.is_string_dtype(categorical.cat.categories):
+            return normalize_categorical(categorical)
+
+    if ARROW_STRING is not None and s.dtype == object:
+        s = s.astype(ARROW_STRING)
+    s = s.str.strip().str.lower()
+    return s.mask(s == "")
+
+def normalize_categorical(s: pd.Series) -> pd.Series:
+    """
+    Trim and lower-case the categories of a categorical Series, merging categories
+    that become equal and turning blank ones into nulls.
+    """
+    categories = s.cat.categories
+    if not pd.api.types.is_string_dtype(categories):
+        return s
+
+    normalized = categories.str.strip().str.lower()
+    new_codes, new_categories = pd.factorize(normalized.where(normalized != ""))
+    # factorize maps blank categories to -1; the appended -1 keeps existing nulls (code -1) null.
+    lookup = np.append(new_codes, -1)
+    remapped = pd.Categorical.from_codes(lookup[s.cat.codes.to_numpy()], categories=new_categories)
+    return pd.Series(remapped, index=s.index, name=s.name)
+
+def drop_placeholder_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for col in PLACEHOLDER_COLUMNS:
+        if col in df.columns:
+            df = df.drop(columns=[col])
+    return df
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """
+    Content hash of every row, used to find duplicates across chunks.
+
+    Numeric columns are hashed as float64 so that the same value hashes the same
+    whether a chunk happened to parse the column as int64 or float64.
+    """
+    numeric_cols = df.select_dtypes(include=["number", "bool"]).columns
+    return pd.util.hash_pandas_object(df.astype({c: "float64" for c in numeric_cols}), index=False)
+
+def frame_row_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    One 64-bit key per row, equal for equal rows within `df` only.
+
+    Hashing every string is the slow part of row_hashes(), so text columns are
+    first replaced by their factorized codes; unlike row_hashes() the keys are
+    therefore not comparable across frames.
+    """
+    text_cols = df.select_dtypes(include=["object", "string"]).columns
+    codes = {c: pd.factorize(df[c])[0] for c in text_cols}
+    return row_hashes(df.assign(**codes)).to_numpy()
+
+class SeenKeys:
+    """
+    Compact set of 64-bit hashes remembered across chunks: a sorted uint64 array
+    plus an int64 score per key, of which the highest seen is kept (16 bytes per
+    key, versus ~65 for a Python set of ints).
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._scores = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _positions(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < len(self._keys)
+        found[found] = self._keys[pos[found]] == keys[found]
+        return pos, found
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        return self._positions(keys)[1]
+
+    def scores(self, keys: np.ndarray, missing: int = -1) -> np.ndarray:
+        pos, found = self._positions(keys)
+        out = np.full(len(keys), missing, dtype=np.int64)
+        out[found] = self._scores[pos[found]]
+        return out
+
+    def add(self, keys: np.ndarray, scores: np.ndarray | None = None) -> None:
+        if len(keys) == 0:
+            return
+        keys = keys.astype(np.uint64)
+        scores = np.zeros(len(keys), dtype=np.int64) if scores is None else scores.astype(np.int64)
+        # Sorted by key then score, the last entry of each key holds its highest score.
+        order = np.lexsort((scores, keys))
+        keys, scores = keys[order], scores[order]
+        last = np.append(keys[1:] != keys[:-1], True)
+        keys, scores = keys[last], scores[last]
+
+        pos, found = self._positions(keys)
+        self._scores[pos[found]] = np.maximum(self._scores[pos[found]], scores[found])
+        # New keys are inserted in place; np.union1d/np.unique would re-sort everything.
+        at = pos[~found]
+        self._keys = np.insert(self._keys, at, keys[~found])
+        self._scores = np.insert(self._scores, at, scores[~found])
+
+def first_occurrences(hashes: np.ndarray) -> np.ndarray:
+    return ~pd.Series(hashes).duplicated().to_numpy()
+
+def drop_seen_rows(df: pd.DataFrame, seen: SeenKeys) -> pd.DataFrame:
+    """
+    Drop rows that are duplicated within `df` or whose hash is already in `seen`.
+    The hashes of the rows that are kept are added to `seen`.
+    """
+    hashes = row_hashes(df).to_numpy()
+    keep = first_occurrences(hashes) & ~seen.contains(hashes)
+    seen.add(hashes[keep])
+    return df[keep]
+
+# How rows sharing a primary key are resolved before load (source key `pk_policy`):
+# keep the last or first occurrence, or the row with the most non-null values
+# (the last of those on a tie).
+PK_POLICIES = ("last", "first", "most_complete")
+
+# Scores rank the rows of one key by policy, highest kept. The position breaks
+# ties, so each key has exactly one best row.
+_COMPLETE_SCALE = 1 << 32
+
+def _check_policy(policy: str) -> None:
+    if policy not in PK_POLICIES:
+        raise ValueError(f"Unknown pk_policy '{policy}' (expected one of {', '.join(PK_POLICIES)})")
+
+def _pk_scores(policy: str, position: np.ndarray, complete: np.ndarray | None = None) -> np.ndarray:
+    if policy == "first":
+        return -position
+    if policy == "last":
+        return position
+    return complete * _COMPLETE_SCALE + position
+
+class PkWinners:
+    """
+    The row each primary key resolves to under `policy` across a whole chunked
+    source, so a streaming run keeps the same rows as resolve_pk_conflicts() on
+    the full file. Keeping a later version of a key next to an earlier one
+    would leave both loaded when they land in different tables (one valid, one
+    rejected).
+
+    The pre-pass observe()s every cleaned chunk and finish()es once the dropped
+    columns are known; the chunk pass then keep()s only each key's best row.
+    Rows are numbered by their position in the de-duplicated stream, which both
+    passes see in the same order. One hash and score is held per key (see
+    SeenKeys); "most_complete" also holds each row's key and packed not-null
+    bits until finish(), as only then is it known which columns count.
+    """
+
+    def __init__(self, key_columns: list[str], policy: str = "last"):
+        _check_policy(policy)
+        self.key_columns = key_columns
+        self.policy = policy
+        self._best = SeenKeys()
+        self._observed = 0
+        self._kept = 0
+        self._columns = None
+        self._rows = []
+
+    def _keys(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+        key_columns = [c for c in self.key_columns if c in df.columns]
+        if not key_columns:
+            return None
+        has_key = df[key_columns].notna().all(axis=1).to_numpy()
+        return row_hashes(df[key_columns]).to_numpy(), has_key
+
+    def observe(self, df: pd.DataFrame) -> None:
+        position = np.arange(self._observed, self._observed + len(df), dtype=np.int64)
+        self._observed += len(df)
+        keys = self._keys(df)
+        if keys is None:
+            return
+        keys, has_key = keys
+        if self.policy == "most_complete":
+            if self._columns is None:
+                self._columns = df.columns.tolist()
+            notna = df.reindex(columns=self._columns).notna().to_numpy()[has_key]
+            self._rows.append((keys[has_key], position[has_key], np.packbits(notna, axis=1)))
+        else:
+            self._best.add(keys[has_key], _pk_scores(self.policy, position[has_key]))
+
+    def finish(self, columns_to_drop: list[str]) -> None:
+        if self._rows:
+            counted = np.array([c not in columns_to_drop for c in self._columns])
+            for keys, position, bits in self._rows:
+                complete = np.unpackbits(bits, axis=1, count=len(self._columns))[:, counted].sum(axis=1, dtype=np.int64)
+                self._best.add(keys, _pk_scores(self.policy, position, complete))
+        self._rows = []
+
+    def keep(self, df: pd.DataFrame) -> np.ndarray:
+        position = np.arange(self._kept, self._kept + len(df), dtype=np.int64)
+        self._kept += len(df)
+        keys = self._keys(df)
+        if keys is None:
+            return np.ones(len(df), dtype=bool)
+        keys, has_key = keys
+        complete = df.notna().sum(axis=1).to_numpy(dtype=np.int64) if self.policy == "most_complete" else None
+        best = self._best.scores(keys, missing=np.iinfo(np.int64).min)
+        return ~has_key | (best == _pk_scores(self.policy, position, complete))
+
+def resolve_pk_conflicts(df: pd.DataFrame, key_columns: list[str], policy: str = "last", winners: PkWinners | None = None) -> pd.DataFrame:
+    """
+    Keep one row per primary key, chosen by `policy` (see PK_POLICIES), so no
+    upsert statement touches the same key twice. Rows with a null key are left
+    for validation to reject.
+
+    With `winners` (one per chunked run, filled by find_columns_to_drop) the
+    policy applies across the whole source: each chunk keeps only the rows that
+    are their key's best over all chunks.
+    """
+    _check_policy(policy)
+    if winners is not None:
+        keep = winners.keep(df)
+    else:
+        key_columns = [c for c in key_columns if c in df.columns]
+        if not key_columns or df.empty:
+            return df
+
+        has_key = df[key_columns].notna().all(axis=1).to_numpy()
+        keys = frame_row_keys(df[key_columns])
+        position = np.arange(len(df), dtype=np.int64)
+        complete = df.notna().sum(axis=1).to_numpy(dtype=np.int64) if policy == "most_complete" else None
+        score = _pk_scores(policy, position, complete)
+
+        # Within the frame, keep the highest-scoring row of each key.
+        order = np.lexsort((score, keys))
+        best = np.zeros(len(df), dtype=bool)
+        best[order[np.append(keys[order][1:] != keys[order][:-1], True)]] = True
+        keep = best | ~has_key
+
+    dropped = len(df) - int(keep.sum())
+    if dropped:
+        logger.info(f"Resolved {dropped} primary-key conflicts on {key_columns} keeping the {policy.replace('_', '-')} row")
+    return df[keep]
+
+def find_columns_to_drop(chunks: Iterable[pd.DataFrame], winners: PkWinners | None = None) -> list[str]:
+    """
+    Pre-pass over a chunked source that decides which columns clean() would drop
+    had it seen the whole file at once (steps 4 and 6), and fills `winners`.
+
+    Null percentages are computed over normalized, de-duplicated rows, so the
+    decision matches the in-memory path while only one chunk is held at a time.
+    """
+    seen = SeenKeys()
+    null_counts = None
+    total_rows = 0
+
+    for chunk in chunks:
+        chunk = drop_seen_rows(normalize_strings(chunk), seen)
+        chunk = drop_placeholder_columns(chunk)
+        if winners is not None:
+            winners.observe(chunk)
+        counts = chunk.isna().sum()
+        null_counts = counts if null_counts is None else null_counts.add(counts, fill_value=0)
+        total_rows += len(chunk)
+
+    if null_counts is None:
+        return []
+    columns_to_drop = columns_over_null_threshold(null_counts, total_rows)
+    if winners is not None:
+        winners.finish(columns_to_drop)
+    return columns_to_drop
+
+def columns_over_null_threshold(null_counts: pd.Series, total_rows: int) -> list[str]:
+    """
+    The columns clean() drops (steps 4 and 6), from their null counts summed over
+    normalized, de-duplicated rows: empty ones and those over COLUMN_NULL_THRESHOLD.
+    """
+    if total_rows == 0:
+        return []
+    null_pct = null_counts / total_rows * 100
+    cols_to_drop = null_pct[(null_pct > COLUMN_NULL_THRESHOLD) | (null_counts == total_rows)].index
+    logger.info(f"Dropping {len(cols_to_drop)} columns for > {COLUMN_NULL_THRESHOLD}% nulls: {list(cols_to_drop)}")
+    return list(cols_to_drop)
+
+def clean_chunks(chunks: Iterable[pd.DataFrame], columns_to_drop: list[str]) -> Iterator[pd.DataFrame]:
+    """
+    Streaming counterpart of clean(): yields one cleaned chunk per input chunk.
+
+    Duplicates are removed across chunk boundaries by remembering row hashes, and
+    the column drops come from find_columns_to_drop() so every chunk has the same shape.
+    """
+    seen = SeenKeys()
+    total_in = total_out = 0
+
+    for chunk in chunks:
+        total_in += len(chunk)
+        chunk = drop_seen_rows(normalize_strings(chunk), seen)
+        chunk = drop_placeholder_columns(chunk)
+        chunk = chunk.drop(columns=columns_to_drop, errors="ignore")
+        total_out += len(chunk)
+        yield chunk
+
+    logger.info(f"Removed {total_in - total_out} duplicate rows")
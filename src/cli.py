@@ -0,0 +1,116 @@
+"""
+Command-line entry point, for scheduled per-file jobs:
+
+    python -m src ingest --source esophageal
+    python -m src ingest --source esophageal --dry-run
+
+Only the standard library is imported up front; pandas, the pipeline and the
+database modules are imported by the command that needs them. Options default
+to the ETL_* env vars read by `python -m src.main`.
+"""
+import argparse
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger("etl.cli")
+
+# Kept in step with pipeline.LOADERS, which is not imported just to parse arguments.
+LOADER_NAMES = ("upsert", "copy", "prepared")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src", description="ETL pipeline for the sources in config/sources.yaml.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="extract, clean, validate and load sources")
+    ingest.add_argument("--source", dest="sources", action="append", metavar="NAME",
+                        help="registry entry to ingest, repeatable (default: every enabled source)")
+    ingest.add_argument("--config", default=None, metavar="PATH", help="source registry (default: config/sources.yaml)")
+    ingest.add_argument("--chunksize", type=int, default=int(os.getenv("ETL_CHUNKSIZE", "0")) or None,
+                        help="stream each file in chunks of this many rows")
+    ingest.add_argument("--loader", choices=LOADER_NAMES, default=os.getenv("ETL_LOADER", "upsert"))
+    ingest.add_argument("--csv-engine", default=os.getenv("ETL_CSV_ENGINE") or None)
+    ingest.add_argument("--max-workers", type=int, default=None)
+    ingest.add_argument("--incremental", action="store_true", default=os.getenv("ETL_INCREMENTAL", "") == "1")
+    ingest.add_argument("--pipelined", action="store_true", default=os.getenv("ETL_PIPELINED", "") == "1")
+    ingest.add_argument("--sql-validate", action="store_true", default=os.getenv("ETL_SQL_VALIDATE", "") == "1",
+                        help="COPY raw CSV rows into Postgres and clean, validate and load them in SQL")
+    mode = ingest.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true",
+                      help="extract, clean and validate, then report row counts without loading or writing outputs")
+    mode.add_argument("--validate-only", action="store_true",
+                      help="check the registry and that the selected source files exist, without reading them or calling APIs")
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.sources is None:
+        args.sources = [s for s in os.getenv("ETL_SOURCES", "").split(",") if s] or None
+
+    from .logging_config import setup_logging
+    setup_logging()
+
+    if args.validate_only:
+        return validate_only(args)
+    if args.dry_run:
+        return dry_run(args)
+
+    from .main import main as run
+    run(
+        sources=args.sources,
+        chunksize=args.chunksize,
+        loader=args.loader,
+        csv_engine=args.csv_engine,
+        max_workers=args.max_workers,
+        incremental=args.incremental,
+        pipelined=args.pipelined,
+        sources_path=args.config,
+        sql_validation=args.sql_validate,
+    )
+    return 0
+
+def _selected(args) -> list[dict]:
+    from .sources import load_sources
+
+    registry = load_sources(args.config) if args.config else load_sources()
+    unknown = [name for name in args.sources or [] if name not in registry]
+    if unknown:
+        raise ValueError(f"Unknown or disabled sources: {', '.join(unknown)}")
+    return [registry[name] for name in (args.sources or registry)]
+
+def validate_only(args) -> int:
+    """Check the registry entries of the selected sources and that their files exist."""
+    from .sources import READERS
+
+    missing = 0
+    for source in _selected(args):
+        if getattr(READERS[source["reader"]], "REMOTE", False):
+            logger.info(f"[{source['name']}] OK: {source['path']} -> {source['table']} ({source['rules']} rules, not fetched)")
+        elif Path(source["path"]).exists():
+            logger.info(f"[{source['name']}] OK: '{source['path']}' -> {source['table']} ({source['rules']} rules)")
+        else:
+            logger.error(f"[{source['name']}] File not found: '{source['path']}'")
+            missing += 1
+    return 1 if missing else 0
+
+def dry_run(args) -> int:
+    """Transform the selected sources and report row counts; nothing is loaded or written."""
+    from . import pipeline
+
+    # Both need the database: the manifest of loaded rows, or validation in Postgres.
+    ignored = [flag for flag, on in (("--incremental", args.incremental), ("--sql-validate", args.sql_validate)) if on]
+    if ignored:
+        logger.warning(f"Dry run: ignoring {' and '.join(ignored)}; every row is validated in pandas")
+
+    for source in _selected(args):
+        source = dict(source, cleaned_output=None, rejected_output=None, rejects_log=None)
+        if args.chunksize:
+            valid = rejected = 0
+            for cleaned_filtered, rejects_filtered in pipeline.transform_chunks(source, args.chunksize):
+                valid += len(cleaned_filtered)
+                rejected += len(rejects_filtered)
+        else:
+            cleaned_filtered, rejects_filtered, _ = pipeline.transform_source(source, args.csv_engine)
+            valid, rejected = len(cleaned_filtered), len(rejects_filtered)
+        logger.info(f"[{source['name']}] Dry run: {valid} valid rows, {rejected} rejected rows (nothing loaded)")
+    return 0
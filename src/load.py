@@ -1,70 +1,349 @@
+import os
+import hashlib
 import pandas as pd
 from typing import List, Callable, Tuple
-from psycopg2.extras import execute_values as _execute_values
-from .repo import get_conn as _get_conn
+import psycopg2
+from psycopg2.extras import execute_values as _execute_values, execute_batch as _execute_batch
+from .repo import pooled_conn as _pooled_conn
+from . import metrics
+from . import plan_cache
 import logging
 
 logger = logging.getLogger("etl.load")
 
+# Rows per INSERT statement, as in execute_values' own default paging.
+PAGE_SIZE = 100
+# Rows per transaction: each batch is committed on its own.
+BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "10000"))
+
+# Errors caused by the rows themselves (values out of range for a column type,
+# constraint violations). A batch failing with one of these is bisected to find
+# the offending rows; any other error aborts the load.
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+# Statement builders are cached per process by table, column set and PK (see plan_cache).
+@plan_cache.cached("load.upsert_sql")
 def build_upsert_sql(table_name: str, cols: list[str], pk_columns: List[str]) -> Tuple[str, str]:
     col_list_sql = ", ".join(cols)
     values_template = "(" + ", ".join(["%s"] * len(cols)) + ")"
 
+    sql = f"""
+        INSERT INTO {table_name} ({col_list_sql})
+        VALUES %s
+        {build_conflict_clause(cols, pk_columns)};
+    """
+    return sql, values_template
+
+def build_conflict_clause(cols: list[str], pk_columns: List[str]) -> str:
     pk_sql = ", ".join(pk_columns)
     update_cols = [c for c in cols if c not in pk_columns]
     set_clause = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_cols])
+    return f"""ON CONFLICT ({pk_sql}) DO UPDATE
+        SET {set_clause}"""
 
-    sql = f"""
+@plan_cache.cached("load.copy_merge_sql")
+def build_copy_merge_sql(table_name: str, staging_table: str, cols: list[str], pk_columns: List[str]) -> Tuple[str, str, str]:
+    """
+    SQL for the COPY loader: create a session-local staging table shaped like
+    `table_name`, COPY into it, then merge it into `table_name` in one statement.
+    """
+    col_list_sql = ", ".join(cols)
+    create_sql = f"CREATE TEMP TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;"
+    copy_sql = f"COPY {staging_table} ({col_list_sql}) FROM STDIN WITH (FORMAT csv)"
+    merge_sql = f"""
         INSERT INTO {table_name} ({col_list_sql})
-        VALUES %s
-        ON CONFLICT ({pk_sql}) DO UPDATE
-        SET {set_clause};
+        SELECT {col_list_sql} FROM {staging_table}
+        {build_conflict_clause(cols, pk_columns)};
     """
-    return sql, values_template
+    return create_sql, copy_sql, merge_sql
+
+@plan_cache.cached("load.insert_sql")
+def build_insert_sql(table_name: str, cols: list[str]) -> Tuple[str, str]:
+    values_template = "(" + ", ".join(["%s"] * len(cols)) + ")"
+    return f"INSERT INTO {table_name} ({', '.join(cols)}) VALUES %s;", values_template
+
+@plan_cache.cached("load.prepared_upsert_sql")
+def build_prepared_upsert_sql(table_name: str, cols: list[str], pk_columns: List[str]) -> Tuple[str, str, str]:
+    """
+    A server-side prepared upsert of one row: the statement name (derived from
+    its text, so each table/column set/PK gets its own), the statement to PREPARE,
+    and the EXECUTE that runs it for one row. Parameter types are inferred by
+    Postgres from the target columns.
+    """
+    placeholders = ", ".join(f"${i}" for i in range(1, len(cols) + 1))
+    statement = f"""
+        INSERT INTO {table_name} ({", ".join(cols)})
+        VALUES ({placeholders})
+        {build_conflict_clause(cols, pk_columns)}
+    """
+    name = "etl_upsert_" + hashlib.sha1(statement.encode()).hexdigest()[:16]
+    execute_sql = f"EXECUTE {name} (" + ", ".join(["%s"] * len(cols)) + ")"
+    return name, statement, execute_sql
+
+@plan_cache.cached("load.delete_keys_sql")
+def build_delete_keys_sql(table_name: str, pk_columns: List[str]) -> str:
+    # One array parameter per key column.
+    if len(pk_columns) == 1:
+        return f"DELETE FROM {table_name} WHERE {pk_columns[0]} = ANY(%s);"
+    placeholders = ", ".join(["%s"] * len(pk_columns))
+    return f"DELETE FROM {table_name} WHERE ({', '.join(pk_columns)}) IN (SELECT * FROM unnest({placeholders}));"
+
+def to_object_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Cast to object first: .where(..., None) keeps NaN in float and categorical
+    # columns, and psycopg2 would send those as 'NaN' rather than NULL.
+    return df.astype(object).where(pd.notnull(df), None)
+
+def execute_pages(cur, sql: str, records: list, template: str, execute_values_fn: Callable, page_size: int = PAGE_SIZE) -> int:
+    """
+    Send `records` one execute_values page at a time and return the number of
+    query bytes sent (0 when the cursor does not expose the last query).
+    """
+    bytes_sent = 0
+    for start in range(0, len(records), page_size):
+        execute_values_fn(cur, sql, records[start:start + page_size], template=template)
+        bytes_sent += len(getattr(cur, "query", None) or b"")
+    return bytes_sent
+
+def _error_message(error: Exception) -> str:
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else type(error).__name__
+
+def load_in_batches(conn, table_name: str, n_rows: int, send_batch: Callable, batch_size: int = BATCH_SIZE) -> dict[int, str]:
+    """
+    Send rows [0, n_rows) with `send_batch(cur, start, stop)`, which returns the
+    bytes it sent, committing every `batch_size` rows.
+
+    A batch rejected with a row error is rolled back and split in halves, which
+    are retried the same way until the offending rows are isolated. Returns their
+    positions mapped to the database error. Each attempt is recorded as a
+    "load.<table>.batch" stage.
+    """
+    failures = {}
+
+    def attempt(start: int, stop: int) -> None:
+        with metrics.stage(f"load.{table_name}.batch", rows=stop - start) as record:
+            try:
+                with conn.cursor() as cur:
+                    record["bytes_sent"] = send_batch(cur, start, stop)
+                conn.commit()
+                return
+            except ROW_ERRORS as e:
+                conn.rollback()
+                record["error"] = error = _error_message(e)
+        if stop - start == 1:
+            failures[start] = error
+            return
+        mid = (start + stop) // 2
+        attempt(start, mid)
+        attempt(mid, stop)
+
+    for start in range(0, n_rows, batch_size):
+        attempt(start, min(start + batch_size, n_rows))
+    if failures:
+        logger.warning(f"[load_in_batches] {len(failures)} rows refused by {table_name}")
+    return failures
+
+def failed_rows(df: pd.DataFrame, failures: dict[int, str]) -> pd.DataFrame:
+    """
+    The rows of `df` at the positions in `failures`, with the database error as
+    their reason (appended to an existing reason).
+    """
+    failed = df.iloc[list(failures)]
+    errors = [f"Load error: {e}" for e in failures.values()]
+    if "reason" in failed.columns:
+        errors = [f"{reason}; {error}" for reason, error in zip(failed["reason"], errors)]
+    return failed.assign(reason=pd.Series(errors, index=failed.index, dtype=object))
 
 def upsert_dataframe(
     df: pd.DataFrame,
     table_name: str,
     pk_columns: List[str],
     *,
-    conn_factory: Callable = _get_conn,
+    conn_factory: Callable = _pooled_conn,
     execute_values_fn: Callable = _execute_values,
-) -> None:
+    batch_size: int = BATCH_SIZE,
+) -> pd.DataFrame:
+    """
+    Upsert `df` in transactions of `batch_size` rows. Returns the rows the
+    database refused (see load_in_batches), with the error as their reason.
+    """
     logger.info(f"Loading {len(df)} rows into {table_name} using PK={pk_columns}")
 
     if df.empty:
         logger.info(f"[upsert_dataframe] No rows to load into {table_name}.")
-        return
+        return failed_rows(df, {})
 
-    df_copy = df.copy().where(pd.notnull(df), None)
+    df_copy = to_object_frame(df)
     cols = df_copy.columns.tolist()
     records = df_copy.to_numpy().tolist()
 
     sql, values_template = build_upsert_sql(table_name, cols, pk_columns)
 
-    with conn_factory() as conn, conn.cursor() as cur:
-        execute_values_fn(cur, sql, records, template=values_template)
+    def send_batch(cur, start: int, stop: int) -> int:
+        return execute_pages(cur, sql, records[start:stop], values_template, execute_values_fn)
+
+    with metrics.stage(f"load.{table_name}", rows=len(records)), conn_factory() as conn:
+        failures = load_in_batches(conn, table_name, len(records), send_batch, batch_size)
+    return failed_rows(df, failures)
+
+def delete_keys(
+    df: pd.DataFrame,
+    table_name: str,
+    pk_columns: List[str],
+    *,
+    conn_factory: Callable = _pooled_conn,
+) -> int:
+    """
+    Delete the rows of `table_name` whose primary key is one of `df`'s, in one
+    statement. Returns how many rows were deleted.
+    """
+    keys = df[pk_columns].dropna().drop_duplicates()
+    if keys.empty:
+        return 0
+    sql = build_delete_keys_sql(table_name, pk_columns)
+    params = [to_object_frame(keys[[c]])[c].tolist() for c in pk_columns]
+
+    with metrics.stage(f"delete.{table_name}", rows=len(keys)), conn_factory() as conn, conn.cursor() as cur:
+        cur.execute(sql, params)
+        deleted = cur.rowcount
         conn.commit()
+    logger.info(f"Deleted {deleted} rows from {table_name} by PK={pk_columns}")
+    return deleted
+
+def prepared_upsert_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    pk_columns: List[str],
+    *,
+    conn_factory: Callable = _pooled_conn,
+    execute_batch_fn: Callable = _execute_batch,
+    batch_size: int = BATCH_SIZE,
+) -> pd.DataFrame:
+    """
+    upsert_dataframe through a server-side prepared statement, for many small
+    loads: the upsert is PREPAREd once per connection (plan_cache.ensure_prepared)
+    and each row EXECUTEs it, PAGE_SIZE rows per round trip, so Postgres parses
+    and plans it once rather than for every statement. Returns the refused rows
+    as upsert_dataframe does.
+    """
+    logger.info(f"Loading {len(df)} rows into {table_name} using PK={pk_columns} (prepared)")
+
+    if df.empty:
+        logger.info(f"[prepared_upsert_dataframe] No rows to load into {table_name}.")
+        return failed_rows(df, {})
+
+    df_copy = to_object_frame(df)
+    cols = df_copy.columns.tolist()
+    records = df_copy.to_numpy().tolist()
+    name, statement, execute_sql = build_prepared_upsert_sql(table_name, cols, pk_columns)
+
+    def send_batch(cur, start: int, stop: int) -> int:
+        plan_cache.ensure_prepared(cur, name, statement)
+        bytes_sent = 0
+        for page in range(start, stop, PAGE_SIZE):
+            page_records = records[page:min(page + PAGE_SIZE, stop)]
+            execute_batch_fn(cur, execute_sql, page_records, page_size=len(page_records))
+            bytes_sent += len(getattr(cur, "query", None) or b"")
+        return bytes_sent
+
+    with metrics.stage(f"load.{table_name}", rows=len(records)), conn_factory() as conn:
+        failures = load_in_batches(conn, table_name, len(records), send_batch, batch_size)
+    return failed_rows(df, failures)
 
 def insert_dataframe(
     df: pd.DataFrame,
     table_name: str,
     *,
-    conn_factory: Callable = _get_conn,
+    conn_factory: Callable = _pooled_conn,
     execute_values_fn: Callable = _execute_values,
-) -> None:
+    batch_size: int = BATCH_SIZE,
+) -> pd.DataFrame:
     if df.empty:
         logger.info(f"[insert_dataframe] No rows to insert into {table_name}.")
-        return
+        return failed_rows(df, {})
 
-    df_copy = df.copy().where(pd.notnull(df), None)
+    df_copy = to_object_frame(df)
     cols = df_copy.columns.tolist()
     records = df_copy.to_numpy().tolist()
 
-    col_list_sql = ", ".join(cols)
-    values_template = "(" + ", ".join(["%s"] * len(cols)) + ")"
-    sql = f"INSERT INTO {table_name} ({col_list_sql}) VALUES %s;"
+    sql, values_template = build_insert_sql(table_name, cols)
 
-    with conn_factory() as conn, conn.cursor() as cur:
-        execute_values_fn(cur, sql, records, template=values_template)
-        conn.commit()
+    def send_batch(cur, start: int, stop: int) -> int:
+        return execute_pages(cur, sql, records[start:stop], values_template, execute_values_fn)
+
+    with metrics.stage(f"load.{table_name}", rows=len(records)), conn_factory() as conn:
+        failures = load_in_batches(conn, table_name, len(records), send_batch, batch_size)
+    return failed_rows(df, failures)
+
+class DataFrameCsvStream:
+    """
+    File-like object that renders a DataFrame as headerless CSV a slice of rows
+    at a time, so COPY can stream it without the whole payload in memory.
+
+    Nulls are written as unquoted empty fields, which COPY's CSV format reads as NULL.
+    """
+
+    def __init__(self, df: pd.DataFrame, rows_per_slice: int = 10_000):
+        self._df = df
+        self._rows_per_slice = rows_per_slice
+        self._pos = 0
+        self._buffer = ""
+        self._offset = 0
+        self.bytes_read = 0
+
+    def _next_slice(self) -> str:
+        part = self._df.iloc[self._pos:self._pos + self._rows_per_slice]
+        self._pos += self._rows_per_slice
+        return part.to_csv(header=False, index=False)
+
+    def read(self, size: int = -1) -> str:
+        if self._offset >= len(self._buffer):
+            if self._pos >= len(self._df):
+                return ""
+            self._buffer, self._offset = self._next_slice(), 0
+        if size < 0:
+            size = len(self._buffer) - self._offset
+        out = self._buffer[self._offset:self._offset + size]
+        self._offset += len(out)
+        # Bytes as sent (UTF-8), like len(cur.query) on the execute_values path.
+        self.bytes_read += len(out.encode())
+        return out
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+def copy_upsert_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    pk_columns: List[str],
+    *,
+    conn_factory: Callable = _pooled_conn,
+    rows_per_slice: int = 10_000,
+    batch_size: int = BATCH_SIZE,
+) -> pd.DataFrame:
+    """
+    Bulk alternative to upsert_dataframe: streams the rows with COPY ... FROM STDIN
+    into a temporary staging table, then merges them into `table_name` with a
+    single INSERT ... SELECT ... ON CONFLICT, once per batch of `batch_size` rows.
+    Returns the rows the database refused, as upsert_dataframe does.
+    """
+    logger.info(f"COPY-loading {len(df)} rows into {table_name} using PK={pk_columns}")
+
+    if df.empty:
+        logger.info(f"[copy_upsert_dataframe] No rows to load into {table_name}.")
+        return failed_rows(df, {})
+
+    cols = df.columns.tolist()
+    create_sql, copy_sql, merge_sql = build_copy_merge_sql(table_name, f"_copy_{table_name}", cols, pk_columns)
+
+    def send_batch(cur, start: int, stop: int) -> int:
+        # The staging table is dropped at commit or rollback, so each batch creates its own.
+        stream = DataFrameCsvStream(df.iloc[start:stop], rows_per_slice)
+        cur.execute(create_sql)
+        cur.copy_expert(copy_sql, stream)
+        cur.execute(merge_sql)
+        return len(create_sql.encode()) + len(copy_sql.encode()) + stream.bytes_read + len(merge_sql.encode())
+
+    with metrics.stage(f"load.{table_name}", rows=len(df)), conn_factory() as conn:
+        failures = load_in_batches(conn, table_name, len(df), send_batch, batch_size)
+    return failed_rows(df, failures)
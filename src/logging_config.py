@@ -1,5 +1,8 @@
 import logging
 from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+LOG_PATH = Path("logs/etl.log")
 
 def setup_logging():
     logger = logging.getLogger("etl")
@@ -15,8 +18,9 @@ def setup_logging():
         "%(asctime)s | %(levelname)s | %(message)s"
     ))
 
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
     file_handler = RotatingFileHandler(
-        "logs/etl.log", maxBytes=5_000_000, backupCount=5
+        LOG_PATH, maxBytes=5_000_000, backupCount=5
     )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(logging.Formatter(
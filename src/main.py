@@ -1,20 +1,35 @@
-import pandas as pd
+import os
+import time
+import logging
 
-from .readers import csv_reader # Extraction logic
-from . import clean # Cleaning logic
-from . import validate # Validation logic
-from . import load # Loading logic
-from .rules import ESOPHAGEAL_COLUMNS, REJECT_COLUMNS
+from . import pipeline # Extract/clean/validate/load for one source or many
 from . import schema_init
+from . import manifest
+from . import repo
+from . import metrics
+from . import sql_validate
+from . import plan_cache # Per-process statement/rule cache hit counts for the report
+from .sources import load_sources
 from .logging_config import setup_logging
 
-logger = setup_logging()
-
-def main():
+logger = logging.getLogger("etl.main")
+
+def main(
+    *,
+    sources: list[str] | None = None,
+    chunksize: int | None = None,
+    loader: str = "upsert",
+    csv_engine: str | None = None,
+    max_workers: int | None = None,
+    incremental: bool = False,
+    pipelined: bool = False,
+    sources_path: str | None = None,
+    sql_validation: bool = False,
+):
     '''
-    ETL Pipeline for Esophageal Dataset
+    ETL Pipeline for the sources registered in config/sources.yaml
 
-    Steps:
+    Steps (per source):
     1. Extract data from CSV file.
     2. Clean the extracted data (generic cleaning).
     3. Validate the cleaned data (types, required fields, domain rules).
@@ -23,77 +38,95 @@ def main():
     6. Save cleaned data and rejects to CSV files.
     7. Print progress and summary information to console.
 
+    `sources` selects registry entries by name (default: every enabled source)
+    from `sources_path` (default: config/sources.yaml).
+    Several sources are ingested concurrently (see pipeline.run_parallel).
+    When `chunksize` is given each file is streamed through the same steps in
+    chunks of at most that many rows (see pipeline.run_streaming). `loader` picks
+    the load strategy from pipeline.LOADERS: "upsert" (execute_values), "copy"
+    (COPY + merge) or "prepared" (a server-side prepared upsert, for many small
+    batches). `csv_engine="pyarrow"` switches the CSV parser. With
+    `pipelined` the chunks of a streaming run are loaded while the next ones are
+    being transformed (see pipeline.run_pipelined).
+
+    With `incremental` the staging tables keep their rows instead of being emptied, files
+    unchanged since the last run (per data/manifest.json) are skipped, and only
+    new or changed rows of the others are validated and loaded. Full runs rewrite
+    the manifest from scratch. Streaming runs do not maintain it.
+
+    With `sql_validation` each CSV file is COPYed into Postgres as is and cleaned,
+    validated and loaded there by SQL generated from rules.py (see
+    sql_validate.run_source); no output files are written.
+
+    Each run writes a JSON report of per-stage wall/CPU time, row throughput,
+    peak memory and bytes sent to logs/ (see metrics.py); ETL_PROFILE=cprofile
+    or ETL_PROFILE=tracemalloc additionally profiles the run.
     '''
-    # Creating the schema
-    schema_init.run_schema()
-
-    # Step 1: Extracting the data
-    data = csv_reader.extract("data/Esophageal_Dataset.csv")
-    #logger.info("Raw Data:")
-    #logger.info(data.head())
-    logger.info(f"Raw Shape: {data.shape}")
-
-    # Step 2: Cleaning the extracted data (generic cleaning)
-    cleaned_raw = clean.clean(data)
-    logger.info("\nAfter generic cleaning:")
-    #logger.info(cleaned_raw.head())
-    logger.info(f"Cleaned Raw Shape: {cleaned_raw.shape}")
-
-    # Step 3: Validating the cleaned data (types, required fields, domain rules)
-    cleaned_data, rejects = validate.validate(cleaned_raw)
-    logger.info("\nValidated Cleaned Data:")
-    #logger.info(cleaned_data.head())
-    logger.info(f"Validated Cleaned Shape: {cleaned_data.shape}")
-
-    logger.info("\nRejected Data:")
-    logger.info(rejects.head())
-    logger.info(f"Rejects Shape: {rejects.shape}")
-
-    # Renaming columns for final database schema
-    column_mapping = {
-        "race_list": "race",
-        "person_neoplasm_cancer_status": "cancer_status",
-        "tobacco_smoking_history": "smoking_history",
-        "primary_pathology_histological_type": "pathology_histological_type",
-        "primary_pathology_age_at_initial_pathologic_diagnosis": "age_at_diagnosis",
-    }
-    cleaned_data = cleaned_data.rename(columns=column_mapping)
-    rejects = rejects.rename(columns=column_mapping)
-
-    logger.info("Columns after validate + rename: %s", list(cleaned_data.columns))
-
-    # Ensuring that the only columns used from our DataFrame are those that exist in our table.
-    cleaned_filtered = cleaned_data[ESOPHAGEAL_COLUMNS].copy()
-    rejects_filtered = rejects[REJECT_COLUMNS].copy()
-
-    logger.info("Columns going into Postgres: %s", list(cleaned_filtered.columns))
-    logger.info("Number of rows going into Postgres: %d", len(cleaned_filtered))
-
-    # Save results to CSV for comparison/audit purposes.
-    cleaned_filtered.to_csv("data/cleaned_esophageal_data.csv", index=False)
-    logger.info("Cleaned data saved to 'data/cleaned_esophageal_data.csv'")
-    rejects_filtered.to_csv("data/rejected_esophageal_data.csv", index=False)
-    logger.info("Rejected data saved to 'data/rejected_esophageal_data.csv'")
-
-    # Step 4: Loading the cleaned data into Postgres.
-    load.upsert_dataframe(
-        cleaned_filtered,
-        table_name="stg_esophageal",
-        pk_columns=["patient_barcode"]
-    )
-    logger.info("Cleaned data loaded into 'stg_esophageal' table.")
+    if incremental and chunksize:
+        raise ValueError("Incremental runs do not support chunksize.")
+    if pipelined and not chunksize:
+        raise ValueError("Pipelined runs require chunksize.")
+    if sql_validation and (chunksize or incremental):
+        raise ValueError("SQL validation does not support chunksize or incremental runs.")
+
+    setup_logging()
+    metrics.reset()
+    profile = {}
+    started = time.perf_counter()
+    with metrics.profiling(profile):
+        summary = _run(sources, chunksize, loader, csv_engine, max_workers, incremental, pipelined, sources_path, sql_validation)
+
+    for name, counts in summary.items():
+        if counts.get("skipped"):
+            logger.info("[%s] Skipped: unchanged since the last run", name)
+            continue
+        logger.info("[%s] Rows loaded: %d", name, counts["rows_loaded"])
+        logger.info("[%s] Rows rejected: %d", name, counts["rows_rejected"])
+
+    metrics.write_report(metrics.build_report(
+        summary,
+        wall_s=round(time.perf_counter() - started, 6),
+        loader=loader,
+        chunksize=chunksize,
+        incremental=incremental,
+        plan_cache=plan_cache.stats(),
+        **profile,
+    ))
+    logger.info("\nSuccessfully completed the ETL process.")
 
-    load.upsert_dataframe(
-        rejects_filtered,
-        table_name="stg_rejects",
-        pk_columns=["patient_barcode"]
-    )
-    logger.info("Rejected data loaded into 'stg_rejects' table.")
+def _run(sources, chunksize, loader, csv_engine, max_workers, incremental, pipelined, sources_path, sql_validation) -> dict:
+    # Applying pending schema migrations; full runs empty the staging tables.
+    with metrics.stage("schema"):
+        schema_init.run_schema(reset=not incremental)
 
-    logger.info("Rows loaded: %d", len(cleaned_filtered))
-    logger.info("Rows rejected: %d", len(rejects))
+    registry = load_sources(sources_path) if sources_path else load_sources()
+    selected = [registry[name] for name in (sources or registry)]
 
-    logger.info("\nSuccessfully completed the ETL process.")
+    manifest_state = manifest.load_manifest() if incremental else {"sources": {}}
+
+    if sql_validation:
+        summary = {s["name"]: sql_validate.run_source(s) for s in selected}
+    elif chunksize:
+        run_chunked = pipeline.run_pipelined if pipelined else pipeline.run_streaming
+        summary = {s["name"]: run_chunked(s, chunksize, loader=loader) for s in selected}
+    elif len(selected) == 1:
+        summary = {selected[0]["name"]: pipeline.run_source(
+            selected[0], loader=loader, csv_engine=csv_engine, manifest_state=manifest_state)}
+    else:
+        summary = pipeline.run_parallel(
+            selected, loader=loader, csv_engine=csv_engine, max_workers=max_workers, manifest_state=manifest_state)
+
+    manifest.save_manifest(manifest_state)
+    repo.close_pool()
+    return summary
 
 if __name__ == "__main__":
-    main()
+    main(
+        sources=[s for s in os.getenv("ETL_SOURCES", "").split(",") if s] or None,
+        chunksize=int(os.getenv("ETL_CHUNKSIZE", "0")) or None,
+        loader=os.getenv("ETL_LOADER", "upsert"),
+        csv_engine=os.getenv("ETL_CSV_ENGINE") or None,
+        incremental=os.getenv("ETL_INCREMENTAL", "") == "1",
+        pipelined=os.getenv("ETL_PIPELINED", "") == "1",
+        sql_validation=os.getenv("ETL_SQL_VALIDATE", "") == "1",
+    )
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import logging
+import pandas as pd
+
+from .clean import row_hashes
+from . import rules
+
+logger = logging.getLogger("etl.manifest")
+
+# Fingerprints of ingested files and content hashes of their rows, by source name.
+MANIFEST_PATH = Path("data/manifest.json")
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    if not path.exists():
+        return {"sources": {}}
+    return json.loads(path.read_text())
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH) -> None:
+    # Written to a temporary file and renamed, so a crash never leaves half a manifest.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path)
+    logger.info(f"[manifest] Saved manifest for {len(manifest['sources'])} sources to {path}")
+
+def file_fingerprint(path: str, previous: dict | None = None) -> dict:
+    """
+    Size, mtime and SHA-256 of a file. The content hash of `previous` is reused
+    when size and mtime still match, so unchanged files are not re-read.
+    """
+    stat = Path(path).stat()
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+        fingerprint["sha256"] = previous["sha256"]
+        return fingerprint
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+def rules_version(rule_set: dict, pk_policy: str) -> str:
+    """
+    Hash of everything in rules.py that decides which rows are cleaned, kept and
+    valid for a source, so an incremental run revalidates unchanged files and
+    rows after a rule change.
+    """
+    payload = {
+        "rule_set": rule_set,
+        "pk_policy": pk_policy,
+        "required": rules.REQUIRED_COLUMNS,
+        "numeric": rules.NUMERIC_COLUMNS,
+        "ranges": rules.RANGE_RULES,
+        "enums": {col: sorted(values) for col, values in rules.ENUM_RULES.items()},
+        "categories": rules.DERIVED_CATEGORIES,
+        "null_threshold": rules.COLUMN_NULL_THRESHOLD,
+        "placeholders": rules.PLACEHOLDER_COLUMNS,
+    }
+    # repr, not JSON: the category bins are keyed by tuples. Sets are sorted above.
+    return hashlib.sha256(repr(payload).encode()).hexdigest()
+
+def row_keys(df: pd.DataFrame, key_columns: list[str]) -> pd.Series:
+    # Primary-key values joined by '|', as strings so they can be JSON keys.
+    keys = [df[c].astype(str) for c in key_columns]
+    return keys[0].str.cat(keys[1:], sep="|") if len(keys) > 1 else keys[0]
+
+def changed_rows(df: pd.DataFrame, key_columns: list[str], previous_rows: dict[str, str]) -> tuple[pd.Series, dict[str, str]]:
+    """
+    Mask of rows that are new or whose content changed since `previous_rows`
+    (key -> hash, from the last run), and the key -> hash map for the current rows.
+
+    Rows with a null key are never recorded, so they are always treated as changed.
+    """
+    if not key_columns:
+        return pd.Series(True, index=df.index), {}
+
+    has_key = df[key_columns].notna().all(axis=1)
+    keys = row_keys(df, key_columns)
+    hashes = row_hashes(df).map("{:016x}".format)
+
+    previous = keys.map(previous_rows)
+    changed = ~has_key | (previous != hashes)
+    current_rows = dict(zip(keys[has_key], hashes[has_key]))
+    return changed, current_rows
@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("etl.metrics")
+
+# Run reports and profiles are written next to logs/etl.log.
+REPORT_DIR = Path("logs")
+# Set to "cprofile" or "tracemalloc" to profile a run.
+PROFILE_ENV = "ETL_PROFILE"
+TRACEMALLOC_TOP = 25
+
+_records: list[dict] = []
+_lock = threading.Lock()
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+@contextmanager
+def stage(name: str, rows: int | None = None):
+    """
+    Record wall time, CPU time, rows/sec and peak RSS for the enclosed block.
+
+    Yields the record, so the block can fill in "rows" or "bytes_sent" once known.
+    CPU time is process-wide, so it includes other threads running meanwhile.
+    """
+    record = {"stage": name, "rows": rows, "bytes_sent": None}
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall_start, 6)
+        record["cpu_s"] = round(time.process_time() - cpu_start, 6)
+        record["rows_per_s"] = round(record["rows"] / record["wall_s"], 1) if record["rows"] and record["wall_s"] else None
+        record["peak_rss_bytes"] = peak_rss_bytes()
+        with _lock:
+            _records.append(record)
+
+def timed(name: str):
+    """Decorator form of stage() for functions whose first argument is a DataFrame."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(df, *args, **kwargs):
+            with stage(name, rows=len(df)):
+                return fn(df, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def records() -> list[dict]:
+    with _lock:
+        return list(_records)
+
+def extend(new_records: list[dict]) -> None:
+    # Stage records collected in a worker process (see pipeline.run_parallel).
+    with _lock:
+        _records.extend(new_records)
+
+def reset() -> None:
+    with _lock:
+        _records.clear()
+
+def build_report(summary: dict | None = None, **extra) -> dict:
+    stages = records()
+    return {
+        "stages": stages,
+        "bytes_sent_total": sum(r["bytes_sent"] or 0 for r in stages),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "summary": summary or {},
+        **extra,
+    }
+
+def write_report(report: dict, report_dir: Path = REPORT_DIR) -> Path:
+    """Write a run report as JSON to logs/run_report_<timestamp>.json."""
+    report_dir.mkdir(parents=True, exist_ok=True)
+    path = report_dir / f"run_report_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2, default=str))
+    logger.info(f"[metrics] Run report written to {path}")
+    return path
+
+@contextmanager
+def profiling(report: dict, report_dir: Path = REPORT_DIR):
+    """
+    Profile the enclosed block when ETL_PROFILE is set: "cprofile" dumps pstats
+    to logs/profile_<timestamp>.prof, "tracemalloc" adds the top allocation
+    sites to `report` under "tracemalloc".
+    """
+    mode = os.getenv(PROFILE_ENV, "").lower()
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report_dir.mkdir(parents=True, exist_ok=True)
+            path = report_dir / f"profile_{datetime.now().strftime('%Y%m%dT%H%M%S')}.prof"
+            profiler.dump_stats(path)
+            report["cprofile"] = str(path)
+            logger.info(f"[metrics] cProfile stats written to {path}")
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["tracemalloc"] = {
+                "peak_bytes": peak,
+                "top": [
+                    {"site": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                ],
+            }
+    else:
+        yield
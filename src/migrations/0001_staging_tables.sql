@@ -1,7 +1,3 @@
--- Dropping exisiting staging tables if they exist
-DROP TABLE IF EXISTS stg_esophageal;
-DROP TABLE IF EXISTS stg_rejects;
-
 -- Main staging table for valid records
 CREATE TABLE IF NOT EXISTS stg_esophageal (
     patient_barcode TEXT PRIMARY KEY,
@@ -0,0 +1,8 @@
+-- Indexes for the columns downstream queries filter on.
+-- Partitioning by _loaded_at is not used: a partitioned table's primary key must
+-- include the partition column, which the loaders' ON CONFLICT (patient_barcode)
+-- upserts rely on not doing.
+CREATE INDEX IF NOT EXISTS stg_esophageal_cancer_status_idx ON stg_esophageal (cancer_status);
+CREATE INDEX IF NOT EXISTS stg_esophageal_vital_status_idx ON stg_esophageal (vital_status);
+CREATE INDEX IF NOT EXISTS stg_esophageal_loaded_at_idx ON stg_esophageal (_loaded_at);
+CREATE INDEX IF NOT EXISTS stg_rejects_loaded_at_idx ON stg_rejects (_loaded_at);
@@ -0,0 +1,401 @@
+import os
+import asyncio
+import logging
+from typing import Iterator
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import pandas as pd
+
+from . import cache # Parsed raw inputs kept between runs
+from . import clean # Cleaning logic
+from . import validate # Validation logic
+from . import manifest # Incremental-run state
+from . import metrics # Per-stage timings for the run report
+from . import sinks # Output files
+from . import sharded # Multi-process clean/validate
+from .rules import RULE_SETS
+from .sources import READERS
+
+logger = logging.getLogger("etl.pipeline")
+
+def _lazy_loader(name: str):
+    # load.py pulls in psycopg2, which runs that only transform (a dry run, the
+    # worker processes of run_parallel) never need; it is imported on first use.
+    def loader(df: pd.DataFrame, table_name: str, pk_columns: list[str]) -> pd.DataFrame:
+        from . import load
+        return getattr(load, name)(df, table_name=table_name, pk_columns=pk_columns)
+    return loader
+
+# Loaders selectable with main(loader=...) or the ETL_LOADER env var.
+LOADERS = {
+    "upsert": _lazy_loader("upsert_dataframe"),
+    "copy": _lazy_loader("copy_upsert_dataframe"),
+    "prepared": _lazy_loader("prepared_upsert_dataframe"),
+}
+
+def delete_keys(df: pd.DataFrame, table_name: str, pk_columns: list[str]) -> int:
+    # Lazily imported like the loaders.
+    from . import load
+    return load.delete_keys(df, table_name=table_name, pk_columns=pk_columns)
+
+# Upper bound on concurrent Postgres connections used by run_parallel's load stage.
+DEFAULT_MAX_CONNECTIONS = 4
+
+# Transformed chunks run_pipelined may queue ahead of the writer.
+DEFAULT_QUEUE_SIZE = 2
+
+def to_table_columns(cleaned_data: pd.DataFrame, rejects: pd.DataFrame, rule_set: dict = RULE_SETS["esophageal"]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    '''
+    Renames the validated frames to the database schema and keeps only the
+    columns that exist in the source's target tables.
+    '''
+    cleaned_data = cleaned_data.rename(columns=rule_set["column_mapping"])
+    rejects = rejects.rename(columns=rule_set["column_mapping"])
+
+    # Ensuring that the only columns used from our DataFrame are those that exist in our table.
+    cleaned_filtered = cleaned_data[rule_set["table_columns"]]
+    rejects_filtered = rejects[rule_set["reject_columns"]]
+    return cleaned_filtered, rejects_filtered
+
+def load_tables(cleaned_filtered: pd.DataFrame, rejects_filtered: pd.DataFrame, source: dict, loader: str = "upsert", *, replace_keys: bool = False) -> tuple[int, int]:
+    '''
+    Loads the valid rows and the rejects, returning how many rows each table took.
+
+    Loaders return the rows the database refused (see load.load_in_batches). Valid
+    rows refused by the main table are added to the rejects with the database
+    error as their reason. Rejects refused in turn, e.g. for a value overflowing
+    a column type in both tables, are loaded as just their key and reason.
+    Rejects without a key cannot be loaded and are only counted, as in
+    sql_validate.run_source.
+
+    With `replace_keys` (incremental runs, whose tables keep their rows) each
+    key is first deleted from the table it is not loaded into, so a row that
+    changed from valid to rejected or back does not stay in both.
+    '''
+    load_fn = LOADERS[loader]
+    if replace_keys:
+        delete_keys(cleaned_filtered, source["rejects_table"], source["pk"])
+    failed = load_fn(
+        cleaned_filtered,
+        table_name=source["table"],
+        pk_columns=source["pk"]
+    )
+    if len(failed):
+        logger.warning(f"[{source['name']}] {len(failed)} rows refused by '{source['table']}' moved to '{source['rejects_table']}'")
+        rejects_filtered = pd.concat([rejects_filtered, failed], ignore_index=True) if len(rejects_filtered) else failed
+
+    # The rejects table's key is NOT NULL: sending these would only bisect each one
+    # down to a failed single-row transaction, twice over with the fallback below.
+    keyless = rejects_filtered[source["pk"]].isna().any(axis=1)
+    if keyless.any():
+        logger.error(f"[{source['name']}] {int(keyless.sum())} rejected rows have no {', '.join(source['pk'])} and could not be loaded into '{source['rejects_table']}'")
+        rejects_filtered = rejects_filtered[~keyless]
+
+    if replace_keys:
+        # Includes valid rows the main table refused, whose earlier version it may hold.
+        delete_keys(rejects_filtered, source["table"], source["pk"])
+    failed_rejects = load_fn(
+        rejects_filtered,
+        table_name=source["rejects_table"],
+        pk_columns=source["pk"]
+    )
+    unloadable = 0
+    if len(failed_rejects):
+        unloadable = len(load_fn(
+            failed_rejects[source["pk"] + ["reason"]],
+            table_name=source["rejects_table"],
+            pk_columns=source["pk"]
+        ))
+        if unloadable:
+            logger.error(f"[{source['name']}] {unloadable} rejected rows could not be loaded into '{source['rejects_table']}'")
+
+    return len(cleaned_filtered) - len(failed), len(rejects_filtered) - unloadable
+
+def raw_pk_columns(source: dict, rule_set: dict) -> list[str]:
+    # The source PK is named after the table columns; cleaning happens before the rename.
+    raw_names = {table: raw for raw, table in rule_set["column_mapping"].items()}
+    return [raw_names.get(c, c) for c in source["pk"]]
+
+def transform_source(source: dict, csv_engine: str | None = None, previous: dict | None = None) -> tuple[pd.DataFrame, pd.DataFrame, dict] | None:
+    '''
+    Extract, clean and validate one source, returning the rows for its table and
+    rejects table plus the source's new manifest entry. Also writes the optional
+    CSV copies named in the source.
+
+    `previous` is the source's manifest entry from an earlier run (incremental
+    mode). If the file is unchanged since then None is returned; otherwise only
+    rows that are new or whose content changed are validated, and the CSV copies
+    hold just those rows. An entry recorded under different rules (see
+    manifest.rules_version) is ignored, so every row is validated again.
+
+    Runs without touching the database, so run_parallel can execute it in a
+    worker process.
+    '''
+    rule_set = RULE_SETS[source["rules"]]
+    reader = READERS[source["reader"]]
+
+    rules_version = manifest.rules_version(rule_set, source["pk_policy"])
+    if previous and previous.get("rules") != rules_version:
+        logger.info(f"[{source['name']}] Rules changed since the last run, revalidating every row.")
+        previous = None
+
+    # Remote sources (see readers/__init__.py) have no file to fingerprint and are never skipped.
+    previous_fingerprint = previous["fingerprint"] if previous else None
+    fingerprint = None if getattr(reader, "REMOTE", False) else manifest.file_fingerprint(source["path"], previous_fingerprint)
+    if fingerprint and previous_fingerprint and previous_fingerprint["sha256"] == fingerprint["sha256"]:
+        logger.info(f"[{source['name']}] Unchanged since the last run, skipping.")
+        return None
+
+    # Step 1: Extracting the data
+    with metrics.stage(f"{source['name']}.extract") as record:
+        data = cache.extract(reader, source["path"], fingerprint, usecols=rule_set["source_columns"], dtype=rule_set["source_dtypes"], engine=csv_engine)
+        record["rows"] = len(data)
+    logger.info(f"[{source['name']}] Raw Shape: {data.shape}")
+
+    raw_pk = raw_pk_columns(source, rule_set)
+    rejects_log = Path(source["rejects_log"]) if source["rejects_log"] else None
+    # Steps 2 and 3 of full runs over large files run sharded across processes (ETL_SHARDS).
+    shards = sharded.shard_count(len(data))
+    result = None
+    if shards > 1 and not previous:
+        with metrics.stage(f"{source['name']}.clean_validate", rows=len(data)):
+            result = sharded.clean_validate(data, raw_pk, source["pk_policy"], shards=shards)
+    if result is not None:
+        cleaned_data, rejects, row_hashes = result
+        if rejects_log is not None and len(rejects):
+            with sinks.RejectSink(rejects_log) as sink:
+                sink.write(rejects)
+    else:
+        # Step 2: Cleaning the extracted data (generic cleaning)
+        with metrics.stage(f"{source['name']}.clean", rows=len(data)):
+            cleaned_raw = clean.clean(data)
+            cleaned_raw = clean.resolve_pk_conflicts(cleaned_raw, raw_pk, source["pk_policy"])
+        logger.info(f"[{source['name']}] Cleaned Raw Shape: {cleaned_raw.shape}")
+
+        # Row hashes are keyed by the source PK.
+        changed, row_hashes = manifest.changed_rows(cleaned_raw, raw_pk, previous["rows"] if previous else {})
+        if previous:
+            cleaned_raw = cleaned_raw[changed]
+            logger.info(f"[{source['name']}] {len(cleaned_raw)} of {len(changed)} rows are new or changed")
+
+        # Step 3: Validating the cleaned data (types, required fields, domain rules)
+        with metrics.stage(f"{source['name']}.validate", rows=len(cleaned_raw)):
+            cleaned_data, rejects = validate.validate(cleaned_raw, write_rejects_path=rejects_log)
+    logger.info(f"[{source['name']}] Validated Cleaned Shape: {cleaned_data.shape}")
+    logger.info(f"[{source['name']}] Rejects Shape: {rejects.shape}")
+
+    cleaned_filtered, rejects_filtered = to_table_columns(cleaned_data, rejects, rule_set)
+
+    logger.info("Columns going into Postgres: %s", list(cleaned_filtered.columns))
+    logger.info("Number of rows going into Postgres: %d", len(cleaned_filtered))
+
+    # Save results for comparison/audit purposes, in the format of each output's extension.
+    if source["cleaned_output"]:
+        sinks.write_frame(cleaned_filtered, source["cleaned_output"], partition_by=source["output_partition_by"])
+        logger.info(f"Cleaned data saved to '{source['cleaned_output']}'")
+    if source["rejected_output"]:
+        sinks.write_frame(rejects_filtered, source["rejected_output"], partition_by=source["output_partition_by"])
+        logger.info(f"Rejected data saved to '{source['rejected_output']}'")
+
+    return cleaned_filtered, rejects_filtered, {"fingerprint": fingerprint, "rows": row_hashes, "rules": rules_version}
+
+def transform_with_metrics(source: dict, csv_engine: str | None = None, previous: dict | None = None) -> tuple:
+    # Worker-process entry point for run_parallel: stage records are kept per
+    # process, so the worker's are returned alongside the result.
+    metrics.reset()
+    return transform_source(source, csv_engine, previous), metrics.records()
+
+SKIPPED = {"rows_loaded": 0, "rows_rejected": 0, "skipped": True}
+
+def run_source(source: dict, *, loader: str = "upsert", csv_engine: str | None = None, manifest_state: dict | None = None) -> dict:
+    '''
+    Transform and load one source. With `manifest_state` (see manifest.load_manifest)
+    the source's previous entry drives an incremental run, and the new entry is
+    recorded in it once the load succeeded.
+    '''
+    previous = manifest_state["sources"].get(source["name"]) if manifest_state is not None else None
+    result = transform_source(source, csv_engine, previous)
+    if result is None:
+        return dict(SKIPPED)
+    cleaned_filtered, rejects_filtered, entry = result
+
+    # Step 4: Loading the cleaned data into Postgres.
+    with metrics.stage(f"{source['name']}.load", rows=len(cleaned_filtered) + len(rejects_filtered)):
+        rows_loaded, rows_rejected = load_tables(cleaned_filtered, rejects_filtered, source, loader, replace_keys=manifest_state is not None)
+    logger.info(f"Cleaned data loaded into '{source['table']}' table.")
+    logger.info(f"Rejected data loaded into '{source['rejects_table']}' table.")
+
+    if manifest_state is not None:
+        manifest_state["sources"][source["name"]] = entry
+    return {"rows_loaded": rows_loaded, "rows_rejected": rows_rejected}
+
+def run_parallel(
+    sources: list[dict],
+    *,
+    loader: str = "upsert",
+    csv_engine: str | None = None,
+    max_workers: int | None = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    manifest_state: dict | None = None,
+) -> dict[str, dict]:
+    '''
+    Ingest several sources concurrently.
+
+    The CPU-bound extract/clean/validate stage of each source runs in a process
+    pool; as each one finishes its load is handed to a thread pool of at most
+    `max_connections` workers, each holding one Postgres connection at a time.
+    Wall time approaches that of the slowest source rather than the sum.
+    `manifest_state` works as in run_source.
+    '''
+    max_workers = max_workers or min(len(sources), os.cpu_count() or 1)
+    summary = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as transform_pool, \
+         ThreadPoolExecutor(max_workers=max_connections) as load_pool:
+        transforms = {}
+        for source in sources:
+            previous = manifest_state["sources"].get(source["name"]) if manifest_state is not None else None
+            transforms[transform_pool.submit(transform_with_metrics, source, csv_engine, previous)] = source
+
+        loads = {}
+        for future in as_completed(transforms):
+            source = transforms[future]
+            result, worker_records = future.result()
+            metrics.extend(worker_records)
+            if result is None:
+                summary[source["name"]] = dict(SKIPPED)
+                continue
+            cleaned_filtered, rejects_filtered, entry = result
+            load_future = load_pool.submit(load_tables, cleaned_filtered, rejects_filtered, source, loader, replace_keys=manifest_state is not None)
+            loads[load_future] = (source, entry)
+
+        for future in as_completed(loads):
+            source, entry = loads[future]
+            rows_loaded, rows_rejected = future.result()
+            logger.info(f"[{source['name']}] Loaded {rows_loaded} rows into '{source['table']}', {rows_rejected} into '{source['rejects_table']}'")
+            summary[source["name"]] = {"rows_loaded": rows_loaded, "rows_rejected": rows_rejected}
+            if manifest_state is not None:
+                manifest_state["sources"][source["name"]] = entry
+
+    return summary
+
+def transform_chunks(source: dict, chunksize: int) -> Iterator[tuple[pd.DataFrame, pd.DataFrame]]:
+    '''
+    Extract, clean and validate a source in chunks of at most `chunksize` rows,
+    yielding the rows for its table and rejects table per chunk and appending
+    them to the optional output files and rejects log named in the source.
+
+    The file is read twice: a cheap pre-pass decides which columns clean() drops
+    for exceeding the null threshold, so every chunk gets the same columns, and
+    which row each primary key resolves to (clean.PkWinners). Duplicates are
+    removed across chunks by clean.clean_chunks, and rows sharing a primary key
+    by clean.resolve_pk_conflicts, keeping the same rows as a full run.
+    '''
+    rule_set = RULE_SETS[source["rules"]]
+    reader = READERS[source["reader"]]
+
+    def extract_chunks():
+        return reader.extract_chunks(source["path"], chunksize, usecols=rule_set["source_columns"], dtype=rule_set["source_dtypes"])
+
+    raw_pk = raw_pk_columns(source, rule_set)
+    winners = clean.PkWinners(raw_pk, source["pk_policy"])
+    with metrics.stage(f"{source['name']}.prepass"):
+        columns_to_drop = clean.find_columns_to_drop(extract_chunks(), winners)
+
+    # Outputs stay open across chunks, so each chunk is appended as it is processed.
+    outputs = [
+        sinks.open_sink(source[key], partition_by=source["output_partition_by"]) if source[key] else None
+        for key in ("cleaned_output", "rejected_output")
+    ]
+    rejects_log = sinks.RejectSink(source["rejects_log"]) if source["rejects_log"] else None
+    try:
+        for chunk in clean.clean_chunks(extract_chunks(), columns_to_drop):
+            chunk = clean.resolve_pk_conflicts(chunk, raw_pk, source["pk_policy"], winners)
+            with metrics.stage(f"{source['name']}.validate", rows=len(chunk)):
+                cleaned_data, rejects = validate.validate(chunk, write_rejects_path=rejects_log)
+            cleaned_filtered, rejects_filtered = to_table_columns(cleaned_data, rejects, rule_set)
+
+            for sink, frame in zip(outputs, (cleaned_filtered, rejects_filtered)):
+                if sink:
+                    sink.write(frame)
+            yield cleaned_filtered, rejects_filtered
+    finally:
+        for sink in outputs + [rejects_log]:
+            if sink:
+                sink.close()
+
+def load_chunk(i: int, cleaned_filtered: pd.DataFrame, rejects_filtered: pd.DataFrame, source: dict, loader: str) -> tuple[int, int]:
+    with metrics.stage(f"{source['name']}.load", rows=len(cleaned_filtered) + len(rejects_filtered)):
+        chunk_loaded, chunk_rejected = load_tables(cleaned_filtered, rejects_filtered, source, loader)
+    logger.info("Chunk %d: %d rows loaded, %d rows rejected", i, chunk_loaded, chunk_rejected)
+    return chunk_loaded, chunk_rejected
+
+def run_streaming(source: dict, chunksize: int, *, loader: str = "upsert") -> dict:
+    '''
+    Streaming variant of the pipeline for files too large to hold in memory.
+
+    Extract yields chunks that flow through clean -> validate -> load one at a
+    time (see transform_chunks), so peak memory is bounded by the chunk size
+    rather than the file size.
+    '''
+    rows_loaded = rows_rejected = 0
+    for i, (cleaned_filtered, rejects_filtered) in enumerate(transform_chunks(source, chunksize)):
+        chunk_loaded, chunk_rejected = load_chunk(i, cleaned_filtered, rejects_filtered, source, loader)
+        rows_loaded += chunk_loaded
+        rows_rejected += chunk_rejected
+
+    return {"rows_loaded": rows_loaded, "rows_rejected": rows_rejected}
+
+def run_pipelined(source: dict, chunksize: int, *, loader: str = "upsert", queue_size: int = DEFAULT_QUEUE_SIZE) -> dict:
+    '''
+    Variant of run_streaming that overlaps transforming the next chunk with
+    loading the previous ones, so wall time approaches the larger of the two
+    stages rather than their sum.
+
+    Transformed chunks go onto a queue of at most `queue_size` chunks, drained
+    by a single writer. When the writer falls behind the transform waits, so at
+    most `queue_size` + 2 chunks are in memory at once (queued, being loaded,
+    being transformed). Both stages run in threads driven by asyncio; pandas and
+    psycopg2 release the GIL for most of their work.
+    '''
+    return asyncio.run(_run_pipelined(source, chunksize, loader, queue_size))
+
+async def _run_pipelined(source: dict, chunksize: int, loader: str, queue_size: int) -> dict:
+    chunks = transform_chunks(source, chunksize)
+    queue = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    step = None
+
+    async def transform():
+        nonlocal step
+        while True:
+            # Shielded: cancelling this stage must not leave next() running unawaited.
+            step = asyncio.ensure_future(asyncio.to_thread(next, chunks, done))
+            item = await asyncio.shield(step)
+            await queue.put(item)
+            if item is done:
+                return
+
+    async def write():
+        rows_loaded = rows_rejected = 0
+        i = 0
+        while (item := await queue.get()) is not done:
+            chunk_loaded, chunk_rejected = await asyncio.to_thread(load_chunk, i, *item, source, loader)
+            rows_loaded += chunk_loaded
+            rows_rejected += chunk_rejected
+            i += 1
+        return {"rows_loaded": rows_loaded, "rows_rejected": rows_rejected}
+
+    stages = [asyncio.ensure_future(transform()), asyncio.ensure_future(write())]
+    try:
+        _, summary = await asyncio.gather(*stages)
+        return summary
+    finally:
+        # gather does not cancel the other stage when one fails, so it is stopped
+        # here. Once a chunk still being transformed is done, the generator is
+        # closed, so transform_chunks closes its output files now rather than
+        # whenever the generator is garbage collected.
+        for stage in stages:
+            stage.cancel()
+        await asyncio.gather(*stages, *[step] if step else [], return_exceptions=True)
+        chunks.close()
@@ -0,0 +1,110 @@
+import functools
+import threading
+import weakref
+import logging
+from typing import Callable, Hashable
+
+logger = logging.getLogger("etl.plan_cache")
+
+class PlanCache:
+    """
+    Per-process cache of compiled plans (SQL text, compiled rule sets, ...),
+    built once per key and counted as hits and misses. Thread-safe: the load
+    stage of run_parallel shares it across threads.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._plans: dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], object]):
+        with self._lock:
+            if key in self._plans:
+                self.hits += 1
+                return self._plans[key]
+            self.misses += 1
+        plan = build()
+        with self._lock:
+            return self._plans.setdefault(key, plan)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._plans)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = self.misses = 0
+
+CACHES: dict[str, PlanCache] = {}
+
+def cache(name: str) -> PlanCache:
+    return CACHES.setdefault(name, PlanCache(name))
+
+def _freeze(value):
+    # Lists (column lists, primary keys) become tuples so they can be part of a key.
+    return tuple(_freeze(v) for v in value) if isinstance(value, (list, tuple)) else value
+
+def cached(name: str):
+    """
+    Cache a pure plan builder in the PlanCache `name`, keyed by its arguments
+    (lists compared by value). Callers must not mutate what it returns.
+    """
+    def decorator(build):
+        plans = cache(name)
+
+        @functools.wraps(build)
+        def wrapper(*args, **kwargs):
+            key = _freeze(args) if not kwargs else (_freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+            return plans.get(key, lambda: build(*args, **kwargs))
+        wrapper.plans = plans
+        return wrapper
+    return decorator
+
+class PreparedStatements(PlanCache):
+    """
+    The statements PREPAREd on each connection, as (backend pid, name) pairs.
+    Prepared statements last for the server session and survive rollbacks.
+
+    Connections are held weakly. The entries of a connection the pool closed go
+    with it, and never match a later connection that reuses its id().
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._plans = weakref.WeakKeyDictionary()
+
+    def ensure(self, cur, name: str, sql: str) -> None:
+        conn = cur.connection
+        key = (conn.get_backend_pid(), name)
+        with self._lock:
+            prepared = self._plans.setdefault(conn, set())
+            if key in prepared:
+                self.hits += 1
+                return
+            self.misses += 1
+        # The session may hold it from before the cache was reset.
+        cur.execute("SELECT 1 FROM pg_prepared_statements WHERE name = %s", (name,))
+        if cur.fetchone() is None:
+            cur.execute(f"PREPARE {name} AS {sql}")
+        with self._lock:
+            prepared.add(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": sum(len(p) for p in self._plans.values())}
+
+STATEMENTS = CACHES.setdefault("load.prepared_statements", PreparedStatements("load.prepared_statements"))
+
+def ensure_prepared(cur, name: str, sql: str) -> None:
+    """PREPARE `sql` as `name` on the cursor's connection unless it already was."""
+    STATEMENTS.ensure(cur, name, sql)
+
+def stats() -> dict[str, dict]:
+    return {name: plans.stats() for name, plans in sorted(CACHES.items())}
+
+def reset() -> None:
+    for plans in CACHES.values():
+        plans.clear()
@@ -0,0 +1,19 @@
+"""
+Readers turn a source's `path` into DataFrames of raw rows for clean().
+
+Each reader is a module providing the two functions of the Reader protocol,
+and is registered by name in sources.READERS. Readers whose `path` is not a
+local file (e.g. an HTTP endpoint) set `REMOTE = True`; those sources have no
+file fingerprint, so incremental runs compare their rows but never skip them.
+"""
+from typing import TYPE_CHECKING, Iterator, Protocol
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class Reader(Protocol):
+    def extract(self, path: str, *, usecols: list[str] | None = None, dtype: dict | None = None, engine: str | None = None) -> "pd.DataFrame":
+        """Every row of `path`. `usecols` and `dtype` use normalized column names."""
+
+    def extract_chunks(self, path: str, chunksize: int, *, usecols: list[str] | None = None, dtype: dict | None = None) -> Iterator["pd.DataFrame"]:
+        """The rows of `path` in chunks of at most `chunksize`, without holding them all in memory."""
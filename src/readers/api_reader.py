@@ -0,0 +1,142 @@
+import http.client
+import json
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from urllib.parse import urljoin, urlsplit
+import pandas as pd
+
+from .json_reader import DEFAULT_CHUNKSIZE, records_to_chunks
+
+logger = logging.getLogger("etl.extract")
+
+# A source's `path` is the URL of the first page, not a local file.
+REMOTE = True
+
+# Seconds to wait for a connection or a response.
+TIMEOUT_S = 30.0
+
+# Failed requests are retried up to MAX_RETRIES times, after BACKOFF_S, then
+# doubling; a Retry-After header in seconds takes precedence.
+MAX_RETRIES = 3
+BACKOFF_S = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Keys a page object may hold its records under; a page may also be a bare array.
+RECORD_KEYS = ("data", "results", "items", "records")
+
+_LINK_NEXT = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+class Session:
+    """
+    Keep-alive HTTP(S) connections, one per host, reused across pages. Not
+    thread-safe: iter_pages uses it from its single prefetch thread.
+    """
+
+    def __init__(self, timeout: float = TIMEOUT_S):
+        self.timeout = timeout
+        self._conns: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+    def get(self, url: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        conn = self._conns.get(key)
+        if conn is None:
+            connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = self._conns[key] = connection_class(parts.netloc, timeout=self.timeout)
+
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        try:
+            conn.request("GET", target, headers={"Accept": "application/json"})
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            # E.g. the server dropped an idle keep-alive connection; the next request reconnects.
+            conn.close()
+            del self._conns[key]
+            raise
+        return response.status, response.headers, body
+
+    def close(self) -> None:
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+def fetch_page(session: Session, url: str) -> tuple[list[dict], str | None]:
+    """The records of one page and the URL of the next (None on the last page), with retries."""
+    for attempt in range(MAX_RETRIES + 1):
+        delay = None
+        try:
+            status, headers, body = session.get(url)
+        except (OSError, http.client.HTTPException) as e:
+            error = repr(e)
+        else:
+            if status == 200:
+                return parse_page(url, headers, body)
+            if status not in RETRY_STATUSES:
+                raise RuntimeError(f"GET {url} failed with HTTP {status}")
+            error = f"HTTP {status}"
+            retry_after = headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else None
+
+        if attempt == MAX_RETRIES:
+            raise RuntimeError(f"GET {url} failed after {MAX_RETRIES + 1} attempts: {error}")
+        delay = BACKOFF_S * 2 ** attempt if delay is None else delay
+        logger.warning(f"[api_reader] GET {url} failed ({error}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+def parse_page(url: str, headers: http.client.HTTPMessage, body: bytes) -> tuple[list[dict], str | None]:
+    """
+    A page is either an array of records, with the next page in a Link header,
+    or an object with its records under one of RECORD_KEYS and the next page
+    under "next". Relative next URLs are resolved against `url`.
+    """
+    page = json.loads(body)
+    if isinstance(page, list):
+        match = _LINK_NEXT.search(headers.get("Link", ""))
+        records, next_url = page, match.group(1) if match else None
+    else:
+        key = next((k for k in RECORD_KEYS if k in page), None)
+        if key is None:
+            raise RuntimeError(f"GET {url} returned no records under any of {', '.join(RECORD_KEYS)}")
+        records, next_url = page[key], page.get("next")
+    return records, urljoin(url, next_url) if next_url else None
+
+def iter_pages(url: str, session: Session | None = None) -> Iterator[list[dict]]:
+    """
+    The records of each page from `url` on. The next page is requested as soon
+    as the current one arrives, so it downloads while the caller processes this one.
+    """
+    own_session = session is None
+    session = session or Session()
+    try:
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            future = prefetch.submit(fetch_page, session, url)
+            while future is not None:
+                records, next_url = future.result()
+                future = prefetch.submit(fetch_page, session, next_url) if next_url else None
+                yield records
+    finally:
+        if own_session:
+            session.close()
+
+def extract(path: str, *, usecols: list[str] | None = None, dtype: dict | None = None, engine: str | None = None) -> pd.DataFrame:
+    """
+    Extracting every record of a paginated JSON API starting at the URL `path`.
+    `usecols` and `dtype` work as in csv_reader.extract(); `engine` is ignored.
+    """
+    chunks = list(extract_chunks(path, DEFAULT_CHUNKSIZE, usecols=usecols, dtype=dtype))
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    logger.info("Successfully read %d rows and %d columns from %s", len(df), len(df.columns), path)
+    return df
+
+def extract_chunks(path: str, chunksize: int, *, usecols: list[str] | None = None, dtype: dict | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Extracting the records of a paginated JSON API in chunks of at most
+    `chunksize` rows; only the pages of the current chunk are held in memory.
+    """
+    logger.info("Streaming pages from: %s (chunksize=%d)", path, chunksize)
+    records = (record for page in iter_pages(path) for record in page)
+    yield from records_to_chunks(records, chunksize, usecols=usecols, dtype=dtype)
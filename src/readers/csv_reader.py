@@ -4,10 +4,16 @@ import logging
 
 logger = logging.getLogger("etl.extract")
 
-def extract(path: str):
+def extract(path: str, *, usecols: list[str] | None = None, dtype: dict | None = None, engine: str | None = None):
     """
     Extracting data from a CSV file.
 
+    Args:
+        usecols: columns to parse, named as clean() normalizes them (stripped, lower-case).
+                 Columns not listed are skipped by the parser. None parses every column.
+        dtype: parser dtypes keyed by the same normalized names, e.g. {"gender": "category"}.
+        engine: pandas parser engine; "pyarrow" uses the multi-threaded Arrow CSV reader.
+
     Returns:
         pd.DataFrame: DataFrame containing the extracted data.
     """
@@ -17,12 +23,59 @@ def extract(path: str):
 
     if not input_path.exists():
         raise FileNotFoundError(f"The file {input_path.resolve()} could not be found.")
-    
+
     try:
-        df = pd.read_csv(input_path, low_memory=False)
+        options = read_options(input_path, usecols=usecols, dtype=dtype, engine=engine)
+        df = pd.read_csv(input_path, **options)
         logger.info("Successfully read %d rows and %d columns from %s", len(df), len(df.columns), input_path.name)
         return df
     except pd.errors.EmptyDataError:
         raise ValueError(f"The file {input_path.resolve()} is empty.")
     except Exception as e:
-        raise RuntimeError(f"An error occurred while reading the CSV file: {e}")
\ No newline at end of file
+        raise RuntimeError(f"An error occurred while reading the CSV file: {e}")
+
+def extract_chunks(path: str, chunksize: int, *, usecols: list[str] | None = None, dtype: dict | None = None):
+    """
+    Extracting data from a CSV file in chunks of at most `chunksize` rows.
+    `usecols` and `dtype` work as in extract().
+
+    Yields:
+        pd.DataFrame: one chunk of the file at a time, so the full file is never held in memory.
+    """
+    input_path = Path(path)
+
+    logger.info("Streaming file at: %s (chunksize=%d)", input_path.resolve(), chunksize)
+
+    if not input_path.exists():
+        raise FileNotFoundError(f"The file {input_path.resolve()} could not be found.")
+
+    try:
+        options = read_options(input_path, usecols=usecols, dtype=dtype)
+        with pd.read_csv(input_path, chunksize=chunksize, **options) as reader:
+            yield from reader
+    except pd.errors.EmptyDataError:
+        raise ValueError(f"The file {input_path.resolve()} is empty.")
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while reading the CSV file: {e}")
+
+def read_options(input_path: Path, *, usecols: list[str] | None = None, dtype: dict | None = None, engine: str | None = None) -> dict:
+    """
+    pd.read_csv keyword arguments for a projection and dtype map given in normalized
+    column names. Only the header is read here, to map them onto the raw names.
+    """
+    options = {"engine": engine} if engine else {}
+    if engine != "pyarrow":
+        # Not supported by the pyarrow engine, which always reads the whole file at once.
+        options["low_memory"] = False
+    if usecols is None and not dtype:
+        return options
+
+    header = pd.read_csv(input_path, nrows=0).columns
+    raw_names = {c.strip().lower(): c for c in header}
+
+    if usecols is not None:
+        wanted = set(usecols)
+        options["usecols"] = [raw for name, raw in raw_names.items() if name in wanted]
+    if dtype:
+        options["dtype"] = {raw_names[name]: t for name, t in dtype.items() if name in raw_names}
+    return options
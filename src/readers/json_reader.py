@@ -0,0 +1,122 @@
+import json
+import pandas as pd
+from pathlib import Path
+from typing import Iterable, Iterator
+import logging
+
+logger = logging.getLogger("etl.extract")
+
+# Characters read from the file at a time, and rows per chunk when extract() reads it whole.
+READ_BLOCK_SIZE = 1 << 20
+DEFAULT_CHUNKSIZE = 100_000
+
+def extract(path: str, *, usecols: list[str] | None = None, dtype: dict | None = None, engine: str | None = None) -> pd.DataFrame:
+    """
+    Extracting data from a JSON file: either an array of records or NDJSON (one
+    record per line). `usecols` and `dtype` work as in csv_reader.extract();
+    `engine` is accepted for the Reader protocol and ignored.
+    """
+    chunks = list(extract_chunks(path, DEFAULT_CHUNKSIZE, usecols=usecols, dtype=dtype))
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    logger.info("Successfully read %d rows and %d columns from %s", len(df), len(df.columns), Path(path).name)
+    return df
+
+def extract_chunks(path: str, chunksize: int, *, usecols: list[str] | None = None, dtype: dict | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Extracting data from a JSON file in chunks of at most `chunksize` rows.
+
+    Records are parsed one at a time (see iter_records), so neither the text nor
+    the records of the whole file are held in memory. The columns of every
+    chunk are those of the first one.
+    """
+    input_path = Path(path)
+
+    logger.info("Streaming file at: %s (chunksize=%d)", input_path.resolve(), chunksize)
+
+    if not input_path.exists():
+        raise FileNotFoundError(f"The file {input_path.resolve()} could not be found.")
+    if input_path.stat().st_size == 0:
+        raise ValueError(f"The file {input_path.resolve()} is empty.")
+
+    try:
+        with input_path.open(encoding="utf-8") as f:
+            yield from records_to_chunks(iter_records(f), chunksize, usecols=usecols, dtype=dtype)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"An error occurred while reading the JSON file: {e}")
+
+def iter_records(f) -> Iterator[dict]:
+    """
+    Records of a JSON array or of NDJSON text, decoded one at a time from blocks
+    of READ_BLOCK_SIZE characters.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_BLOCK_SIZE)
+    eof = not buffer
+    pos = _skip_whitespace(buffer, 0)
+    in_array = buffer[pos:pos + 1] == "["
+    if in_array:
+        pos += 1
+
+    while True:
+        # Separators between records: whitespace/newlines, and commas inside an array.
+        while True:
+            pos = _skip_whitespace(buffer, pos)
+            if in_array and buffer[pos:pos + 1] == ",":
+                pos += 1
+                continue
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(READ_BLOCK_SIZE), 0
+            eof = not buffer
+        if pos == len(buffer) or (in_array and buffer[pos] == "]"):
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            record, end = None, None
+        if end is None or (end == len(buffer) and not eof):
+            # The record runs past the end of the buffer (a number may even parse
+            # truncated), so read on and decode it again.
+            more = f.read(READ_BLOCK_SIZE)
+            if not more:
+                if end is None:
+                    decoder.raw_decode(buffer, pos)  # raises with the position of the error
+                eof = True
+                continue
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield record
+        pos = end
+
+def _skip_whitespace(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+def records_to_chunks(records: Iterable[dict], chunksize: int, *, usecols: list[str] | None = None, dtype: dict | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Group records into DataFrames of at most `chunksize` rows. `usecols` and
+    `dtype` use normalized names as in csv_reader.extract(); keys that first
+    appear after the first chunk are dropped.
+    """
+    wanted = set(usecols) if usecols is not None else None
+    columns = None
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == chunksize:
+            df, columns = _frame(batch, columns, wanted, dtype)
+            yield df
+            batch = []
+    if batch or columns is None:
+        yield _frame(batch, columns, wanted, dtype)[0]
+
+def _frame(records: list[dict], columns: list[str] | None, wanted: set[str] | None, dtype: dict | None) -> tuple[pd.DataFrame, list[str]]:
+    df = pd.DataFrame.from_records(records)
+    if columns is None:
+        columns = [c for c in df.columns if wanted is None or c.strip().lower() in wanted]
+    df = df.reindex(columns=columns)
+    if dtype:
+        df = df.astype({c: dtype[c.strip().lower()] for c in columns if c.strip().lower() in dtype})
+    return df, columns
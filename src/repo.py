@@ -1,20 +1,127 @@
 import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2 import extensions, pool
 
-load_dotenv()
+logger = logging.getLogger("etl.repo")
 
-DB_NAME = os.getenv("PGDB", "esophageal_db")
-DB_USER = os.getenv("PGUSER", "ademidek")
-DB_PASS = os.getenv("PGPASS", "")
-DB_HOST = os.getenv("PGHOST", "127.0.0.1")
-DB_PORT = os.getenv("PGPORT", "5432")
+# Connections idle for longer than this are pinged with SELECT 1 before reuse.
+POOL_PING_AFTER_S = float(os.getenv("PGPOOL_PING_AFTER_S", "30"))
 
-def get_conn():
-    return psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS or None,
-        host=DB_HOST,
-        port=DB_PORT,
+_env_loaded = False
+
+def load_env() -> None:
+    """
+    Load src/.env into the environment, once per process. Called when the
+    database settings are first needed rather than on import, so importing
+    this module has no side effects; variables already set take precedence.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+def _connect_kwargs() -> dict:
+    load_env()
+    return dict(
+        dbname=os.getenv("PGDB", "esophageal_db"),
+        user=os.getenv("PGUSER", "ademidek"),
+        password=os.getenv("PGPASS") or None,
+        host=os.getenv("PGHOST", "127.0.0.1"),
+        port=os.getenv("PGPORT", "5432"),
     )
+
+def _pool_size() -> tuple[int, int]:
+    # Up to PGPOOL_MIN idle connections are kept open for reuse, and checkouts block
+    # once PGPOOL_MAX are in use. The pool closes every connection returned beyond
+    # PGPOOL_MIN, so it defaults to the concurrency of the loaders
+    # (pipeline.DEFAULT_MAX_CONNECTIONS): concurrent loads then reuse their
+    # connections instead of reconnecting on every checkout. All of them are
+    # opened when the pool is created.
+    load_env()
+    pool_max = int(os.getenv("PGPOOL_MAX", "8"))
+    return min(int(os.getenv("PGPOOL_MIN", "4")), pool_max), pool_max
+
+def get_conn():
+    return psycopg2.connect(**_connect_kwargs())
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_last_used: dict[int, float] = {}
+
+def get_pool() -> pool.ThreadedConnectionPool:
+    """The process-wide connection pool, created on first use."""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            pool_min, pool_max = _pool_size()
+            kwargs = _connect_kwargs()
+            _pool = pool.ThreadedConnectionPool(pool_min, pool_max, **kwargs)
+            # ThreadedConnectionPool raises when exhausted; the semaphore makes checkout wait instead.
+            _pool_slots = threading.BoundedSemaphore(pool_max)
+            logger.info(f"[repo] Opened connection pool (min={pool_min}, max={pool_max}) to {kwargs['host']}:{kwargs['port']}/{kwargs['dbname']}")
+        return _pool
+
+def close_pool() -> None:
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool, _pool_slots = None, None
+            _last_used.clear()
+
+def _is_broken(conn) -> bool:
+    return bool(conn.closed) or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN
+
+def _is_healthy(conn) -> bool:
+    if _is_broken(conn):
+        return False
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < POOL_PING_AFTER_S:
+        # Freshly opened or recently used.
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+@contextmanager
+def pooled_conn():
+    """
+    Check a connection out of the pool for the duration of a `with` block.
+
+    Drop-in replacement for get_conn() as a `conn_factory`: callers still commit
+    explicitly. Unhealthy connections are replaced on checkout, an open transaction
+    is rolled back on return, and broken connections are closed instead of reused.
+    """
+    conn_pool = get_pool()
+    slots = _pool_slots
+    slots.acquire()
+    conn = None
+    try:
+        conn = conn_pool.getconn()
+        if not _is_healthy(conn):
+            logger.info("[repo] Replacing unhealthy pooled connection")
+            conn_pool.putconn(conn, close=True)
+            conn = conn_pool.getconn()
+
+        yield conn
+    finally:
+        if conn is not None:
+            # The pool rolls back open transactions itself and closes connections
+            # beyond PGPOOL_MIN; only broken ones need closing explicitly.
+            broken = _is_broken(conn)
+            conn_pool.putconn(conn, close=broken)
+            if broken or conn.closed:
+                _last_used.pop(id(conn), None)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+        slots.release()
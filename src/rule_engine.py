@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import logging
+
+from .rules import (
+    REQUIRED_COLUMNS,
+    RANGE_RULES,
+    ENUM_RULES,
+    DERIVED_CATEGORIES,
+)
+
+logger = logging.getLogger("etl.rule_engine")
+
+class RuleSet:
+    """
+    Validation and derivation rules from rules.py, compiled into vectorized evaluators.
+
+    Rules are plain data (required fields, ranges, enums, category bins); adding one
+    to rules.py is enough for it to be checked and reported by evaluate().
+    """
+
+    def __init__(self, required: list[str], ranges: dict, enums: dict, categories: dict):
+        self.required = list(required)
+        # (column, lower, upper, reason) - invalid when <= lower or > upper.
+        self.ranges = [(col, lo, hi, f"Invalid {col} value") for col, (lo, hi) in ranges.items()]
+        # (column, allowed values, reason)
+        self.enums = [(col, np.array(sorted(allowed), dtype=object), f"Invalid {col} value") for col, allowed in enums.items()]
+        # target -> (source, [(lower, upper)], labels, closed)
+        self.categories = {
+            target: (source, list(bins.keys()), np.array(list(bins.values()), dtype=object), closed)
+            for target, (source, bins, closed) in categories.items()
+        }
+
+    def rule_masks(self, df: pd.DataFrame) -> tuple[list[tuple[np.ndarray, str]], list[str]]:
+        """
+        One (failed mask, label) pair per rule that applies to `df`, in reporting order:
+        missing required fields first, then ranges, then enums.
+        """
+        existing_required = [c for c in self.required if c in df.columns]
+        masks = [(df[c].isna().to_numpy(), c) for c in existing_required]
+
+        for col, lo, hi, reason in self.ranges:
+            if col in df.columns:
+                values = df[col]
+                masks.append(((values.notna() & ((values <= lo) | (values > hi))).to_numpy(dtype=bool), reason))
+        for col, allowed, reason in self.enums:
+            if col in df.columns:
+                values = df[col]
+                masks.append(((values.notna() & ~values.isin(allowed)).to_numpy(dtype=bool), reason))
+        return masks, existing_required
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+        """
+        Evaluate every rule once and return the invalid-row mask together with the
+        reason string of each invalid row (indexed like df[invalid_mask]).
+
+        The rule masks are packed into an integer code per row, so reason text is
+        assembled once per distinct combination of failures rather than per row.
+        A frame with none of the required columns is not validated.
+        """
+        masks, existing_required = self.rule_masks(df)
+        if not existing_required:
+            return pd.Series(False, index=df.index), pd.Series([], index=df.index[:0], dtype=object)
+
+        # Python ints once there are more rules than fit in an int64 bitmask.
+        codes = np.zeros(len(df), dtype=np.int64 if len(masks) < 63 else object)
+        for bit, (mask, _) in enumerate(masks):
+            codes[mask] += 1 << bit
+
+        invalid = codes != 0
+        unique_codes, inverse = np.unique(codes[invalid], return_inverse=True)
+        texts = np.array([self._reason(code, masks, len(existing_required)) for code in unique_codes.tolist()], dtype=object)
+
+        invalid_mask = pd.Series(invalid, index=df.index)
+        reasons = pd.Series(texts[inverse] if len(texts) else [], index=df.index[invalid], dtype=object)
+        return invalid_mask, reasons
+
+    @staticmethod
+    def _reason(code: int, masks: list[tuple[np.ndarray, str]], n_required: int) -> str:
+        failed = [bit for bit in range(len(masks)) if code >> bit & 1]
+        row_reasons = []
+        missing_fields = [masks[bit][1] for bit in failed if bit < n_required]
+        if missing_fields:
+            row_reasons.append("Missing fields: " + ", ".join(missing_fields))
+        row_reasons.extend(masks[bit][1] for bit in failed if bit >= n_required)
+        if not row_reasons:
+            row_reasons.append("Failed validation")
+        return "; ".join(row_reasons)
+
+    def categorize(self, df: pd.DataFrame, target: str) -> pd.Series:
+        """
+        Bin the source column of `target` into an ordered categorical of its labels
+        with np.select. Values outside every bin (and nulls) are null.
+        """
+        source, bins, labels, closed = self.categories[target]
+        values = pd.to_numeric(df[source], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+        conditions = []
+        for lo, hi in bins:
+            if lo == hi:
+                conditions.append(values == lo)
+            elif closed == "left":
+                conditions.append((values >= lo) & (values < hi))
+            else:
+                conditions.append((values > lo) & (values <= hi))
+
+        # The first matching bin wins; its position is the category code, -1 is null.
+        codes = np.select(conditions, np.arange(len(labels)), default=-1) if conditions else np.full(len(df), -1)
+        return pd.Series(pd.Categorical.from_codes(codes, categories=labels, ordered=True), index=df.index)
+
+def compile_rules(
+    required: list[str] = REQUIRED_COLUMNS,
+    ranges: dict = RANGE_RULES,
+    enums: dict = ENUM_RULES,
+    categories: dict = DERIVED_CATEGORIES,
+) -> RuleSet:
+    return RuleSet(required, ranges, enums, categories)
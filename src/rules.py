@@ -3,6 +3,11 @@ COLUMN_NULL_THRESHOLD = 70.0
 
 PLACEHOLDER_COLUMNS = ["unnamed: 0", "index"]
 
+# clean() converts a text column to a categorical, so that only its distinct values
+# are normalized, when a sample of its first rows has at most this ratio of distinct values.
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+CARDINALITY_SAMPLE_ROWS = 10_000
+
 # Columns that should hold numeric values.
 NUMERIC_COLUMNS = [
     'height',
@@ -30,22 +35,78 @@ REQUIRED_COLUMNS = [
     'vital_status',
 ]
 
+# Raw columns extract() parses; every other column in the source file is skipped.
+# The required fields already include the inputs of the derived features
+# (height, weight and the two alcohol columns).
+SOURCE_COLUMNS = list(REQUIRED_COLUMNS)
+
+# Raw columns holding numbers. The pandas path leaves them to the parser's inference;
+# SQL validation (sql_validate.py) loads every field as text and casts these itself.
+SOURCE_NUMERIC_COLUMNS = [
+    'height',
+    'weight',
+    'primary_pathology_age_at_initial_pathologic_diagnosis',
+    'frequency_of_alcohol_consumption',
+    'amount_of_alcohol_consumption_per_day',
+    'tobacco_smoking_history',
+]
+
+# Low-cardinality text columns parsed straight into categoricals.
+CATEGORICAL_COLUMNS = [
+    'gender',
+    'race_list',
+    'reflux_history',
+    'barretts_esophagus',
+    'primary_pathology_histological_type',
+    'person_neoplasm_cancer_status',
+    'vital_status',
+]
+
+# Parser dtypes pushed down into extract(). Numeric columns are left to the parser's
+# inference: malformed values must reach cast_numeric() to be coerced to null.
+SOURCE_DTYPES = {c: 'category' for c in CATEGORICAL_COLUMNS}
+
 # Height and Weight constraints.
 HEIGHT_MIN, HEIGHT_MAX = 0, 300 # height in cm
 WEIGHT_MIN, WEIGHT_MAX = 0, 500 # weight in kg
 
+# Domain ranges checked by the rule engine: a non-null value is invalid when <= min or > max.
+RANGE_RULES = {
+    'height': (HEIGHT_MIN, HEIGHT_MAX),
+    'weight': (WEIGHT_MIN, WEIGHT_MAX),
+}
+
+# Allowed values for categorical columns (compared after clean() lower-cases them).
+# A non-null value outside its set rejects the row, e.g. {'gender': {'male', 'female'}}.
+ENUM_RULES = {}
+
 #BMI category thresholds.
 BMI_UNDERWEIGHT = 18.0
 BMI_NORMAL = 25.0
 BMI_OVERWEIGHT = 30.0
 
-# Alcohol risk categories based on weekly consumption.
+# BMI categories as [lower, upper) bins.
+BMI_CATEGORIES = {
+    (float('-inf'), BMI_UNDERWEIGHT): "Underweight",
+    (BMI_UNDERWEIGHT, BMI_NORMAL): "Normal",
+    (BMI_NORMAL, BMI_OVERWEIGHT): "Overweight",
+    (BMI_OVERWEIGHT, float('inf')): "Obese",
+}
+
+# Alcohol risk categories based on weekly consumption, as (lower, upper] bins.
+# A bin whose bounds are equal matches that value exactly.
 ALCOHOL_RISK_CATEGORIES = {
     (0, 0): "None",
-    (1, 7): "Low",
+    (0, 7): "Light",
     (7, 14): "Moderate",
-    (14, 35): "High",
-    (15, float('inf')): "Excessive",
+    (14, 35): "Heavy",
+    (35, float('inf')): "Very Heavy",
+}
+
+# Derived category columns: target column -> (source column, bins, closed side of each bin).
+DERIVED_CATEGORIES = {
+    'bmi_category': ('bmi', BMI_CATEGORIES, 'left'),
+    'alcohol_risk_category': ('total_drinks_per_week', ALCOHOL_RISK_CATEGORIES, 'right'),
 }
 
 # Outlining the expected columns in the Esophageal dataset, so as not to upsert unexpected columns.
@@ -68,4 +129,25 @@ ESOPHAGEAL_COLUMNS = [
     'pathology_histological_type',
 ]
 
-REJECT_COLUMNS = ESOPHAGEAL_COLUMNS + ['reason']
\ No newline at end of file
+REJECT_COLUMNS = ESOPHAGEAL_COLUMNS + ['reason']
+
+# Renaming columns for final database schema.
+COLUMN_MAPPING = {
+    'race_list': 'race',
+    'person_neoplasm_cancer_status': 'cancer_status',
+    'tobacco_smoking_history': 'smoking_history',
+    'primary_pathology_histological_type': 'pathology_histological_type',
+    'primary_pathology_age_at_initial_pathologic_diagnosis': 'age_at_diagnosis',
+}
+
+# Rule sets that sources in config/sources.yaml can refer to by name.
+RULE_SETS = {
+    'esophageal': {
+        'source_columns': SOURCE_COLUMNS,
+        'source_dtypes': SOURCE_DTYPES,
+        'numeric_columns': SOURCE_NUMERIC_COLUMNS,
+        'column_mapping': COLUMN_MAPPING,
+        'table_columns': ESOPHAGEAL_COLUMNS,
+        'reject_columns': REJECT_COLUMNS,
+    },
+}
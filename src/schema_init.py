@@ -1,20 +1,77 @@
+import hashlib
 from pathlib import Path
-from .repo import get_conn
+from typing import Callable
+from .repo import pooled_conn
 import logging
 
-def run_schema():
-    logger = logging.getLogger("etl.schema_init")
+logger = logging.getLogger("etl.schema_init")
 
-    root_dir = Path(__file__).resolve().parent
-    schema_path = root_dir / "schema.sql"
+ROOT_DIR = Path(__file__).resolve().parent
+# Numbered migrations, `<version>_<name>.sql`, applied once each in version order.
+MIGRATIONS_DIR = ROOT_DIR / "migrations"
+RESET_PATH = ROOT_DIR / "schema_reset.sql"
 
-    if not schema_path.exists():
-        raise FileNotFoundError(f"schema.sql not found at {schema_path}")
+VERSION_TABLE = "schema_version"
+# Serializes concurrent runs (e.g. per-file jobs) while they migrate.
+LOCK_ID = 0x65746C  # "etl"
 
-    sql = schema_path.read_text()
+def migrations(migrations_dir: Path = MIGRATIONS_DIR) -> list[tuple[int, str, str, str]]:
+    """(version, name, sql, sha256 checksum) of each migration file, in version order."""
+    found = []
+    for path in migrations_dir.glob("*.sql"):
+        version, _, name = path.stem.partition("_")
+        if not version.isdigit():
+            raise ValueError(f"Migration '{path.name}' is not named <version>_<name>.sql")
+        sql = path.read_text()
+        found.append((int(version), name, sql, hashlib.sha256(sql.encode()).hexdigest()))
+    found.sort()
+    versions = [m[0] for m in found]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return found
 
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql)
+def run_schema(*, reset: bool = True, migrations_dir: Path = MIGRATIONS_DIR, conn_factory: Callable = pooled_conn) -> list[int]:
+    '''
+    Applies the migrations not yet recorded in the schema_version table and
+    returns their versions. When every migration is recorded no DDL runs.
+
+    A recorded migration whose file changed since (a different checksum) raises
+    RuntimeError: applied migrations are never edited, a new one is added instead.
+    With `reset` (the default, used by full runs) the staging tables are then
+    emptied by schema_reset.sql; incremental runs keep their rows.
+    '''
+    pending = migrations(migrations_dir)
+
+    with conn_factory() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_ID,))
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (VERSION_TABLE,))
+        if cur.fetchone()[0]:
+            cur.execute(f"SELECT version, checksum FROM {VERSION_TABLE}")
+            recorded = dict(cur.fetchall())
+        else:
+            cur.execute(
+                f"CREATE TABLE {VERSION_TABLE} (version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                "checksum TEXT NOT NULL, applied_at TIMESTAMP NOT NULL DEFAULT NOW())"
+            )
+            recorded = {}
+
+        applied = []
+        for version, name, sql, checksum in pending:
+            if version in recorded:
+                if recorded[version] != checksum:
+                    raise RuntimeError(f"Migration {version:04d}_{name}.sql changed after it was applied")
+                continue
+            cur.execute(sql)
+            cur.execute(f"INSERT INTO {VERSION_TABLE} (version, name, checksum) VALUES (%s, %s, %s)", (version, name, checksum))
+            applied.append(version)
+            logger.info(f"[schema_init] Applied migration {version:04d}_{name}.sql")
+
+        if reset:
+            cur.execute(RESET_PATH.read_text())
         conn.commit()
 
-    logger.info(f"[schema_init] Applied schema from {schema_path}")
+    if not applied:
+        logger.info(f"[schema_init] Schema up to date at version {max(recorded, default=0)}")
+    if reset:
+        logger.info("[schema_init] Emptied the staging tables")
+    return applied
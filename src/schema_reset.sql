@@ -0,0 +1,3 @@
+-- Emptying the staging tables on full (non-incremental) runs.
+-- Their definitions, indexes and statistics are kept.
+TRUNCATE TABLE stg_esophageal, stg_rejects;
@@ -0,0 +1,171 @@
+import os
+import tempfile
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from . import clean
+from . import manifest
+from . import metrics
+from . import validate
+
+logger = logging.getLogger("etl.sharded")
+
+# Worker processes clean() and validate() run in, set with ETL_SHARDS; 1 keeps
+# the single-process path.
+SHARDS = int(os.getenv("ETL_SHARDS", "1"))
+# Fewer shards are used when each would get fewer rows than this: below it the
+# process start-up and transport cost more than the work they spread.
+MIN_ROWS_PER_SHARD = 50_000
+
+# Shards travel between processes as Arrow IPC files on this tmpfs, memory-mapped
+# on read, rather than as pickled frames.
+SHARD_DIR = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+
+def shard_count(rows: int, shards: int | None = None) -> int:
+    return max(1, min(SHARDS if shards is None else shards, rows // MIN_ROWS_PER_SHARD))
+
+def _write_table(table, path: Path) -> Path:
+    import pyarrow as pa
+
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+def _write(df: pd.DataFrame, path: Path) -> Path:
+    import pyarrow as pa
+
+    return _write_table(pa.Table.from_pandas(df, preserve_index=True), path)
+
+def _read_table(path: Path):
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    # The mapping outlives the file's name, which is removed as soon as it is read.
+    path.unlink()
+    return table
+
+def _read(path: Path) -> pd.DataFrame:
+    return _read_table(path).to_pandas()
+
+def shard_ids(data: pd.DataFrame, key_columns: list[str], shards: int) -> np.ndarray | None:
+    """
+    The shard of each row, from its primary key as clean() normalizes it, so rows
+    sharing a key, and therefore identical rows too, land in the same shard.
+    None when `data` has none of the key columns.
+    """
+    raw_names = {c.strip().lower(): c for c in data.columns}
+    present = [raw_names[c] for c in key_columns if c in raw_names]
+    if not present:
+        return None
+    keys = clean.normalize_strings(data[present])
+    # Only equal within this frame, which is all the split needs.
+    codes = pd.factorize(keys.iloc[:, 0])[0] if len(present) == 1 else clean.frame_row_keys(keys)
+    return (codes % shards).astype(np.intp)
+
+def _prepare_shard(in_path: Path, out_path: Path) -> tuple[pd.Series, int, int, list[dict]]:
+    """
+    clean() steps 1-3 and 5 on one shard, which are row-local or, for the
+    duplicates, local to the shard. Returns its null counts for the global step 6.
+    """
+    metrics.reset()
+    df = _read(in_path)
+    before = len(df)
+    df = clean.normalize_strings(df)
+    df = df[clean.first_occurrences(clean.frame_row_keys(df))]
+    df = clean.drop_placeholder_columns(df)
+    _write(df, out_path)
+    return df.isna().sum(), len(df), before - len(df), metrics.records()
+
+def _validate_shard(in_path: Path, out_paths: tuple[Path, Path, Path], columns_to_drop: list[str], key_columns: list[str], pk_policy: str) -> list[dict]:
+    """
+    The rest of clean(), resolve_pk_conflicts() and validate() on one prepared
+    shard. Writes the valid rows, the rejects and the manifest's row hashes.
+    """
+    import pyarrow as pa
+
+    metrics.reset()
+    df = _read(in_path).drop(columns=columns_to_drop, errors="ignore")
+    df = clean.resolve_pk_conflicts(df, key_columns, pk_policy)
+    _, current_rows = manifest.changed_rows(df, key_columns, {})
+    cleaned, rejects = validate.validate(df, write_rejects_path=None)
+
+    cleaned_path, rejects_path, rows_path = out_paths
+    _write(cleaned, cleaned_path)
+    _write(rejects, rejects_path)
+    _write_table(pa.table({"key": list(current_rows), "hash": list(current_rows.values())}), rows_path)
+    return metrics.records()
+
+def _concat(paths: list[Path]) -> pd.DataFrame:
+    """
+    The shards' frames in their original row order. A text column one shard
+    made categorical and another did not is merged as plain strings.
+    """
+    import pyarrow as pa
+
+    tables = [_read_table(p) for p in paths]
+    non_empty = [t for t in tables if t.num_rows] or tables[:1]
+    schema = non_empty[0].schema
+    for field in schema:
+        types = {t.schema.field(field.name).type for t in non_empty}
+        if len(types) > 1:
+            plain = pa.large_string() if any(pa.types.is_dictionary(t) or pa.types.is_large_string(t) for t in types) else field.type
+            non_empty = [t.set_column(t.schema.get_field_index(field.name), field.name, t[field.name].cast(plain)) for t in non_empty]
+    df = pa.concat_tables([t.select(schema.names) for t in non_empty]).to_pandas()
+    # Arrow brings text back as str; columns that were object (e.g. reasons) stay object.
+    objects = [c["name"] for c in schema.pandas_metadata["columns"] if c["numpy_type"] == "object" and c["name"] in df.columns]
+    if objects:
+        df = df.astype({c: object for c in objects})
+    return df.sort_index()
+
+def clean_validate(data: pd.DataFrame, key_columns: list[str], pk_policy: str, *, shards: int = SHARDS) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, str]] | None:
+    """
+    clean(), resolve_pk_conflicts() and validate() over `shards` worker processes.
+
+    Rows are split by shard_ids(), so de-duplication and primary-key resolution
+    only ever compare rows within one shard. The one global step, dropping
+    columns over the null threshold, is reduced from the shards' null counts
+    between the two passes. Returns the valid rows and the rejects, both in
+    their original order, and the manifest's key -> hash map of the cleaned
+    rows; None when the data cannot be sharded (no key columns, no pyarrow).
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logger.warning("[sharded] pyarrow is not installed, cleaning and validating in one process")
+        return None
+    ids = shard_ids(data, key_columns, shards)
+    if ids is None:
+        return None
+
+    with tempfile.TemporaryDirectory(dir=SHARD_DIR, prefix="etl-shards-") as tmp, \
+         ProcessPoolExecutor(max_workers=shards) as pool:
+        tmp = Path(tmp)
+        inputs = [_write(data[ids == i], tmp / f"{i}.raw.arrow") for i in range(shards)]
+        prepared = [tmp / f"{i}.prepared.arrow" for i in range(shards)]
+
+        null_counts, total_rows, duplicates = None, 0, 0
+        for counts, rows, dropped, records in pool.map(_prepare_shard, inputs, prepared):
+            null_counts = counts if null_counts is None else null_counts.add(counts, fill_value=0)
+            total_rows += rows
+            duplicates += dropped
+            metrics.extend(records)
+        logger.info(f"Removed {duplicates} duplicate rows")
+        columns_to_drop = clean.columns_over_null_threshold(null_counts, total_rows)
+
+        outputs = [tuple(tmp / f"{i}.{part}.arrow" for part in ("cleaned", "rejects", "rows")) for i in range(shards)]
+        n = len(outputs)
+        for records in pool.map(_validate_shard, prepared, outputs, [columns_to_drop] * n, [key_columns] * n, [pk_policy] * n):
+            metrics.extend(records)
+
+        cleaned = _concat([o[0] for o in outputs])
+        rejects = _concat([o[1] for o in outputs])
+        current_rows = {}
+        for o in outputs:
+            table = _read_table(o[2])
+            current_rows.update(zip(table["key"].to_numpy(zero_copy_only=False), table["hash"].to_numpy(zero_copy_only=False)))
+
+    logger.info(f"[sharded] Cleaned and validated {len(data)} rows in {shards} shards: {len(cleaned)} valid, {len(rejects)} rejected")
+    return cleaned, rejects, current_rows
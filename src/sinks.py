@@ -0,0 +1,263 @@
+from datetime import date
+from pathlib import Path
+import json
+import os
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("etl.sinks")
+
+# Partition key that stands for the date of the run rather than a data column.
+LOAD_DATE = "load_date"
+
+# Columnar outputs are compressed; zstd reads and writes faster than gzip at a similar ratio.
+COMPRESSION = "zstd"
+
+# Rejects logs (a source's `rejects_log`) keep a REJECTS_SAMPLE_RATE share of the
+# rejected rows, at most REJECTS_MAX_ROWS of them (0: no cap). The reason counts in
+# the log's summary always cover every reject.
+REJECTS_SAMPLE_RATE = float(os.getenv("ETL_REJECTS_SAMPLE_RATE", "1"))
+REJECTS_MAX_ROWS = int(os.getenv("ETL_REJECTS_MAX_ROWS", "0"))
+
+class Sink:
+    """Accepts DataFrames through write() until close(); usable as a context manager."""
+
+    def write(self, df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class CsvSink(Sink):
+    """Plain CSV, for inspecting outputs by hand. Chunks are appended after one header."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+        self._header = False
+
+class JsonSink(Sink):
+    """A JSON array of records, written one chunk at a time."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._empty = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._file is None:
+            self._file = self.path.open("w")
+            self._file.write("[")
+        if df.empty:
+            return
+        if not self._empty:
+            self._file.write(",")
+        self._file.write(df.to_json(orient="records", indent=2)[1:-1].rstrip("\n"))
+        self._empty = False
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.write("\n]")
+            self._file.close()
+
+class NdjsonSink(Sink):
+    """One JSON record per line, appended chunk by chunk."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._file is None:
+            self._file = self.path.open("w")
+        if not df.empty:
+            self._file.write(df.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+def _widen(arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_null(arrow_type):
+        return pa.string()
+    if pa.types.is_integer(arrow_type):
+        return pa.float64()
+    if pa.types.is_dictionary(arrow_type):
+        return pa.dictionary(pa.int32(), _widen(arrow_type.value_type))
+    return arrow_type
+
+class ArrowSink(Sink):
+    """
+    Parquet or Arrow IPC, typed and compressed, optionally as a hive-partitioned
+    dataset directory (one subdirectory per value of each `partition_by` column).
+
+    The first chunk fixes the schema and later chunks are cast to it, so its
+    types are widened to what later chunks may hold (see _widen): a column or
+    categorical that is entirely null in the first chunk is stored as string,
+    integers as float64 (a later chunk may have fractions or nulls), and
+    categoricals use 32-bit dictionary indices so chunks with more categories fit.
+    """
+
+    def __init__(self, path: Path, file_format: str, partition_by: list[str] | None = None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError(f"pyarrow is required to write {file_format} output '{path}'") from e
+        self.path = path
+        self.file_format = file_format
+        self.partition_by = partition_by or []
+        self._schema = None
+        self._writer = None
+        self._parts = 0
+
+    def _table(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        if LOAD_DATE in self.partition_by:
+            df = df.assign(**{LOAD_DATE: date.today().isoformat()})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            fields = []
+            for field in table.schema:
+                dtype = df[field.name].dtype
+                if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.empty:
+                    # No categories yet, so pandas' placeholder value type says nothing.
+                    field = field.with_type(pa.dictionary(pa.int32(), pa.null()))
+                fields.append(field.with_type(_widen(field.type)))
+            self._schema = pa.schema(fields)
+        return table.cast(self._schema)
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = self._table(df)
+        if self.partition_by:
+            self._write_partitioned(table)
+        elif self.file_format == "parquet":
+            import pyarrow.parquet as pq
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression=COMPRESSION)
+            self._writer.write_table(table)
+        else:
+            import pyarrow as pa
+            if self._writer is None:
+                options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+                self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+            self._writer.write_table(table)
+
+    def _write_partitioned(self, table) -> None:
+        import pyarrow.dataset as ds
+
+        if self._parts == 0 and self.path.exists():
+            # A rerun replaces the previous dataset rather than adding to it.
+            shutil.rmtree(self.path)
+        extension = "parquet" if self.file_format == "parquet" else "arrow"
+        file_options = ds.ParquetFileFormat().make_write_options(compression=COMPRESSION) if self.file_format == "parquet" else None
+        ds.write_dataset(
+            table,
+            self.path,
+            format="parquet" if self.file_format == "parquet" else "ipc",
+            file_options=file_options,
+            partitioning=self.partition_by,
+            partitioning_flavor="hive",
+            basename_template=f"part-{self._parts:05d}-{{i}}.{extension}",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        self._parts += 1
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+# Output formats by file extension. Partitioned outputs are directories named like the file.
+FORMATS = {
+    ".csv": lambda path, partition_by: CsvSink(path),
+    ".json": lambda path, partition_by: JsonSink(path),
+    ".ndjson": lambda path, partition_by: NdjsonSink(path),
+    ".jsonl": lambda path, partition_by: NdjsonSink(path),
+    ".parquet": lambda path, partition_by: ArrowSink(path, "parquet", partition_by),
+    ".arrow": lambda path, partition_by: ArrowSink(path, "arrow", partition_by),
+    ".feather": lambda path, partition_by: ArrowSink(path, "arrow", partition_by),
+}
+PARTITIONED_FORMATS = {".parquet", ".arrow", ".feather"}
+
+def check_output(path: str, partition_by: list[str] | None = None) -> None:
+    """Raise ValueError for an output path or partitioning no sink supports."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported output format '{suffix}' for '{path}' (expected one of {', '.join(FORMATS)})")
+    if partition_by and suffix not in PARTITIONED_FORMATS:
+        raise ValueError(f"Output '{path}' cannot be partitioned; use a Parquet or Arrow output")
+
+def open_sink(path: str | Path, *, partition_by: list[str] | None = None) -> Sink:
+    """The sink for `path`, picked by its extension."""
+    path = Path(path)
+    check_output(str(path), partition_by)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return FORMATS[path.suffix.lower()](path, partition_by)
+
+def write_frame(df: pd.DataFrame, path: str | Path, *, partition_by: list[str] | None = None) -> None:
+    with open_sink(path, partition_by=partition_by) as sink:
+        sink.write(df)
+
+class RejectSink(Sink):
+    """
+    The rejects log: rejected rows, each with its `reason`, streamed to the sink
+    for `path` as they are written, plus `<stem>.summary.json` with the number of
+    rejects per reason once closed.
+
+    Only a `sample_rate` share of the rows is kept (a seeded draw, so reruns keep
+    the same rows), and at most `max_rows` of those (0: no cap); the reason
+    counts are exact regardless. Defaults come from ETL_REJECTS_SAMPLE_RATE and
+    ETL_REJECTS_MAX_ROWS.
+    """
+
+    def __init__(self, path: str | Path, *, sample_rate: float | None = None, max_rows: int | None = None, seed: int = 0):
+        self.path = Path(path)
+        self.summary_path = self.path.with_suffix(".summary.json")
+        self.sample_rate = REJECTS_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_rows = REJECTS_MAX_ROWS if max_rows is None else max_rows
+        self.reason_counts: dict[str, int] = {}
+        self.rejected_rows = 0
+        self.written_rows = 0
+        self._rng = np.random.default_rng(seed)
+        self._sink = open_sink(self.path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.rejected_rows += len(df)
+        for reason, count in df["reason"].value_counts(sort=False).items():
+            self.reason_counts[reason] = self.reason_counts.get(reason, 0) + int(count)
+
+        if self.sample_rate < 1:
+            df = df[self._rng.random(len(df)) < self.sample_rate]
+        if self.max_rows:
+            df = df.iloc[:max(self.max_rows - self.written_rows, 0)]
+        if len(df):
+            self._sink.write(df)
+            self.written_rows += len(df)
+
+    def summary(self) -> dict:
+        return {
+            "rejected_rows": self.rejected_rows,
+            "written_rows": self.written_rows,
+            "sample_rate": self.sample_rate,
+            "max_rows": self.max_rows,
+            "reasons": dict(sorted(self.reason_counts.items(), key=lambda item: -item[1])),
+        }
+
+    def close(self) -> None:
+        self._sink.close()
+        self.summary_path.write_text(json.dumps(self.summary(), indent=2))
+        logger.info(f"[sinks] Logged {self.written_rows} of {self.rejected_rows} rejects to '{self.path}', {len(self.reason_counts)} distinct reasons in '{self.summary_path}'")
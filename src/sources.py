@@ -0,0 +1,57 @@
+from pathlib import Path
+import logging
+import yaml
+
+from .readers import api_reader, csv_reader, json_reader
+from .rules import RULE_SETS
+from .sinks import check_output
+from .clean import PK_POLICIES
+
+logger = logging.getLogger("etl.sources")
+
+SOURCES_PATH = Path(__file__).resolve().parent.parent / "config" / "sources.yaml"
+
+# Readers that sources.yaml can refer to by name.
+READERS = {
+    "csv": csv_reader,
+    "json": json_reader,
+    "api": api_reader,
+}
+
+REQUIRED_KEYS = ["path", "reader", "rules", "table", "rejects_table", "pk"]
+OPTIONAL_KEYS = {"cleaned_output": None, "rejected_output": None, "rejects_log": None, "output_partition_by": None, "pk_policy": "last"}
+
+def load_sources(path: Path = SOURCES_PATH) -> dict[str, dict]:
+    """
+    Read the source registry and return the enabled sources by name.
+
+    Every source is returned as a dict with its name under "name" and the keys
+    documented in config/sources.yaml; unknown readers, rule sets, output
+    formats or pk policies raise ValueError.
+    """
+    config = yaml.safe_load(Path(path).read_text()) or {}
+
+    sources = {}
+    for name, entry in (config.get("sources") or {}).items():
+        if not entry.get("enabled", True):
+            logger.info(f"[sources] Skipping disabled source '{name}'")
+            continue
+
+        missing = [k for k in REQUIRED_KEYS if k not in entry]
+        if missing:
+            raise ValueError(f"Source '{name}' is missing keys: {', '.join(missing)}")
+        if entry["reader"] not in READERS:
+            raise ValueError(f"Source '{name}' uses unknown reader '{entry['reader']}'")
+        if entry["rules"] not in RULE_SETS:
+            raise ValueError(f"Source '{name}' uses unknown rule set '{entry['rules']}'")
+
+        source = {"name": name, **OPTIONAL_KEYS, **entry}
+        if source["pk_policy"] not in PK_POLICIES:
+            raise ValueError(f"Source '{name}' uses unknown pk_policy '{source['pk_policy']}'")
+        for key in ("cleaned_output", "rejected_output"):
+            if source[key]:
+                check_output(source[key], source["output_partition_by"])
+        if source["rejects_log"]:
+            check_output(source["rejects_log"])
+        sources[name] = source
+    return sources
@@ -0,0 +1,266 @@
+import csv
+import math
+import logging
+from typing import Callable
+
+from .repo import pooled_conn as _pooled_conn
+from .load import build_conflict_clause
+from .rules import RULE_SETS
+from . import metrics
+from . import rule_engine
+
+logger = logging.getLogger("etl.sql_validate")
+
+# Rules from rules.py, compiled once per process as in validate.py.
+RULES = rule_engine.compile_rules()
+
+# What str.strip() removes in clean.normalize_strings, as a Postgres string literal.
+WHITESPACE_SQL = r"E' \t\n\r\f\x0b'"
+# Values that pd.to_numeric accepts as plain decimal numbers; anything else becomes null.
+NUMBER_PATTERN = r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+
+OVERFLOW_REASON = "Load error: numeric field overflow"
+
+def _quote(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+def landing_table(source: dict) -> str:
+    return f"{source['table']}_landing"
+
+def read_header(path: str) -> list[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+def build_landing_sql(table_name: str, n_columns: int) -> tuple[str, str]:
+    """
+    An unlogged landing table with one TEXT column per field of the file (c0, c1, ...),
+    numbered in file order by `_line`, and the COPY that fills it from the raw CSV.
+    """
+    columns = [f"c{i}" for i in range(n_columns)]
+    create_sql = (
+        f"DROP TABLE IF EXISTS {table_name}; "
+        f"CREATE UNLOGGED TABLE {table_name} (_line BIGINT GENERATED ALWAYS AS IDENTITY, "
+        + ", ".join(f"{c} TEXT" for c in columns) + ");"
+    )
+    copy_sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, HEADER true)"
+    return create_sql, copy_sql
+
+def text_expr(column: str) -> str:
+    # Trimmed, lower-cased, and null when blank, as clean() leaves text columns.
+    return f"NULLIF(lower(btrim({column}, {WHITESPACE_SQL})), '')"
+
+def number_expr(column: str) -> str:
+    trimmed = f"btrim({column}, {WHITESPACE_SQL})"
+    return f"CASE WHEN {trimmed} ~ '{NUMBER_PATTERN}' THEN {trimmed}::float8 END"
+
+def bin_case(expr: str, bins: list[tuple[float, float]], labels, closed: str) -> str:
+    """The SQL counterpart of RuleSet.categorize: the first matching bin's label, else null."""
+    whens = []
+    for (lo, hi), label in zip(bins, labels):
+        if lo == hi:
+            conditions = [f"{expr} = {lo}"]
+        else:
+            low_op, high_op = (">=", "<") if closed == "left" else (">", "<=")
+            conditions = [f"{expr} {low_op} {lo}"] if not math.isinf(lo) else []
+            conditions += [f"{expr} {high_op} {hi}"] if not math.isinf(hi) else []
+        whens.append(f"WHEN {' AND '.join(conditions or [f'{expr} IS NOT NULL'])} THEN {_quote(label)}")
+    return "CASE " + " ".join(whens) + " END"
+
+def reason_expr(columns: list[str], rules: rule_engine.RuleSet = RULES) -> str:
+    """
+    The reject reason RuleSet.evaluate() would give each row, or null for a valid
+    row: missing required fields first, then ranges, then enums.
+    """
+    required = [c for c in rules.required if c in columns]
+    parts = []
+    if required:
+        missing = ", ".join(f"CASE WHEN {c} IS NULL THEN {_quote(c)} END" for c in required)
+        any_missing = " OR ".join(f"{c} IS NULL" for c in required)
+        parts.append(f"CASE WHEN {any_missing} THEN 'Missing fields: ' || concat_ws(', ', {missing}) END")
+    for col, lo, hi, reason in rules.ranges:
+        if col in columns:
+            parts.append(f"CASE WHEN {col} <= {lo} OR {col} > {hi} THEN {_quote(reason)} END")
+    for col, allowed, reason in rules.enums:
+        if col in columns:
+            values = ", ".join(_quote(v) for v in allowed)
+            parts.append(f"CASE WHEN {col} NOT IN ({values}) THEN {_quote(reason)} END")
+    if not parts:
+        return "NULL::text"
+    return f"NULLIF(concat_ws('; ', {', '.join(parts)}), '')"
+
+def build_validated_sql(landing: str, header: list[str], rule_set: dict, pk_columns: list[str], pk_policy: str, rules: rule_engine.RuleSet = RULES) -> str:
+    """
+    A temporary `_validated` table holding every row clean() and validate() would
+    keep, with the derived features and a reason (null for valid rows), computed
+    from `landing` in one statement:
+
+    cleaned   text columns trimmed/lower-cased/blank-to-null, numeric ones cast
+    deduped   the first of every set of identical rows
+    resolved  one row per primary key, chosen by `pk_policy` (see clean.PK_POLICIES)
+    derived   bmi and total_drinks_per_week (validate.derive_features)
+    """
+    positions = {}
+    for i, name in enumerate(header):
+        positions.setdefault(name.strip().lower(), i)
+    numeric = set(rule_set["numeric_columns"])
+    columns = list(rule_set["source_columns"])
+
+    selects = []
+    for col in columns:
+        raw = f"c{positions[col]}" if col in positions else "NULL"
+        selects.append(f"{number_expr(raw) if col in numeric else text_expr(raw)} AS {col}")
+
+    all_columns = ", ".join(columns)
+    pk = ", ".join(pk_columns)
+    order = {
+        "first": "_line",
+        "last": "_line DESC",
+        "most_complete": f"num_nonnulls({all_columns}) DESC, _line DESC",
+    }[pk_policy]
+    any_null_pk = " OR ".join(f"{c} IS NULL" for c in pk_columns) or "FALSE"
+
+    bmi_source, bmi_bins, bmi_labels, bmi_closed = rules.categories["bmi_category"]
+    drinks_source, drinks_bins, drinks_labels, drinks_closed = rules.categories["alcohol_risk_category"]
+    derived_columns = columns + ["bmi", "total_drinks_per_week"]
+
+    return f"""
+        CREATE TEMP TABLE _validated ON COMMIT DROP AS
+        WITH cleaned AS (
+            SELECT _line, {", ".join(selects)} FROM {landing}
+        ), deduped AS (
+            SELECT * FROM (
+                SELECT *, row_number() OVER (PARTITION BY {all_columns} ORDER BY _line) AS _copy FROM cleaned
+            ) t WHERE _copy = 1
+        ), resolved AS (
+            SELECT * FROM (
+                SELECT *, row_number() OVER (PARTITION BY {pk or "1"} ORDER BY {order}) AS _rank FROM deduped
+            ) t WHERE _rank = 1 OR {any_null_pk}
+        ), derived AS (
+            SELECT *,
+                -- round() of a float8 rounds half to even, like np.round.
+                CASE WHEN height > 0 AND weight IS NOT NULL
+                     THEN round(weight / ((height / 100) ^ 2) * 100) / 100 END AS bmi,
+                frequency_of_alcohol_consumption * amount_of_alcohol_consumption_per_day AS total_drinks_per_week
+            FROM resolved
+        )
+        SELECT _line, {", ".join(derived_columns)},
+            {bin_case(bmi_source, bmi_bins, bmi_labels, bmi_closed)} AS bmi_category,
+            {bin_case(drinks_source, drinks_bins, drinks_labels, drinks_closed)} AS alcohol_risk_category,
+            {reason_expr(derived_columns, rules)} AS reason
+        FROM derived
+    """
+
+def column_types(cur, table_name: str) -> dict[str, tuple[str, int | None, int | None]]:
+    """(data type, numeric precision, numeric scale) of each column of `table_name`."""
+    cur.execute(
+        "SELECT column_name, data_type, numeric_precision, numeric_scale "
+        "FROM information_schema.columns WHERE table_name = %s",
+        (table_name,),
+    )
+    return {name: (data_type, precision, scale) for name, data_type, precision, scale in cur.fetchall()}
+
+def overflow_expr(mapping: dict[str, str], types: dict[str, tuple]) -> str:
+    # A value overflows NUMERIC(p, s) when, rounded to s places, it reaches 10^(p-s).
+    checks = [
+        f"abs(round(({raw})::numeric, {scale})) >= 1e{precision - scale}"
+        for column, raw in mapping.items() if column in types
+        for data_type, precision, scale in [types[column]]
+        if data_type == "numeric" and precision is not None
+    ]
+    return "COALESCE(" + " OR ".join(checks) + ", FALSE)" if checks else "FALSE"
+
+def float_text_expr(expr: str) -> str:
+    # str() of a Python float, as the pandas path stores numbers in TEXT columns: 2.0, not 2.
+    return f"CASE WHEN {expr} = trunc({expr}) AND abs({expr}) < 1e16 THEN {expr}::numeric::text || '.0' ELSE {expr}::text END"
+
+def target_mapping(columns: list[str], inverse: dict[str, str], numeric: set[str], types: dict[str, tuple]) -> dict[str, str]:
+    """The `_validated` expression for each table column."""
+    mapping = {}
+    for column in columns:
+        raw = inverse.get(column, column)
+        text_target = types.get(column, ("text",))[0] == "text"
+        mapping[column] = float_text_expr(raw) if raw in numeric and text_target else raw
+    return mapping
+
+def build_insert_sql(table_name: str, mapping: dict[str, str], pk_columns: list[str], where: str) -> str:
+    columns = list(mapping)
+    return f"""
+        INSERT INTO {table_name} ({", ".join(columns)})
+        SELECT {", ".join(mapping.values())} FROM _validated WHERE {where}
+        {build_conflict_clause(columns, pk_columns)};
+    """
+
+def run_source(source: dict, *, conn_factory: Callable = _pooled_conn) -> dict:
+    """
+    Validate and load one CSV source inside Postgres instead of pandas.
+
+    The raw file is COPYed as text into an unlogged landing table; cleaning,
+    primary-key resolution, the derived features and every rule run as one
+    set-based statement generated from rules.py (see build_validated_sql); and
+    the valid rows and the rejects are upserted with INSERT ... SELECT. Rows that
+    would overflow a NUMERIC column are handled as the pandas loaders handle the
+    database refusing them: valid ones are rejected with the load error, rejected
+    ones are loaded as just their key and reason. Rejects without a key cannot be
+    loaded and are only counted.
+
+    Runs in one transaction. Nulls in a column do not get it dropped as clean()
+    would above COLUMN_NULL_THRESHOLD, and no output files are written.
+    """
+    if source["reader"] != "csv":
+        raise ValueError(f"Source '{source['name']}' uses the {source['reader']} reader; SQL validation reads CSV files only")
+    rule_set = RULE_SETS[source["rules"]]
+    inverse = {table: raw for raw, table in rule_set["column_mapping"].items()}
+    raw_pk = [inverse.get(c, c) for c in source["pk"]]
+    landing = landing_table(source)
+
+    header = read_header(source["path"])
+    create_sql, copy_sql = build_landing_sql(landing, len(header))
+    validated_sql = build_validated_sql(landing, header, rule_set, raw_pk, source["pk_policy"])
+    numeric = set(rule_set["numeric_columns"])
+    has_pk = " AND ".join(f"{c} IS NOT NULL" for c in raw_pk) or "TRUE"
+
+    with conn_factory() as conn, conn.cursor() as cur:
+        try:
+            with metrics.stage(f"{source['name']}.sql.copy") as record:
+                cur.execute(create_sql)
+                with open(source["path"], "rb") as f:
+                    cur.copy_expert(copy_sql, f)
+                record["rows"] = cur.rowcount
+
+            with metrics.stage(f"{source['name']}.sql.validate"):
+                cur.execute(validated_sql)
+                table_types = column_types(cur, source["table"])
+                table_mapping = target_mapping(rule_set["table_columns"], inverse, numeric, table_types)
+                overflow = overflow_expr(table_mapping, table_types)
+                cur.execute(f"UPDATE _validated SET reason = {_quote(OVERFLOW_REASON)} WHERE reason IS NULL AND {overflow}")
+                if cur.rowcount:
+                    logger.warning(f"[{source['name']}] {cur.rowcount} rows would overflow '{source['table']}' and are rejected")
+
+            with metrics.stage(f"{source['name']}.sql.load"):
+                cur.execute(build_insert_sql(source["table"], table_mapping, source["pk"], "reason IS NULL"))
+                rows_loaded = cur.rowcount
+
+                reject_types = column_types(cur, source["rejects_table"])
+                reject_mapping = target_mapping(rule_set["reject_columns"], inverse, numeric, reject_types)
+                reject_overflow = overflow_expr(reject_mapping, reject_types)
+                keep_or_null = {
+                    column: raw if column in source["pk"] else f"CASE WHEN {reject_overflow} THEN NULL ELSE {raw} END"
+                    for column, raw in reject_mapping.items()
+                }
+                keep_or_null["reason"] = f"CASE WHEN {reject_overflow} THEN reason || '; ' || {_quote(OVERFLOW_REASON)} ELSE reason END"
+                cur.execute(build_insert_sql(source["rejects_table"], keep_or_null, source["pk"], f"reason IS NOT NULL AND {has_pk}"))
+                rows_rejected = cur.rowcount
+
+                cur.execute(f"SELECT count(*) FROM _validated WHERE reason IS NOT NULL AND NOT ({has_pk})")
+                unloadable = cur.fetchone()[0]
+                if unloadable:
+                    logger.error(f"[{source['name']}] {unloadable} rejected rows have no {', '.join(source['pk'])} and could not be loaded into '{source['rejects_table']}'")
+
+            cur.execute(f"DROP TABLE {landing};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    logger.info(f"[{source['name']}] SQL validation loaded {rows_loaded} rows into '{source['table']}', {rows_rejected} into '{source['rejects_table']}'")
+    return {"rows_loaded": rows_loaded, "rows_rejected": rows_rejected}
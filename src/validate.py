@@ -1,17 +1,23 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import logging
 
 logger = logging.getLogger("etl.validate")
 
-from .rules import (
-    REQUIRED_COLUMNS,
-    NUMERIC_COLUMNS,
-    BMI_NORMAL, BMI_OVERWEIGHT, BMI_UNDERWEIGHT,
-)
+from .rules import NUMERIC_COLUMNS
+from . import rule_engine
+from . import metrics
+from . import sinks
+from . import plan_cache
 
+# Rules from rules.py, compiled once per process.
+RULES = rule_engine.compile_rules()
+
+# The transform steps below add or replace columns on `df` in place and return it;
+# validate() makes the single defensive copy before running them.
+@metrics.timed("validate.cast_numeric")
 def cast_numeric(df: pd.DataFrame, numeric_cols: list[str]) -> pd.DataFrame:
-    df = df.copy()
     for col in numeric_cols:
         if col in df.columns:
             before_nulls = df[col].isna().sum()
@@ -20,96 +26,78 @@ def cast_numeric(df: pd.DataFrame, numeric_cols: list[str]) -> pd.DataFrame:
             logger.info(f"Numeric cast: {col} - Introduced {after_nulls - before_nulls} nulls")
     return df
 
-def add_bmi(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+@metrics.timed("validate.derive_features")
+def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add bmi, bmi_category, total_drinks_per_week and alcohol_risk_category in one
+    pass over NumPy arrays. The categories are binned into ordered categoricals
+    by RULES.categorize, with the bins from rules.py. BMI is null unless height
+    is positive and weight is present; the alcohol features are only added when
+    both alcohol columns are.
+    """
     if "height" in df.columns and "weight" in df.columns:
-        valid_bmi_mask = df["height"].notna() & (df["height"] > 0) & df["weight"].notna()
-        df["bmi"] = pd.NA
-        df.loc[valid_bmi_mask, "bmi"] = (
-            df.loc[valid_bmi_mask, "weight"] / ((df.loc[valid_bmi_mask, "height"] / 100) ** 2)
-        ).round(2)
+        height = df["height"].to_numpy(dtype=float, na_value=np.nan)
+        weight = df["weight"].to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bmi = np.round(weight / (height / 100) ** 2, 2)
+        bmi[~(height > 0)] = np.nan
     else:
-        df["bmi"] = pd.NA
-    return df
-
-def add_bmi_category(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["bmi_category"] = pd.NA
-    valid = df["bmi"].notna() if "bmi" in df.columns else pd.Series(False, index=df.index)
+        bmi = np.full(len(df), np.nan)
+    df["bmi"] = bmi
+    df["bmi_category"] = RULES.categorize(df, "bmi_category")
 
-    df.loc[valid & (df["bmi"] < BMI_UNDERWEIGHT), "bmi_category"] = "Underweight"
-    df.loc[valid & (df["bmi"] >= BMI_UNDERWEIGHT) & (df["bmi"] < BMI_NORMAL), "bmi_category"] = "Normal"
-    df.loc[valid & (df["bmi"] >= BMI_NORMAL) & (df["bmi"] < BMI_OVERWEIGHT), "bmi_category"] = "Overweight"
-    df.loc[valid & (df["bmi"] >= BMI_OVERWEIGHT), "bmi_category"] = "Obese"
-    return df
-
-def add_alcohol_features(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
     if ("frequency_of_alcohol_consumption" in df.columns
         and "amount_of_alcohol_consumption_per_day" in df.columns):
         df["total_drinks_per_week"] = (
-            df["frequency_of_alcohol_consumption"] * df["amount_of_alcohol_consumption_per_day"]
+            df["frequency_of_alcohol_consumption"].to_numpy(dtype=float, na_value=np.nan)
+            * df["amount_of_alcohol_consumption_per_day"].to_numpy(dtype=float, na_value=np.nan)
         )
-
-        df["alcohol_risk_category"] = pd.NA
-        df.loc[df["total_drinks_per_week"] == 0, "alcohol_risk_category"] = "None"
-        df.loc[(df["total_drinks_per_week"] > 0) & (df["total_drinks_per_week"] <= 7), "alcohol_risk_category"] = "Light"
-        df.loc[(df["total_drinks_per_week"] > 7) & (df["total_drinks_per_week"] <= 14), "alcohol_risk_category"] = "Moderate"
-        df.loc[(df["total_drinks_per_week"] > 14) & (df["total_drinks_per_week"] <= 35), "alcohol_risk_category"] = "Heavy"
-        df.loc[df["total_drinks_per_week"] > 35, "alcohol_risk_category"] = "Very Heavy"
+        df["alcohol_risk_category"] = RULES.categorize(df, "alcohol_risk_category")
     return df
 
-def build_invalid_mask(df: pd.DataFrame, required_cols: list[str]) -> tuple[pd.Series, list[str]]:
-    existing_required = [c for c in required_cols if c in df.columns]
-    if not existing_required:
-        return pd.Series(False, index=df.index), []
-
-    missing_required_mask = df[existing_required].isna().any(axis=1)
-
-    domain_fail_mask = pd.Series(False, index=df.index)
-    still_candidate = ~missing_required_mask
+@plan_cache.cached("validate.rule_sets")
+def rules_for(required_cols: list[str]) -> rule_engine.RuleSet:
+    # Rule sets for other required columns are compiled once per column list, too.
+    return RULES if list(required_cols) == RULES.required else rule_engine.compile_rules(required=list(required_cols))
 
-    if "height" in df.columns:
-        domain_fail_mask |= (still_candidate & df["height"].notna() & ((df["height"] <= 0) | (df["height"] > 300)))
-    if "weight" in df.columns:
-        domain_fail_mask |= (still_candidate & df["weight"].notna() & ((df["weight"] <= 0) | (df["weight"] > 500)))
-
-    return (missing_required_mask | domain_fail_mask), existing_required
+def build_invalid_mask(df: pd.DataFrame, required_cols: list[str]) -> tuple[pd.Series, list[str]]:
+    rules = rules_for(required_cols)
+    invalid_mask, _ = rules.evaluate(df)
+    return invalid_mask, [c for c in required_cols if c in df.columns]
 
 def build_reject_reasons(df: pd.DataFrame, invalid_mask: pd.Series, existing_required: list[str]) -> list[str]:
-    reasons = []
-    for _, row in df[invalid_mask].iterrows():
-        row_reasons = []
-        missing_fields = [c for c in existing_required if pd.isna(row[c])]
-        if missing_fields:
-            row_reasons.append("Missing fields: " + ", ".join(missing_fields))
-        if "height" in df.columns and not pd.isna(row.get("height")) and (row["height"] <= 0 or row["height"] > 300):
-            row_reasons.append("Invalid height value")
-        if "weight" in df.columns and not pd.isna(row.get("weight")) and (row["weight"] <= 0 or row["weight"] > 500):
-            row_reasons.append("Invalid weight value")
-        if not row_reasons:
-            row_reasons.append("Failed validation")
-        reasons.append("; ".join(row_reasons))
-    return reasons
-
-def validate(df: pd.DataFrame, *, write_rejects_path: Path | None = Path("logs/rejects.json")):
-    df = df.copy()
+    rules = rules_for(existing_required)
+    _, reasons = rules.evaluate(df[invalid_mask])
+    return reasons.tolist()
+
+def validate(df: pd.DataFrame, *, write_rejects_path: Path | sinks.Sink | None = Path("logs/rejects.parquet")):
+    """
+    Split `df` into valid rows and rejects, each reject with its reason. The
+    rejects are also logged to `write_rejects_path` (see sinks.RejectSink), or
+    written to it when it is an open sink, as streaming runs pass for every chunk.
+    """
+    # The one defensive copy: shallow, so the steps below add or replace columns on
+    # this frame without touching the caller's, and without copying any column data.
+    df = df.copy(deep=False)
     df = cast_numeric(df, NUMERIC_COLUMNS)
-    df = add_bmi(df)
-    df = add_bmi_category(df)
-    df = add_alcohol_features(df)
+    df = derive_features(df)
 
-    invalid_mask, existing_required = build_invalid_mask(df, REQUIRED_COLUMNS)
+    # Every rule is evaluated once; the same pass yields the mask and the reasons.
+    with metrics.stage("validate.rules", rows=len(df)):
+        invalid_mask, reasons = RULES.evaluate(df)
 
     if not invalid_mask.any():
         return df, pd.DataFrame(columns=list(df.columns) + ["reason"])
 
-    rejects = df[invalid_mask].copy()
-    rejects["reason"] = build_reject_reasons(df, invalid_mask, existing_required)
-    cleaned = df[~invalid_mask].copy()
+    # Boolean indexing already returns new frames, no extra copy needed.
+    rejects = df[invalid_mask].assign(reason=reasons.to_numpy())
+    cleaned = df[~invalid_mask]
 
-    if write_rejects_path is not None:
-        write_rejects_path.parent.mkdir(parents=True, exist_ok=True)
-        rejects.to_json(write_rejects_path, orient="records", indent=2)
+    # Format follows the extension (see sinks.FORMATS); .ndjson keeps a readable dump.
+    if isinstance(write_rejects_path, sinks.Sink):
+        write_rejects_path.write(rejects)
+    elif write_rejects_path is not None:
+        with sinks.RejectSink(write_rejects_path) as sink:
+            sink.write(rejects)
 
     return cleaned, rejects
@@ -0,0 +1,75 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.readers import api_reader
+
+PAGES = {
+    "/records?page=1": {"data": [{"patient_barcode": f"p{i}", "gender": "MALE"} for i in range(0, 4)], "next": "/records?page=2"},
+    "/records?page=2": {"data": [{"patient_barcode": f"p{i}", "gender": "FEMALE"} for i in range(4, 8)], "next": "records?page=3"},
+    "/records?page=3": {"data": [{"patient_barcode": "p8", "gender": "MALE"}], "next": None},
+}
+
+class StandInApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = {}  # path -> number of 503s still to return
+    requests = []  # (client port, path)
+
+    def do_GET(self):
+        self.requests.append((self.client_address[1], self.path))
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self._send(503, b"busy", {"Retry-After": "0"})
+        elif self.path in PAGES:
+            self._send(200, json.dumps(PAGES[self.path]).encode())
+        elif self.path == "/bare":
+            self._send(200, json.dumps([{"a": 1}]).encode(), {"Link": '</bare2>; rel="next"'})
+        elif self.path == "/bare2":
+            self._send(200, json.dumps([{"a": 2}]).encode())
+        else:
+            self._send(404, b"not found")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(api_reader, "BACKOFF_S", 0)
+    StandInApi.failures, StandInApi.requests = {}, []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInApi)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_extract_chunks_follows_pages_over_one_connection(api):
+    chunks = list(api_reader.extract_chunks(f"{api}/records?page=1", 5, usecols=["patient_barcode"]))
+
+    assert [len(c) for c in chunks] == [5, 4]
+    assert [c.columns.tolist() for c in chunks] == [["patient_barcode"]] * 2
+    assert [path for _, path in StandInApi.requests] == list(PAGES)
+    assert len({port for port, _ in StandInApi.requests}) == 1
+
+def test_link_header_pagination(api):
+    assert api_reader.extract(f"{api}/bare")["a"].tolist() == [1, 2]
+
+def test_retries_unavailable_pages(api):
+    StandInApi.failures["/records?page=2"] = 2
+    df = api_reader.extract(f"{api}/records?page=1")
+    assert len(df) == 9
+    assert [path for _, path in StandInApi.requests].count("/records?page=2") == 3
+
+def test_gives_up_after_max_retries_and_on_client_errors(api):
+    StandInApi.failures["/records?page=1"] = api_reader.MAX_RETRIES + 1
+    with pytest.raises(RuntimeError, match="attempts"):
+        api_reader.extract(f"{api}/records?page=1")
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        api_reader.extract(f"{api}/missing")
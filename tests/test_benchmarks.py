@@ -0,0 +1,33 @@
+from benchmarks import results, synthetic
+from src import clean, validate
+from src.readers import csv_reader
+from src.rules import SOURCE_COLUMNS, SOURCE_DTYPES
+
+def test_synthetic_frame_rejects_the_requested_share(tmp_path):
+    path = synthetic.write_csv(tmp_path / "synthetic.csv", 1000, reject_ratio=0.3, null_ratio=0.0, duplicate_ratio=0.1, extra_columns=3)
+    raw = csv_reader.extract(str(path), usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES)
+    assert len(raw) == 1100
+    cleaned = clean.clean(raw)
+    assert len(cleaned) == 1000
+    valid, rejects = validate.validate(cleaned, write_rejects_path=None)
+    assert len(rejects) == 300
+    assert len(valid) == 700
+
+def test_synthetic_null_ratio_reaches_clean(tmp_path):
+    path = synthetic.write_csv(tmp_path / "synthetic.csv", 1000, reject_ratio=0.0, null_ratio=0.3, extra_columns=0)
+    cleaned = clean.clean(csv_reader.extract(str(path), usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES))
+    # Empty and whitespace-only cells both end up null, and those rows are rejected.
+    nulls = cleaned[synthetic.NULL_COLUMN].isna().sum()
+    assert 250 < nulls < 350
+    _, rejects = validate.validate(cleaned, write_rejects_path=None)
+    assert len(rejects) == nulls
+
+    # Over the null threshold clean() drops the column instead.
+    path = synthetic.write_csv(tmp_path / "sparse.csv", 1000, reject_ratio=0.0, null_ratio=0.9, extra_columns=0)
+    cleaned = clean.clean(csv_reader.extract(str(path), usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES))
+    assert synthetic.NULL_COLUMN not in cleaned.columns
+
+def test_compare_flags_only_timings_beyond_threshold():
+    baseline = {"rows": 10, "clean_s": 1.0, "load_s": 2.0}
+    current = {"rows": 20, "clean_s": 1.05, "load_s": 3.0, "new_s": 1.0}
+    assert results.compare(current, baseline, threshold=0.1) == {"load_s": 1.5}
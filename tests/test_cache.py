@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+from src import cache, manifest
+from src.readers import csv_reader
+
+class CountingReader:
+    __name__ = "counting_csv"
+
+    def __init__(self):
+        self.calls = 0
+
+    def extract(self, path, **options):
+        self.calls += 1
+        return csv_reader.extract(path, **options)
+
+def write_raw(path, rows):
+    path.write_text("Patient_Barcode,Gender,height\n" + "".join(f"p{i},MALE,{170 + i}\n" for i in range(rows)))
+    return str(path)
+
+def cached(reader, path, cache_dir, **options):
+    return cache.extract(reader, path, manifest.file_fingerprint(path), cache_dir=cache_dir, **options)
+
+def test_second_read_is_served_from_cache(tmp_path):
+    path = write_raw(tmp_path / "raw.csv", 20)
+    reader = CountingReader()
+
+    cold = cached(reader, path, tmp_path / "cache", dtype={"gender": "category"})
+    warm = cached(reader, path, tmp_path / "cache", dtype={"gender": "category"})
+
+    assert reader.calls == 1
+    pd.testing.assert_frame_equal(cold, warm)
+    # Other parse options are a different entry.
+    cached(reader, path, tmp_path / "cache", usecols=["patient_barcode"])
+    assert reader.calls == 2
+
+def test_changed_file_invalidates_its_entries(tmp_path):
+    path = write_raw(tmp_path / "raw.csv", 20)
+    reader = CountingReader()
+    cached(reader, path, tmp_path / "cache")
+
+    write_raw(tmp_path / "raw.csv", 30)
+    assert len(cached(reader, path, tmp_path / "cache")) == 30
+    assert reader.calls == 2
+    assert len(list((tmp_path / "cache").glob("*.arrow"))) == 1
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache_dir = tmp_path / "cache"
+    reader = CountingReader()
+    paths = [write_raw(tmp_path / f"raw{i}.csv", 50) for i in range(3)]
+    for i, path in enumerate(paths):
+        cached(reader, path, cache_dir)
+    entries = sorted(cache_dir.glob("*.arrow"), key=lambda p: p.stat().st_mtime_ns)
+    # The oldest entry is used again, so the second one is now least recently used.
+    os.utime(entries[0], ns=(entries[2].stat().st_mtime_ns + 1,) * 2)
+
+    size = entries[0].stat().st_size
+    evicted = cache.evict(cache_dir, max_bytes=2 * size)
+
+    assert evicted == [entries[1]]
@@ -1,3 +1,6 @@
+import tracemalloc
+import numpy as np
+import pytest
 import pandas as pd
 from src import clean
 from src.rules import COLUMN_NULL_THRESHOLD
@@ -29,3 +32,89 @@ def test_clean_drops_high_null_columns():
     out = clean.clean(df)
     if (4/5)*100 > COLUMN_NULL_THRESHOLD:
         assert "mostly_null" not in out.columns
+
+def test_clean_chunks_matches_clean_across_chunk_boundaries():
+    df = pd.DataFrame({
+        "A": [" x ", "y", " x ", "z", "y", "w"],
+        "n": [1, 2, 1, 3, 2, None],
+        "mostly_null": [None, None, None, None, "", 1],
+    })
+    chunks = [df.iloc[:2], df.iloc[2:4], df.iloc[4:]]
+
+    columns_to_drop = clean.find_columns_to_drop(iter(chunks))
+    streamed = pd.concat(list(clean.clean_chunks(iter(chunks), columns_to_drop)))
+    expected = clean.clean(df)
+
+    assert list(streamed.columns) == list(expected.columns)
+    assert streamed.astype(str).values.tolist() == expected.astype(str).values.tolist()
+
+def test_clean_peak_memory_stays_within_fixed_multiple_of_input():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({f"c{i}": rng.random(20000) for i in range(100)})
+    df["label"] = [f" Row {i} " for i in range(20000)]
+    input_bytes = df.memory_usage(deep=True).sum()
+
+    tracemalloc.start()
+    clean.clean(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < 1.5 * input_bytes
+
+def test_clean_normalizes_categorical_columns():
+    df = pd.DataFrame({"id": [1, 2, 3, 4], "gender": pd.Categorical([" MALE ", "male", "  ", "Female"])})
+    out = clean.clean(df)
+    assert out["gender"].tolist()[:2] == ["male", "male"]
+    assert pd.isna(out["gender"].iloc[2])
+    assert list(out["gender"].cat.categories) == ["male", "female"]
+
+def test_normalize_strings_converts_low_cardinality_text_and_nulls_blanks():
+    df = pd.DataFrame({
+        "status": pd.Series([" Alive", "DEAD ", "alive", " "] * 50, dtype=object),
+        "barcode": [f" TCGA-{i} " if i % 7 else "\t" for i in range(200)],
+    })
+    out = clean.normalize_strings(df)
+    assert isinstance(out["status"].dtype, pd.CategoricalDtype)
+    assert list(out["status"].cat.categories) == ["alive", "dead"]
+    assert out["status"].isna().sum() == 50
+    assert not isinstance(out["barcode"].dtype, pd.CategoricalDtype)
+    assert out["barcode"].iloc[1] == "tcga-1"
+    assert out["barcode"].isna().sum() == 29
+
+def test_resolve_pk_conflicts_policies():
+    df = pd.DataFrame({
+        "id": ["a", "b", "a", None, "a", None],
+        "x": [1.0, 2.0, None, 4.0, 5.0, 6.0],
+        "y": ["p", "q", None, "s", None, "u"],
+    })
+    assert clean.resolve_pk_conflicts(df, ["id"], "last").index.tolist() == [1, 3, 4, 5]
+    assert clean.resolve_pk_conflicts(df, ["id"], "first").index.tolist() == [0, 1, 3, 5]
+    assert clean.resolve_pk_conflicts(df, ["id"], "most_complete").index.tolist() == [0, 1, 3, 5]
+    with pytest.raises(ValueError, match="pk_policy"):
+        clean.resolve_pk_conflicts(df, ["id"], "newest")
+
+@pytest.mark.parametrize("policy", clean.PK_POLICIES)
+def test_resolve_pk_conflicts_across_chunks_matches_the_whole_frame(policy):
+    df = pd.DataFrame({
+        "id": ["a", "b", None, "a", "b", "c", "a"],
+        "x": [None, 1.0, 2.0, 2.0, None, 3.0, None],
+        "mostly_null": [None, None, None, None, None, None, 1.0],
+    })
+    chunks = [df.iloc[:2], df.iloc[2:5], df.iloc[5:]]
+
+    winners = clean.PkWinners(["id"], policy)
+    columns_to_drop = clean.find_columns_to_drop(iter(chunks), winners)
+    streamed = pd.concat([clean.resolve_pk_conflicts(chunk, ["id"], policy, winners)
+                          for chunk in clean.clean_chunks(iter(chunks), columns_to_drop)])
+    expected = clean.resolve_pk_conflicts(clean.clean(df), ["id"], policy)
+    # The dropped column does not count towards "most_complete": the last "a" is not preferred.
+    assert streamed.index.tolist() == expected.index.tolist()
+
+def test_seen_keys_keeps_highest_score_per_key():
+    seen = clean.SeenKeys()
+    seen.add(np.array([5, 3, 5], dtype=np.uint64), np.array([1, 2, 7]))
+    seen.add(np.array([3, 9], dtype=np.uint64), np.array([0, 4]))
+    assert len(seen) == 3
+    keys = np.array([3, 5, 9, 1], dtype=np.uint64)
+    assert seen.contains(keys).tolist() == [True, True, True, False]
+    assert seen.scores(keys).tolist() == [2, 7, 4, -1]
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src import cli, logging_config, pipeline
+from benchmarks.synthetic import write_csv
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+def write_registry(tmp_path, csv_path) -> Path:
+    config = tmp_path / "sources.yaml"
+    config.write_text(json.dumps({"sources": {"tiny": {
+        "path": str(csv_path), "reader": "csv", "rules": "esophageal",
+        "table": "stg_esophageal", "rejects_table": "stg_rejects", "pk": ["patient_barcode"],
+    }}}))
+    return config
+
+def test_loader_choices_match_pipeline_loaders():
+    assert set(cli.LOADER_NAMES) == set(pipeline.LOADERS)
+
+def test_validate_only_fails_for_missing_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(logging_config, "setup_logging", lambda: None)
+    config = write_registry(tmp_path, tmp_path / "missing.csv")
+    assert cli.main(["ingest", "--config", str(config), "--validate-only"]) == 1
+
+    write_csv(tmp_path / "missing.csv", 10)
+    assert cli.main(["ingest", "--config", str(config), "--validate-only"]) == 0
+
+def test_dry_run_says_it_ignores_database_modes(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(logging_config, "setup_logging", lambda: None)
+    config = write_registry(tmp_path, write_csv(tmp_path / "tiny.csv", 20))
+    assert cli.main(["ingest", "--config", str(config), "--dry-run", "--incremental", "--sql-validate"]) == 0
+    assert "ignoring --incremental and --sql-validate" in caplog.text
+
+def test_dry_run_does_not_import_psycopg2(tmp_path):
+    config = write_registry(tmp_path, write_csv(tmp_path / "tiny.csv", 200))
+    child = (
+        "import sys; from src.cli import main; "
+        f"rc = main(['ingest', '--config', {str(config)!r}, '--dry-run']); "
+        "print(rc, 'psycopg2' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", child], cwd=tmp_path, capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)), check=True)
+    assert out.stdout.split() == ["0", "False"]
+    assert "Dry run:" in out.stderr
+
+def test_importing_repo_does_not_load_dotenv():
+    child = "import src.repo as repo; print(repo._env_loaded)"
+    out = subprocess.run([sys.executable, "-c", child], capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)), check=True)
+    assert out.stdout.split() == ["False"]
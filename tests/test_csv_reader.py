@@ -0,0 +1,20 @@
+import pandas as pd
+from src.readers import csv_reader
+
+def test_extract_projects_columns_by_normalized_name(tmp_path):
+    path = tmp_path / "raw.csv"
+    path.write_text(",Patient_Barcode, Gender ,Unused\n0,p1,MALE,x\n1,p2,female,y\n")
+
+    df = csv_reader.extract(str(path), usecols=["patient_barcode", "gender"], dtype={"gender": "category"})
+
+    assert list(df.columns) == ["Patient_Barcode", " Gender "]
+    assert isinstance(df[" Gender "].dtype, pd.CategoricalDtype)
+
+def test_extract_chunks_applies_projection(tmp_path):
+    path = tmp_path / "raw.csv"
+    path.write_text("a,b,c\n1,2,3\n4,5,6\n7,8,9\n")
+
+    chunks = list(csv_reader.extract_chunks(str(path), 2, usecols=["a", "c"]))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    assert all(list(c.columns) == ["a", "c"] for c in chunks)
@@ -0,0 +1,43 @@
+import json
+import pandas as pd
+import pytest
+from src.readers import json_reader
+from src.pipeline import transform_source
+
+RECORDS = [{" Patient_Barcode ": f"p{i}", "Gender": "MALE" if i % 2 else "FEMALE", "height": 170.0 + i, "extra": {"x": i}} for i in range(25)]
+
+@pytest.mark.parametrize("layout", ["array", "ndjson"])
+def test_extract_chunks_streams_arrays_and_ndjson(tmp_path, monkeypatch, layout):
+    monkeypatch.setattr(json_reader, "READ_BLOCK_SIZE", 16)
+    path = tmp_path / "raw.json"
+    if layout == "array":
+        path.write_text(json.dumps(RECORDS, indent=2))
+    else:
+        path.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n")
+
+    chunks = list(json_reader.extract_chunks(str(path), 10, usecols=["patient_barcode", "gender"], dtype={"gender": "category"}))
+
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert all(list(c.columns) == [" Patient_Barcode ", "Gender"] for c in chunks)
+    assert isinstance(chunks[0]["Gender"].dtype, pd.CategoricalDtype)
+    assert pd.concat(chunks)[" Patient_Barcode "].tolist() == [r[" Patient_Barcode "] for r in RECORDS]
+
+def test_extract_reports_truncated_json(tmp_path):
+    path = tmp_path / "raw.json"
+    path.write_text(json.dumps(RECORDS)[:-20])
+    with pytest.raises(RuntimeError):
+        json_reader.extract(str(path))
+
+def test_json_source_matches_csv_source(tmp_path):
+    from benchmarks.synthetic import make_raw_frame
+    from benchmarks.bench_pipeline import _bench_source
+
+    raw = make_raw_frame(300, seed=1)
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+    raw.to_json(tmp_path / "raw.json", orient="records", lines=True)
+
+    from_csv = transform_source(_bench_source(tmp_path / "raw.csv"))
+    from_json = transform_source(dict(_bench_source(tmp_path / "raw.json"), reader="json"))
+
+    for csv_frame, json_frame in zip(from_csv[:2], from_json[:2]):
+        pd.testing.assert_frame_equal(csv_frame.astype(str), json_frame.astype(str))
@@ -1,9 +1,12 @@
 import pandas as pd
-from src import load
+import psycopg2
+from src import load, metrics
 
 class FakeCursor:
     def __init__(self):
         self.calls = []
+    def execute(self, sql): self.calls.append(("execute", sql))
+    def copy_expert(self, sql, file): self.calls.append(("copy", sql, file.read()))
     def __enter__(self): return self
     def __exit__(self, exc_type, exc, tb): return False
 
@@ -13,6 +16,7 @@ class FakeConn:
         self.committed = False
     def cursor(self): return self._cur
     def commit(self): self.committed = True
+    def rollback(self): pass
     def __enter__(self): return self
     def __exit__(self, exc_type, exc, tb): return False
 
@@ -46,3 +50,89 @@ def test_upsert_dataframe_calls_execute_values_and_commits():
     assert "ON CONFLICT" in seen["sql"]
     assert seen["records"] == [["p1", "male"]]
     assert conn.committed is True
+
+def test_dataframe_csv_stream_renders_nulls_as_empty_fields():
+    df = pd.DataFrame([{"patient_barcode": "p1", "bmi": 25.5}, {"patient_barcode": "p2", "bmi": None}])
+    stream = load.DataFrameCsvStream(df, rows_per_slice=1)
+    chunks = []
+    while chunk := stream.read(4):
+        chunks.append(chunk)
+    assert "".join(chunks) == "p1,25.5\np2,\n"
+    assert stream.bytes_read == len("p1,25.5\np2,\n")
+
+def test_dataframe_csv_stream_counts_bytes_not_characters():
+    stream = load.DataFrameCsvStream(pd.DataFrame({"name": ["Müller", "Zoë"]}))
+    text = stream.read()
+    assert stream.bytes_read == len(text.encode()) == len(text) + 2
+
+def test_copy_upsert_dataframe_copies_into_staging_and_merges():
+    df = pd.DataFrame([{"patient_barcode": "p1", "gender": "male"}])
+    cur = FakeCursor()
+    conn = FakeConn(cur)
+
+    load.copy_upsert_dataframe(df, "stg_esophageal", ["patient_barcode"], conn_factory=lambda: conn)
+
+    kinds = [c[0] for c in cur.calls]
+    assert kinds == ["execute", "copy", "execute"]
+    assert "CREATE TEMP TABLE _copy_stg_esophageal (LIKE stg_esophageal" in cur.calls[0][1]
+    assert cur.calls[1][1].startswith("COPY _copy_stg_esophageal (patient_barcode, gender) FROM STDIN")
+    assert cur.calls[1][2] == "p1,male\n"
+    assert "SELECT patient_barcode, gender FROM _copy_stg_esophageal" in cur.calls[2][1]
+    assert "gender = EXCLUDED.gender" in cur.calls[2][1]
+    assert conn.committed is True
+
+def test_upsert_dataframe_sends_nulls_as_none():
+    df = pd.DataFrame({"patient_barcode": ["p1", "p2"], "bmi": [25.5, None], "gender": pd.Categorical(["male", None])})
+    seen = {}
+    def fake_execute_values_fn(cursor, sql, records, template):
+        seen["records"] = records
+
+    load.upsert_dataframe(df, "t", ["patient_barcode"], conn_factory=lambda: FakeConn(FakeCursor()), execute_values_fn=fake_execute_values_fn)
+    assert seen["records"] == [["p1", 25.5, "male"], ["p2", None, None]]
+
+def test_upsert_dataframe_records_bytes_sent_per_page():
+    df = pd.DataFrame({"patient_barcode": [f"p{i}" for i in range(250)]})
+    cur = FakeCursor()
+    pages = []
+    def fake_execute_values_fn(cursor, sql, records, template):
+        pages.append(len(records))
+        cursor.query = b"x" * len(records)
+
+    metrics.reset()
+    load.upsert_dataframe(df, "t", ["patient_barcode"], conn_factory=lambda: FakeConn(cur), execute_values_fn=fake_execute_values_fn)
+    assert pages == [100, 100, 50]
+    [batch, total] = metrics.records()
+    assert (batch["stage"], total["stage"]) == ("load.t.batch", "load.t")
+    assert batch["bytes_sent"] == 250
+
+def test_upsert_dataframe_commits_per_batch_and_bisects_failed_rows():
+    df = pd.DataFrame({"patient_barcode": [f"p{i}" for i in range(10)], "bmi": [25.0] * 10})
+    df.loc[[3, 8], "bmi"] = 5000.0
+    conn = FakeConn(FakeCursor())
+    commits = []
+    conn.commit = lambda: commits.append(pending.pop())
+    pending = []
+    def fake_execute_values_fn(cursor, sql, records, template):
+        if any(bmi > 999.99 for _, bmi in records):
+            raise psycopg2.DataError("numeric field overflow\nDETAIL: A field with precision 5, scale 2 must round to an absolute value less than 10^3.")
+        pending.append([barcode for barcode, _ in records])
+
+    failed = load.upsert_dataframe(df, "t", ["patient_barcode"], conn_factory=lambda: conn, execute_values_fn=fake_execute_values_fn, batch_size=4)
+
+    assert sorted(sum(commits, [])) == sorted(f"p{i}" for i in range(10) if i not in (3, 8))
+    assert max(len(c) for c in commits) <= 4
+    assert failed["patient_barcode"].tolist() == ["p3", "p8"]
+    assert failed["reason"].tolist() == ["Load error: numeric field overflow"] * 2
+
+def test_delete_keys_sends_one_array_per_key_column():
+    class RecordingCursor(FakeCursor):
+        rowcount = 2
+        def execute(self, sql, params=None): self.calls.append((sql, params))
+    cur = RecordingCursor()
+    conn = FakeConn(cur)
+    df = pd.DataFrame({"patient_barcode": ["p1", None, "p2", "p1"], "gender": ["male"] * 4})
+
+    assert load.delete_keys(df, "t", ["patient_barcode"], conn_factory=lambda: conn) == 2
+    assert cur.calls == [("DELETE FROM t WHERE patient_barcode = ANY(%s);", [["p1", "p2"]])]
+    assert conn.committed is True
+    assert "IN (SELECT * FROM unnest(%s, %s))" in load.build_delete_keys_sql("t", ["a", "b"])
@@ -0,0 +1,39 @@
+import pandas as pd
+from src import manifest
+
+def test_file_fingerprint_reuses_hash_when_size_and_mtime_match(tmp_path):
+    path = tmp_path / "f.csv"
+    path.write_text("a\n1\n")
+    first = manifest.file_fingerprint(str(path))
+
+    stale = dict(first, sha256="cached")
+    assert manifest.file_fingerprint(str(path), stale)["sha256"] == "cached"
+
+    path.write_text("a\n2\n3\n")
+    assert manifest.file_fingerprint(str(path), stale)["sha256"] not in ("cached", first["sha256"])
+
+def test_changed_rows_flags_new_modified_and_keyless_rows():
+    before = pd.DataFrame({"id": ["a", "b"], "v": [1.0, 2.0]})
+    _, previous = manifest.changed_rows(before, ["id"], {})
+
+    after = pd.DataFrame({"id": ["a", "b", "c", None], "v": [1, 5, 3, 4]})
+    changed, current = manifest.changed_rows(after, ["id"], previous)
+
+    # "a" is unchanged even though v was parsed as int this time.
+    assert changed.tolist() == [False, True, True, True]
+    assert set(current) == {"a", "b", "c"}
+
+def test_save_and_load_manifest_round_trip(tmp_path):
+    path = tmp_path / "state" / "manifest.json"
+    state = {"sources": {"s": {"fingerprint": {"size": 1}, "rows": {"a": "00"}}}}
+    manifest.save_manifest(state, path)
+    assert manifest.load_manifest(path) == state
+    assert manifest.load_manifest(tmp_path / "missing.json") == {"sources": {}}
+
+def test_rules_version_changes_with_the_rules(monkeypatch):
+    from src.rules import RULE_SETS
+    version = manifest.rules_version(RULE_SETS["esophageal"], "last")
+    assert manifest.rules_version(RULE_SETS["esophageal"], "last") == version
+    assert manifest.rules_version(RULE_SETS["esophageal"], "first") != version
+    monkeypatch.setattr(manifest.rules, "COLUMN_NULL_THRESHOLD", 50.0)
+    assert manifest.rules_version(RULE_SETS["esophageal"], "last") != version
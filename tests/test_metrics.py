@@ -0,0 +1,41 @@
+import json
+import pandas as pd
+from src import metrics
+
+def test_stage_records_timing_and_throughput():
+    metrics.reset()
+    with metrics.stage("extract") as record:
+        record["rows"] = 10
+    [record] = metrics.records()
+    assert record["stage"] == "extract"
+    assert record["rows"] == 10
+    assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+    assert record["peak_rss_bytes"] > 0
+
+def test_timed_uses_frame_length_as_rows():
+    metrics.reset()
+    @metrics.timed("step")
+    def step(df):
+        return df
+    step(pd.DataFrame({"a": [1, 2, 3]}))
+    assert metrics.records()[0]["rows"] == 3
+
+def test_write_report_sums_bytes_sent(tmp_path):
+    metrics.reset()
+    with metrics.stage("load.t") as record:
+        record["bytes_sent"] = 100
+    with metrics.stage("load.u") as record:
+        record["bytes_sent"] = 20
+    path = metrics.write_report(metrics.build_report({"esophageal": {"rows_loaded": 1}}), tmp_path)
+    report = json.loads(path.read_text())
+    assert report["bytes_sent_total"] == 120
+    assert [s["stage"] for s in report["stages"]] == ["load.t", "load.u"]
+
+def test_profiling_tracemalloc_adds_top_sites(tmp_path, monkeypatch):
+    monkeypatch.setenv(metrics.PROFILE_ENV, "tracemalloc")
+    report = {}
+    with metrics.profiling(report, tmp_path):
+        kept = [str(i) for i in range(1000)]
+    assert report["tracemalloc"]["peak_bytes"] > 0
+    assert report["tracemalloc"]["top"]
+    assert len(kept) == 1000
@@ -0,0 +1,273 @@
+import json
+import threading
+import time
+import pandas as pd
+import pytest
+from src import pipeline, sources
+from tests.test_validate import base_row
+
+def make_source(tmp_path, name, rows):
+    path = tmp_path / f"{name}.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return {
+        "name": name,
+        "path": str(path),
+        "reader": "csv",
+        "rules": "esophageal",
+        "table": f"stg_{name}",
+        "rejects_table": f"stg_{name}_rejects",
+        "pk": ["patient_barcode"],
+        "cleaned_output": str(tmp_path / f"{name}_cleaned.csv"),
+        "rejected_output": None,
+        "rejects_log": None,
+        "output_partition_by": None,
+        "pk_policy": "last",
+    }
+
+def test_load_sources_skips_disabled_and_rejects_unknown_rules(tmp_path):
+    config = tmp_path / "sources.yaml"
+    config.write_text(
+        "sources:\n"
+        "  a: {path: a.csv, reader: csv, rules: esophageal, table: t, rejects_table: r, pk: [id]}\n"
+        "  b: {path: b.csv, reader: csv, rules: esophageal, table: t, rejects_table: r, pk: [id], enabled: false}\n"
+    )
+    loaded = sources.load_sources(config)
+    assert list(loaded) == ["a"]
+    assert loaded["a"]["cleaned_output"] is None
+
+    config.write_text("sources:\n  c: {path: c.csv, reader: csv, rules: nope, table: t, rejects_table: r, pk: [id]}\n")
+    with pytest.raises(ValueError, match="unknown rule set"):
+        sources.load_sources(config)
+
+def test_run_parallel_transforms_and_loads_every_source(tmp_path, monkeypatch):
+    first = make_source(tmp_path, "first", [base_row(patient_barcode="a1"), base_row(patient_barcode="a2", gender=None)])
+    second = make_source(tmp_path, "second", [base_row(patient_barcode="b1")])
+
+    loaded = []
+    lock = threading.Lock()
+    def fake_loader(df, table_name, pk_columns):
+        with lock:
+            loaded.append((table_name, sorted(df["patient_barcode"])))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+
+    summary = pipeline.run_parallel([first, second], loader="fake", max_workers=2, max_connections=2)
+
+    assert summary == {
+        "first": {"rows_loaded": 1, "rows_rejected": 1},
+        "second": {"rows_loaded": 1, "rows_rejected": 0},
+    }
+    assert sorted(loaded) == [
+        ("stg_first", ["a1"]),
+        ("stg_first_rejects", ["a2"]),
+        ("stg_second", ["b1"]),
+        ("stg_second_rejects", []),
+    ]
+    assert pd.read_csv(first["cleaned_output"])["patient_barcode"].tolist() == ["a1"]
+
+def test_run_source_incremental_skips_unchanged_files_and_rows(tmp_path, monkeypatch):
+    rows = [base_row(patient_barcode="p1"), base_row(patient_barcode="p2")]
+    source = make_source(tmp_path, "inc", rows)
+
+    loaded = []
+    def fake_loader(df, table_name, pk_columns):
+        loaded.append((table_name, sorted(df["patient_barcode"])))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+    monkeypatch.setattr(pipeline, "delete_keys", lambda df, table_name, pk_columns: 0)
+    state = {"sources": {}}
+
+    first = pipeline.run_source(source, loader="fake", manifest_state=state)
+    assert first == {"rows_loaded": 2, "rows_rejected": 0}
+    assert set(state["sources"]["inc"]["rows"]) == {"p1", "p2"}
+
+    loaded.clear()
+    assert pipeline.run_source(source, loader="fake", manifest_state=state)["skipped"] is True
+    assert loaded == []
+
+    rows[1]["weight"] = 90
+    rows.append(base_row(patient_barcode="p3", gender=None))
+    pd.DataFrame(rows).to_csv(source["path"], index=False)
+
+    third = pipeline.run_source(source, loader="fake", manifest_state=state)
+    assert third == {"rows_loaded": 1, "rows_rejected": 1}
+    assert loaded == [("stg_inc", ["p2"]), ("stg_inc_rejects", ["p3"])]
+    assert set(state["sources"]["inc"]["rows"]) == {"p1", "p2", "p3"}
+
+def test_run_source_incremental_revalidates_after_a_rule_change(tmp_path, monkeypatch):
+    source = make_source(tmp_path, "rules", [base_row(patient_barcode="p1"), base_row(patient_barcode="p2", height=190)])
+
+    loaded = []
+    def fake_loader(df, table_name, pk_columns):
+        loaded.append((table_name, sorted(df["patient_barcode"])))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+    monkeypatch.setattr(pipeline, "delete_keys", lambda df, table_name, pk_columns: 0)
+    state = {"sources": {}}
+    pipeline.run_source(source, loader="fake", manifest_state=state)
+    assert pipeline.run_source(source, loader="fake", manifest_state=state)["skipped"] is True
+
+    # Same file, tighter height range: p2 is now rejected.
+    monkeypatch.setitem(pipeline.manifest.rules.RANGE_RULES, "height", (0, 185))
+    monkeypatch.setattr(pipeline.validate, "RULES", pipeline.validate.rule_engine.compile_rules())
+    loaded.clear()
+    assert pipeline.run_source(source, loader="fake", manifest_state=state) == {"rows_loaded": 1, "rows_rejected": 1}
+    assert loaded == [("stg_rules", ["p1"]), ("stg_rules_rejects", ["p2"])]
+
+def test_run_source_incremental_moves_rows_that_changed_validity(tmp_path, monkeypatch):
+    rows = [base_row(patient_barcode="p1"), base_row(patient_barcode="p2", gender=None)]
+    source = make_source(tmp_path, "moves", rows)
+
+    tables = {source["table"]: {}, source["rejects_table"]: {}}
+    def fake_loader(df, table_name, pk_columns):
+        tables[table_name].update(dict.fromkeys(df["patient_barcode"]))
+        return df.iloc[:0]
+    def fake_delete_keys(df, table_name, pk_columns):
+        for key in df["patient_barcode"]:
+            tables[table_name].pop(key, None)
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+    monkeypatch.setattr(pipeline, "delete_keys", fake_delete_keys)
+    state = {"sources": {}}
+
+    pipeline.run_source(source, loader="fake", manifest_state=state)
+    assert (list(tables["stg_moves"]), list(tables["stg_moves_rejects"])) == (["p1"], ["p2"])
+
+    # p1 valid -> rejected, p2 rejected -> valid.
+    rows[0]["gender"], rows[1]["gender"] = None, "male"
+    pd.DataFrame(rows).to_csv(source["path"], index=False)
+    assert pipeline.run_source(source, loader="fake", manifest_state=state) == {"rows_loaded": 1, "rows_rejected": 1}
+    assert (list(tables["stg_moves"]), list(tables["stg_moves_rejects"])) == (["p2"], ["p1"])
+
+@pytest.mark.parametrize("policy", ["last", "first", "most_complete"])
+def test_streaming_resolves_keys_spanning_chunks_like_a_full_run(tmp_path, monkeypatch, policy):
+    # p1 is valid in the first chunk and rejected (no gender) in the second, less
+    # complete; p2 the other way round.
+    rows = [
+        base_row(patient_barcode="p1"), base_row(patient_barcode="p2", gender=None),
+        base_row(patient_barcode="p1", gender=None, weight=81), base_row(patient_barcode="p2"),
+        base_row(patient_barcode="p3"),
+    ]
+    source = dict(make_source(tmp_path, "spans", rows), cleaned_output=None, pk_policy=policy)
+
+    tables = {}
+    def fake_loader(df, table_name, pk_columns):
+        tables.setdefault(table_name, {}).update(dict.fromkeys(df["patient_barcode"]))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+
+    full = pipeline.run_source(source, loader="fake")
+    expected, tables = tables, {}
+    for run in (pipeline.run_streaming, pipeline.run_pipelined):
+        assert run(source, 2, loader="fake") == full
+        assert tables == expected
+        tables = {}
+    assert sum(len(keys) for keys in expected.values()) == 3
+
+def test_load_tables_routes_refused_rows_to_rejects(monkeypatch):
+    source = {"name": "s", "table": "t", "rejects_table": "r", "pk": ["patient_barcode"]}
+    cleaned = pd.DataFrame({"patient_barcode": ["a", "b"], "bmi": [20.0, 5000.0]})
+    rejects = pd.DataFrame({"patient_barcode": ["c"], "bmi": [9000.0], "reason": ["Invalid height value"]})
+
+    loaded = []
+    def fake_loader(df, table_name, pk_columns):
+        # Refuses bmi values overflowing NUMERIC(5,2), like both staging tables.
+        refused = df["bmi"] > 999.99 if "bmi" in df.columns else pd.Series(False, index=df.index)
+        loaded.extend((table_name, barcode) for barcode in df.loc[~refused, "patient_barcode"])
+        return df[refused].assign(reason="Load error: numeric field overflow")
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+
+    assert pipeline.load_tables(cleaned, rejects, source, "fake") == (1, 2)
+    assert loaded == [("t", "a"), ("r", "c"), ("r", "b")]
+
+def test_load_tables_counts_keyless_rejects_without_sending_them(monkeypatch):
+    source = {"name": "s", "table": "t", "rejects_table": "r", "pk": ["patient_barcode"]}
+    cleaned = pd.DataFrame({"patient_barcode": ["a"], "bmi": [20.0]})
+    rejects = pd.DataFrame({"patient_barcode": [None, "c", None], "bmi": [1.0, 2.0, 3.0], "reason": ["Missing fields: patient_barcode"] * 3})
+
+    sent = []
+    def fake_loader(df, table_name, pk_columns):
+        sent.append((table_name, df["patient_barcode"].tolist()))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", fake_loader)
+
+    assert pipeline.load_tables(cleaned, rejects, source, "fake") == (1, 1)
+    assert sent == [("t", ["a"]), ("r", ["c"])]
+
+def test_run_pipelined_matches_streaming_and_bounds_queued_chunks(tmp_path, monkeypatch):
+    rows = [base_row(patient_barcode=f"p{i}", gender=None if i % 4 == 0 else "male") for i in range(12)]
+    source = make_source(tmp_path, "chunked", rows)
+
+    transformed = []
+    original_validate = pipeline.validate.validate
+    def counting_validate(df, **kwargs):
+        transformed.append(len(df))
+        return original_validate(df, **kwargs)
+    monkeypatch.setattr(pipeline.validate, "validate", counting_validate)
+
+    loaded = []
+    ahead = []
+    def slow_loader(df, table_name, pk_columns):
+        if table_name == "stg_chunked":
+            ahead.append(len(transformed) - len(loaded) // 2)
+        time.sleep(0.01)
+        loaded.append((table_name, sorted(df["patient_barcode"])))
+        return df.iloc[:0]
+    monkeypatch.setitem(pipeline.LOADERS, "fake", slow_loader)
+
+    streamed = pipeline.run_streaming(source, 2, loader="fake")
+    streamed_loads = list(loaded)
+    transformed.clear(); loaded.clear(); ahead.clear()
+
+    assert pipeline.run_pipelined(source, 2, loader="fake", queue_size=1) == streamed == {"rows_loaded": 9, "rows_rejected": 3}
+    assert loaded == streamed_loads
+    # Being loaded, queued, and being transformed.
+    assert max(ahead) <= 3
+
+def test_run_pipelined_propagates_load_errors(tmp_path, monkeypatch):
+    source = make_source(tmp_path, "failing", [base_row(patient_barcode=f"p{i}") for i in range(6)])
+    def failing_loader(df, table_name, pk_columns):
+        raise RuntimeError("connection lost")
+    monkeypatch.setitem(pipeline.LOADERS, "fake", failing_loader)
+    with pytest.raises(RuntimeError, match="connection lost"):
+        pipeline.run_pipelined(source, 2, loader="fake")
+
+def test_run_pipelined_closes_outputs_when_loading_fails(tmp_path, monkeypatch):
+    source = make_source(tmp_path, "closing", [base_row(patient_barcode=f"p{i}") for i in range(6)])
+    closed = []
+    original = pipeline.transform_chunks
+    def tracking_chunks(*args):
+        try:
+            yield from original(*args)
+        finally:
+            closed.append(True)
+    def failing_loader(df, table_name, pk_columns):
+        raise RuntimeError("connection lost")
+    monkeypatch.setattr(pipeline, "transform_chunks", tracking_chunks)
+    monkeypatch.setitem(pipeline.LOADERS, "fake", failing_loader)
+
+    # The traceback keeps the run's frames alive: only an explicit close ends the generator.
+    with pytest.raises(RuntimeError, match="connection lost"):
+        pipeline.run_pipelined(source, 2, loader="fake")
+    assert closed == [True]
+
+def test_transform_source_keeps_one_row_per_primary_key(tmp_path):
+    rows = [base_row(patient_barcode="p1", height=170), base_row(patient_barcode="p1", height=180), base_row(patient_barcode="p2")]
+    source = make_source(tmp_path, "dups", rows)
+    cleaned, rejects, _ = pipeline.transform_source(source)
+    assert sorted(cleaned["patient_barcode"]) == ["p1", "p2"]
+    assert cleaned.loc[cleaned["patient_barcode"] == "p1", "height"].tolist() == [180]
+
+    source["pk_policy"] = "first"
+    cleaned, _, _ = pipeline.transform_source(source)
+    assert cleaned.loc[cleaned["patient_barcode"] == "p1", "height"].tolist() == [170]
+
+def test_transform_chunks_streams_one_rejects_log(tmp_path):
+    rows = [base_row(patient_barcode=f"p{i}", gender=None if i % 3 == 0 else "male") for i in range(10)]
+    source = dict(make_source(tmp_path, "chunked", rows), cleaned_output=None, rejects_log=str(tmp_path / "rejects.ndjson"))
+
+    rejected = sum(len(rejects) for _, rejects in pipeline.transform_chunks(source, 3))
+    logged = [json.loads(line) for line in (tmp_path / "rejects.ndjson").read_text().splitlines()]
+    assert [r["patient_barcode"] for r in logged] == ["p0", "p3", "p6", "p9"]
+    summary = json.loads((tmp_path / "rejects.summary.json").read_text())
+    assert summary["rejected_rows"] == rejected == 4
+    assert summary["reasons"] == {"Missing fields: gender": 4}
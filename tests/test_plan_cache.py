@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+from benchmarks.fakes import db_available
+from src import load, plan_cache, validate
+from src.repo import get_conn
+
+class FakeCursor:
+    """Answers the pg_prepared_statements lookup from what it has PREPAREd."""
+    def __init__(self, conn):
+        self.connection = conn
+        self.statements = []
+        self.result = None
+    def execute(self, sql, params=None):
+        if sql.startswith("SELECT 1 FROM pg_prepared_statements"):
+            self.result = (1,) if params[0] in self.connection.prepared else None
+            return
+        if sql.startswith("PREPARE "):
+            self.connection.prepared.add(sql.split()[1])
+        self.statements.append(sql)
+    def fetchone(self): return self.result
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+class FakeConn:
+    def __init__(self, pid=1):
+        self.pid = pid
+        self.prepared = set()
+        self.commits = 0
+    def get_backend_pid(self): return self.pid
+    def cursor(self): return FakeCursor(self)
+    def commit(self): self.commits += 1
+    def rollback(self): pass
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    plan_cache.reset()
+    yield
+    plan_cache.reset()
+
+def test_cached_builder_counts_hits_and_misses():
+    first = load.build_upsert_sql("t", ["patient_barcode", "gender"], ["patient_barcode"])
+    again = load.build_upsert_sql("t", ["patient_barcode", "gender"], ["patient_barcode"])
+    other = load.build_upsert_sql("t", ["patient_barcode", "age"], ["patient_barcode"])
+    assert again is first and other != first
+    assert plan_cache.stats()["load.upsert_sql"] == {"hits": 1, "misses": 2, "size": 2}
+
+def test_rules_for_compiles_each_required_column_list_once():
+    assert validate.rules_for(validate.RULES.required) is validate.RULES
+    rules = validate.rules_for(["gender"])
+    assert validate.rules_for(["gender"]) is rules and rules.required == ["gender"]
+
+def test_ensure_prepared_prepares_once_per_backend():
+    conn = FakeConn()
+    cur = conn.cursor()
+    for _ in range(3):
+        plan_cache.ensure_prepared(cur, "etl_x", "SELECT $1")
+    assert cur.statements == ["PREPARE etl_x AS SELECT $1"]
+
+    # A new backend behind the same connection object prepares it again ...
+    conn.pid, conn.prepared = 2, set()
+    plan_cache.ensure_prepared(cur, "etl_x", "SELECT $1")
+    assert len(cur.statements) == 2
+    # ... and a session that already holds it after a cache reset does not.
+    plan_cache.reset()
+    plan_cache.ensure_prepared(cur, "etl_x", "SELECT $1")
+    assert len(cur.statements) == 2
+
+def test_prepared_statements_are_forgotten_with_their_connection():
+    conn = FakeConn()
+    plan_cache.ensure_prepared(conn.cursor(), "etl_x", "SELECT $1")
+    assert plan_cache.stats()["load.prepared_statements"]["size"] == 1
+    # As when the pool closes and drops it: a later connection reusing its id() starts afresh.
+    del conn
+    assert plan_cache.stats()["load.prepared_statements"]["size"] == 0
+
+def test_prepared_upsert_dataframe_executes_the_prepared_statement():
+    df = pd.DataFrame([{"patient_barcode": "p1", "gender": "male"}, {"patient_barcode": "p2", "gender": None}])
+    conn = FakeConn()
+    calls = []
+    def fake_execute_batch(cur, sql, records, page_size):
+        calls.append((sql, records))
+
+    for _ in range(2):
+        failed = load.prepared_upsert_dataframe(df, "t", ["patient_barcode"], conn_factory=lambda: conn, execute_batch_fn=fake_execute_batch)
+    assert failed.empty
+    name, statement, execute_sql = load.build_prepared_upsert_sql("t", ["patient_barcode", "gender"], ["patient_barcode"])
+    assert conn.prepared == {name}
+    assert "VALUES ($1, $2)" in statement and "ON CONFLICT (patient_barcode)" in statement
+    assert calls == [(execute_sql, [["p1", "male"], ["p2", None]])] * 2
+    assert conn.commits == 2
+
+@pytest.mark.skipif(not db_available(), reason="needs a Postgres database (PGHOST/PGUSER/...)")
+def test_prepared_upsert_dataframe_against_postgres():
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE plan_cache_test (patient_barcode TEXT PRIMARY KEY, height FLOAT)")
+        df = pd.DataFrame({"patient_barcode": ["p1", "p2"], "height": [170.0, None]})
+        load.prepared_upsert_dataframe(df, "plan_cache_test", ["patient_barcode"], conn_factory=lambda: conn)
+        load.prepared_upsert_dataframe(df.assign(height=[180.0, 160.0]), "plan_cache_test", ["patient_barcode"], conn_factory=lambda: conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT patient_barcode, height FROM plan_cache_test ORDER BY 1")
+            assert cur.fetchall() == [("p1", 180.0), ("p2", 160.0)]
+        assert plan_cache.stats()["load.prepared_statements"]["misses"] == 1
+    finally:
+        conn.close()
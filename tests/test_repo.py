@@ -0,0 +1,92 @@
+import threading
+import pytest
+from psycopg2 import extensions
+from src import repo
+from src.pipeline import DEFAULT_MAX_CONNECTIONS
+
+class FakeConn:
+    def __init__(self, status=extensions.TRANSACTION_STATUS_IDLE):
+        self.closed = 0
+        self.status = status
+    def get_transaction_status(self): return self.status
+
+class FakePool:
+    def __init__(self, conns):
+        self.free = list(conns)
+        self.returned = []
+    def getconn(self): return self.free.pop(0)
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+def use_pool(monkeypatch, fake_pool):
+    monkeypatch.setattr(repo, "get_pool", lambda: fake_pool)
+    monkeypatch.setattr(repo, "_pool_slots", threading.BoundedSemaphore(2))
+
+def test_pooled_conn_returns_connection_to_pool(monkeypatch):
+    conn = FakeConn()
+    fake_pool = FakePool([conn])
+    use_pool(monkeypatch, fake_pool)
+
+    with repo.pooled_conn() as checked_out:
+        assert checked_out is conn
+    assert fake_pool.returned == [(conn, False)]
+
+def test_pooled_conn_returns_connection_on_error(monkeypatch):
+    conn = FakeConn()
+    fake_pool = FakePool([conn])
+    use_pool(monkeypatch, fake_pool)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        with repo.pooled_conn():
+            raise RuntimeError("boom")
+    assert fake_pool.returned == [(conn, False)]
+    assert repo._pool_slots.acquire(blocking=False)
+
+def test_pooled_conn_replaces_broken_connection(monkeypatch):
+    broken = FakeConn(status=extensions.TRANSACTION_STATUS_UNKNOWN)
+    healthy = FakeConn()
+    fake_pool = FakePool([broken, healthy])
+    use_pool(monkeypatch, fake_pool)
+
+    with repo.pooled_conn() as checked_out:
+        assert checked_out is healthy
+    assert fake_pool.returned == [(broken, True), (healthy, False)]
+
+class PoolConn(FakeConn):
+    """What ThreadedConnectionPool itself inspects of a returned connection."""
+    def __init__(self):
+        super().__init__()
+        self.info = self
+    @property
+    def transaction_status(self): return self.status
+    def close(self): self.closed = 1
+
+def test_pool_reuses_connections_under_concurrent_loads(monkeypatch):
+    opened = []
+    def fake_connect(*args, **kwargs):
+        opened.append(PoolConn())
+        return opened[-1]
+    monkeypatch.setattr(repo.psycopg2, "connect", fake_connect)
+    repo.close_pool()
+
+    workers = DEFAULT_MAX_CONNECTIONS
+    start = threading.Barrier(workers)
+    checked_out = []
+    def load():
+        for _ in range(5):
+            start.wait()
+            with repo.pooled_conn() as conn:
+                checked_out.append(conn)
+                start.wait()  # Every worker holds a connection at once.
+    threads = [threading.Thread(target=load) for _ in range(workers)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        repo.close_pool()
+
+    assert len(checked_out) == workers * 5
+    assert len(opened) == workers
+    assert {id(conn) for conn in checked_out} == {id(conn) for conn in opened}
@@ -0,0 +1,37 @@
+import pandas as pd
+from src import rule_engine
+from src.rules import DERIVED_CATEGORIES
+
+def test_evaluate_uses_declared_ranges_and_enums():
+    rules = rule_engine.compile_rules(
+        required=["patient_barcode"],
+        ranges={"height": (100, 200)},
+        enums={"gender": {"male", "female"}},
+        categories={},
+    )
+    df = pd.DataFrame({
+        "patient_barcode": ["p1", None, "p3", "p4"],
+        "height": [150, 150, 250, 150],
+        "gender": ["male", "female", "male", "unknown"],
+    })
+    invalid_mask, reasons = rules.evaluate(df)
+    assert invalid_mask.tolist() == [False, True, True, True]
+    assert reasons.tolist() == ["Missing fields: patient_barcode", "Invalid height value", "Invalid gender value"]
+    assert list(reasons.index) == [1, 2, 3]
+
+def test_evaluate_skips_frames_without_required_columns():
+    rules = rule_engine.compile_rules(required=["patient_barcode"])
+    invalid_mask, reasons = rules.evaluate(pd.DataFrame({"height": [-5]}))
+    assert not invalid_mask.any()
+    assert reasons.empty
+
+def test_categorize_respects_bin_closure():
+    rules = rule_engine.compile_rules(categories=DERIVED_CATEGORIES)
+    bmi = pd.DataFrame({"bmi": [17.99, 18.0, 25.0, 30.0, None]})
+    assert rules.categorize(bmi, "bmi_category").tolist()[:4] == ["Underweight", "Normal", "Overweight", "Obese"]
+    assert pd.isna(rules.categorize(bmi, "bmi_category").iloc[4])
+
+    drinks = pd.DataFrame({"total_drinks_per_week": [0, 7, 7.5, 35, 36, -1]})
+    labels = rules.categorize(drinks, "alcohol_risk_category").tolist()
+    assert labels[:5] == ["None", "Light", "Moderate", "Heavy", "Very Heavy"]
+    assert pd.isna(labels[5])
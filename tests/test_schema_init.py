@@ -0,0 +1,78 @@
+import pytest
+from src import schema_init
+
+class FakeCursor:
+    """Tracks schema_version rows in memory and records every other statement."""
+    def __init__(self, recorded=None):
+        self.recorded = recorded
+        self.statements = []
+        self.result = None
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def execute(self, sql, params=None):
+        if sql.startswith("SELECT pg_advisory_xact_lock"):
+            return
+        if sql.startswith("SELECT to_regclass"):
+            self.result = [(self.recorded is not None,)]
+        elif sql.startswith("SELECT version, checksum"):
+            self.result = list(self.recorded.items())
+        elif sql.startswith("INSERT INTO schema_version"):
+            self.recorded[params[0]] = params[2]
+        else:
+            if sql.startswith("CREATE TABLE schema_version"):
+                self.recorded = {}
+            self.statements.append(sql)
+    def fetchone(self): return self.result[0]
+    def fetchall(self): return self.result
+
+class FakeConn:
+    def __init__(self, cur):
+        self.cur = cur
+        self.commits = 0
+    def cursor(self): return self.cur
+    def commit(self): self.commits += 1
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+def write_migrations(tmp_path, **files):
+    for name, sql in files.items():
+        (tmp_path / f"{name}.sql").write_text(sql)
+    return tmp_path
+
+def test_run_schema_applies_pending_migrations_once(tmp_path):
+    migrations_dir = write_migrations(tmp_path, **{"0002_indexes": "CREATE INDEX i;", "0001_tables": "CREATE TABLE t;"})
+    cur = FakeCursor()
+    conn = FakeConn(cur)
+
+    applied = schema_init.run_schema(reset=False, migrations_dir=migrations_dir, conn_factory=lambda: conn)
+    assert applied == [1, 2]
+    assert cur.statements[1:] == ["CREATE TABLE t;", "CREATE INDEX i;"]
+
+    # Nothing changed: no DDL at all on the next run.
+    cur.statements.clear()
+    assert schema_init.run_schema(reset=False, migrations_dir=migrations_dir, conn_factory=lambda: conn) == []
+    assert cur.statements == []
+
+    write_migrations(tmp_path, **{"0003_more": "CREATE INDEX j;"})
+    assert schema_init.run_schema(reset=False, migrations_dir=migrations_dir, conn_factory=lambda: conn) == [3]
+    assert cur.statements == ["CREATE INDEX j;"]
+
+def test_run_schema_refuses_edited_migrations(tmp_path):
+    migrations_dir = write_migrations(tmp_path, **{"0001_tables": "CREATE TABLE t;"})
+    cur = FakeCursor()
+    schema_init.run_schema(reset=False, migrations_dir=migrations_dir, conn_factory=lambda: FakeConn(cur))
+
+    write_migrations(tmp_path, **{"0001_tables": "CREATE TABLE t (id INT);"})
+    with pytest.raises(RuntimeError, match="0001_tables.sql changed"):
+        schema_init.run_schema(reset=False, migrations_dir=migrations_dir, conn_factory=lambda: FakeConn(cur))
+
+def test_run_schema_reset_truncates_instead_of_dropping(tmp_path):
+    cur = FakeCursor(recorded={})
+    schema_init.run_schema(reset=True, migrations_dir=tmp_path, conn_factory=lambda: FakeConn(cur))
+    assert len(cur.statements) == 1
+    assert "TRUNCATE TABLE stg_esophageal, stg_rejects" in cur.statements[0]
+    assert "DROP" not in cur.statements[0]
+
+def test_shipped_migrations_are_numbered_in_order():
+    versions = [version for version, *_ in schema_init.migrations()]
+    assert versions == list(range(1, len(versions) + 1))
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from benchmarks import synthetic
+from src import clean, manifest, pipeline, sharded, validate
+from tests.test_pipeline import make_source
+
+def raw_frame(null_ratio=0.8):
+    raw = synthetic.make_raw_frame(3_000, reject_ratio=0.3, duplicate_ratio=0.05, null_ratio=null_ratio, extra_columns=3, seed=3)
+    raw.loc[5, "patient_barcode"] = " " + raw.loc[4, "patient_barcode"].upper()  # Same key once normalized
+    raw.loc[[9, 10], "patient_barcode"] = None
+    return raw
+
+def test_shard_ids_group_rows_by_normalized_key():
+    df = pd.DataFrame({"Patient_Barcode ": ["a", " A", "b", None, None], "x": range(5)})
+    ids = sharded.shard_ids(df, ["patient_barcode"], 4)
+    assert ids[0] == ids[1] and ids[3] == ids[4]
+    assert sharded.shard_ids(df, ["missing"], 4) is None
+
+@pytest.mark.parametrize("policy", clean.PK_POLICIES)
+@pytest.mark.parametrize("shards", [1, 3])
+def test_clean_validate_matches_single_process(policy, shards):
+    raw = raw_frame()
+    cleaned_raw = clean.resolve_pk_conflicts(clean.clean(raw), ["patient_barcode"], policy)
+    _, expected_rows = manifest.changed_rows(cleaned_raw, ["patient_barcode"], {})
+    expected_valid, expected_rejects = validate.validate(cleaned_raw, write_rejects_path=None)
+
+    valid, rejects, rows = sharded.clean_validate(raw, ["patient_barcode"], policy, shards=shards)
+    # Columns over the null threshold are dropped across all shards.
+    assert not any(c.startswith("filler_") or c == synthetic.NULL_COLUMN for c in valid.columns)
+    pd.testing.assert_frame_equal(valid, expected_valid)
+    pd.testing.assert_frame_equal(rejects, expected_rejects)
+    assert rows == expected_rows
+
+def test_transform_source_shards_large_files(tmp_path, monkeypatch):
+    path = tmp_path / "raw.csv"
+    # Below the null threshold: the target tables need every source column.
+    raw_frame(null_ratio=0.3).to_csv(path, index=False)
+    source = dict(make_source(tmp_path, "sharded", []), path=str(path), cleaned_output=None)
+
+    expected = pipeline.transform_source(source)
+    monkeypatch.setattr(sharded, "SHARDS", 2)
+    monkeypatch.setattr(sharded, "MIN_ROWS_PER_SHARD", 1_000)
+    calls = []
+    original = sharded.clean_validate
+    monkeypatch.setattr(sharded, "clean_validate", lambda *a, **k: calls.append(k["shards"]) or original(*a, **k))
+    result = pipeline.transform_source(source)
+
+    assert calls == [2]
+    for frame, expected_frame in zip(result[:2], expected[:2]):
+        pd.testing.assert_frame_equal(frame, expected_frame)
+    assert result[2] == expected[2]
+
+def test_concat_merges_shards_that_disagree_on_categoricals(tmp_path):
+    a = pd.DataFrame({"x": pd.Categorical(["b", "a"]), "n": [1.0, 2.0]}, index=[2, 0])
+    b = pd.DataFrame({"x": pd.array(["c"], dtype="str"), "n": [3.0]}, index=[1])
+    paths = [sharded._write(a, tmp_path / "a.arrow"), sharded._write(b, tmp_path / "b.arrow")]
+    merged = sharded._concat(paths)
+    assert merged.index.tolist() == [0, 1, 2]
+    assert merged["x"].tolist() == ["a", "c", "b"]
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,72 @@
+import json
+import pandas as pd
+import pytest
+from src import sinks
+
+def test_parquet_sink_appends_chunks_under_the_first_schema(tmp_path):
+    path = tmp_path / "out.parquet"
+    with sinks.open_sink(path) as sink:
+        sink.write(pd.DataFrame({"id": ["a"], "bmi": [None], "gender": pd.Categorical(["male"])}))
+        sink.write(pd.DataFrame({"id": ["b"], "bmi": ["22.5"], "gender": pd.Categorical(["female"])}))
+    back = pd.read_parquet(path)
+    assert back["id"].tolist() == ["a", "b"]
+    assert back["gender"].astype(str).tolist() == ["male", "female"]
+
+def test_parquet_sink_widens_the_first_schema_for_later_chunks(tmp_path):
+    path = tmp_path / "out.parquet"
+    with sinks.open_sink(path) as sink:
+        # An all-null categorical and integral numbers in the first chunk only.
+        sink.write(pd.DataFrame({"race": pd.Categorical([None, None]), "age": [61, 70]}))
+        sink.write(pd.DataFrame({"race": pd.Categorical(["white", None]), "age": [45.5, None]}))
+        sink.write(pd.DataFrame({"race": pd.Categorical(["asian", "white"]), "age": [30, 31]}))
+    back = pd.read_parquet(path)
+    assert back["race"].astype(object).where(back["race"].notna(), None).tolist() == [None, None, "white", None, "asian", "white"]
+    assert back["age"].tolist()[:3] == [61.0, 70.0, 45.5]
+    assert back["age"].isna().tolist() == [False, False, False, True, False, False]
+
+def test_partitioned_output_writes_one_directory_per_value(tmp_path):
+    df = pd.DataFrame({"id": ["a", "b", "c"], "cancer_status": ["tumor free", "with tumor", "tumor free"]})
+    path = tmp_path / "cleaned.parquet"
+    sinks.write_frame(df, path, partition_by=["cancer_status"])
+    sinks.write_frame(df.iloc[:1], path, partition_by=["cancer_status"])
+
+    assert sorted(p.name for p in path.iterdir()) == ["cancer_status=tumor%20free"]
+    assert pd.read_parquet(path)["id"].tolist() == ["a"]
+
+def test_json_sink_writes_one_array_across_chunks(tmp_path):
+    df = pd.DataFrame({"id": ["a", "b"], "reason": ["x", "y"]})
+    path = tmp_path / "rejects.json"
+    with sinks.open_sink(path) as sink:
+        sink.write(df.iloc[:0])
+        sink.write(df.iloc[:1])
+        sink.write(df.iloc[1:])
+    assert json.loads(path.read_text()) == [{"id": "a", "reason": "x"}, {"id": "b", "reason": "y"}]
+
+def test_check_output_rejects_unknown_formats_and_partitioned_csv():
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        sinks.check_output("out.xlsx")
+    with pytest.raises(ValueError, match="cannot be partitioned"):
+        sinks.check_output("out.csv", ["cancer_status"])
+
+def test_reject_sink_samples_and_caps_rows_but_counts_every_reason(tmp_path):
+    path = tmp_path / "rejects.ndjson"
+    chunk = pd.DataFrame({"id": [f"r{i}" for i in range(100)], "reason": ["Invalid height value"] * 60 + ["Missing fields: gender"] * 40})
+    with sinks.RejectSink(path, sample_rate=0.5, max_rows=30) as sink:
+        sink.write(chunk)
+        sink.write(chunk.iloc[:10])
+        assert sink.written_rows == 30
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 30
+    assert {json.loads(line)["id"] for line in lines} <= set(chunk["id"])
+    summary = json.loads((tmp_path / "rejects.summary.json").read_text())
+    assert summary["rejected_rows"] == 110
+    assert summary["reasons"] == {"Invalid height value": 70, "Missing fields: gender": 40}
+
+def test_reject_sink_keeps_every_row_by_default(tmp_path):
+    path = tmp_path / "rejects.parquet"
+    chunk = pd.DataFrame({"id": ["a", "b"], "height": [0.0, 400.0], "reason": ["Invalid height value"] * 2})
+    with sinks.RejectSink(path, sample_rate=1, max_rows=0) as sink:
+        sink.write(chunk)
+        sink.write(chunk.iloc[:0])
+    assert pd.read_parquet(path)["id"].tolist() == ["a", "b"]
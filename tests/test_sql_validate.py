@@ -0,0 +1,90 @@
+import pytest
+from benchmarks import synthetic
+from benchmarks.fakes import db_available
+from src import pipeline, sql_validate
+from src.rules import RULE_SETS
+
+def test_bin_case_mirrors_rule_engine_bins():
+    source, bins, labels, closed = sql_validate.RULES.categories["alcohol_risk_category"]
+    sql = sql_validate.bin_case(source, bins, labels, closed)
+    assert sql.startswith(f"CASE WHEN {source} = 0 THEN 'None' WHEN {source} > 0 AND {source} <= 7 THEN 'Light'")
+    assert sql.endswith(f"WHEN {source} > 35 THEN 'Very Heavy' END")
+
+    source, bins, labels, closed = sql_validate.RULES.categories["bmi_category"]
+    assert sql_validate.bin_case(source, bins, labels, closed).startswith(f"CASE WHEN {source} < 18.0 THEN 'Underweight'")
+
+def test_reason_expr_reports_missing_fields_then_ranges():
+    sql = sql_validate.reason_expr(["patient_barcode", "height"])
+    assert "'Missing fields: ' || concat_ws(', ', CASE WHEN patient_barcode IS NULL THEN 'patient_barcode' END" in sql
+    assert sql.index("Missing fields") < sql.index("Invalid height value")
+    assert "Invalid weight value" not in sql
+
+def test_build_validated_sql_maps_header_positions(tmp_path):
+    header = ["", "patient_barcode", "filler", "Height "]
+    sql = sql_validate.build_validated_sql("landing", header, RULE_SETS["esophageal"], ["patient_barcode"], "last")
+    assert "NULLIF(lower(btrim(c1, " in sql
+    assert "btrim(c3, " in sql and "::float8 END AS height" in sql
+    # Columns missing from the file are null, and rejected as missing.
+    assert "NULLIF(lower(btrim(NULL, " in sql
+    assert "ORDER BY _line DESC" in sql
+
+def test_run_source_rejects_non_csv_readers():
+    with pytest.raises(ValueError, match="CSV files only"):
+        sql_validate.run_source({"name": "api", "reader": "api", "rules": "esophageal"})
+
+def _table_rows(table: str) -> list[dict]:
+    from src.repo import get_conn
+
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT * FROM {table} ORDER BY patient_barcode")
+        columns = [d[0] for d in cur.description]
+        return [
+            {c: float(v) if hasattr(v, "as_tuple") else v for c, v in zip(columns, row) if c != "_loaded_at"}
+            for row in cur.fetchall()
+        ]
+
+@pytest.mark.skipif(not db_available(), reason="needs a Postgres database (PGHOST/PGUSER/...)")
+def test_run_source_matches_the_pandas_path(tmp_path):
+    from src.repo import get_conn, close_pool
+
+    raw = synthetic.make_raw_frame(2_000, reject_ratio=0.3, duplicate_ratio=0.05, extra_columns=3, seed=7)
+    raw.loc[5, "patient_barcode"] = raw.loc[4, "patient_barcode"]  # PK collision
+    raw.loc[6, "gender"] = "  Female "
+    raw.loc[7, "height"] = 1200.0  # Overflows NUMERIC(5,2), in the rejects table too.
+    raw.loc[8, "patient_barcode"] = None
+    raw.loc[8, "weight"] = 0.0
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+
+    def source(prefix):
+        return {
+            "name": prefix, "path": str(path), "reader": "csv", "rules": "esophageal",
+            "table": f"{prefix}_esophageal", "rejects_table": f"{prefix}_rejects", "pk": ["patient_barcode"],
+            "cleaned_output": None, "rejected_output": None, "rejects_log": None,
+            "output_partition_by": None, "pk_policy": "most_complete",
+        }
+
+    prefixes = ["test_pandas", "test_sql"]
+    with get_conn() as conn, conn.cursor() as cur:
+        for prefix in prefixes:
+            cur.execute(
+                f"DROP TABLE IF EXISTS {prefix}_esophageal, {prefix}_rejects; "
+                f"CREATE TABLE {prefix}_esophageal (patient_barcode TEXT PRIMARY KEY, gender TEXT, height NUMERIC(5,2), "
+                "weight NUMERIC(5,2), age_at_diagnosis NUMERIC(10,0), race TEXT, cancer_status TEXT, vital_status TEXT, "
+                "smoking_history TEXT, reflux_history TEXT, barretts_esophagus TEXT, pathology_histological_type TEXT, "
+                "total_drinks_per_week NUMERIC(10,0), alcohol_risk_category TEXT, bmi NUMERIC(5,2), bmi_category TEXT, "
+                "_loaded_at TIMESTAMP NOT NULL DEFAULT NOW()); "
+                f"CREATE TABLE {prefix}_rejects (LIKE {prefix}_esophageal INCLUDING ALL); "
+                f"ALTER TABLE {prefix}_rejects ADD COLUMN reason TEXT;"
+            )
+        conn.commit()
+    try:
+        expected = pipeline.run_source(source("test_pandas"))
+        assert sql_validate.run_source(source("test_sql")) == expected
+        for table in ["esophageal", "rejects"]:
+            assert _table_rows(f"test_sql_{table}") == _table_rows(f"test_pandas_{table}")
+    finally:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS " + ", ".join(f"{p}_{t}" for p in prefixes for t in ["esophageal", "rejects"]))
+            conn.commit()
+        close_pool()
@@ -1,5 +1,8 @@
+import tracemalloc
+import numpy as np
 import pandas as pd
 from src import validate
+from src.rules import DERIVED_CATEGORIES
 
 def base_row(**overrides):
     row = {
@@ -52,4 +55,88 @@ def test_validate_numeric_cast_coerces_bad_values():
     df = pd.DataFrame([base_row(height="not_a_number")])
     cleaned, rejects = validate.validate(df, write_rejects_path=None)
     assert len(rejects) == 1
-    assert "Missing fields:" in rejects.loc[rejects.index[0], "reason"]
\ No newline at end of file
+    assert "Missing fields:" in rejects.loc[rejects.index[0], "reason"]
+
+def test_validate_reject_reasons_combine_rules_in_order():
+    df = pd.DataFrame([
+        base_row(patient_barcode="p1", gender=None, vital_status=None, height=350),
+        base_row(patient_barcode="p2", weight=600),
+        base_row(patient_barcode="p3", height=-1, weight=0),
+        base_row(patient_barcode="p4"),
+    ])
+    cleaned, rejects = validate.validate(df, write_rejects_path=None)
+    assert list(cleaned["patient_barcode"]) == ["p4"]
+    assert list(rejects["reason"]) == [
+        "Missing fields: gender, vital_status; Invalid height value",
+        "Invalid weight value",
+        "Invalid height value; Invalid weight value",
+    ]
+
+def wide_frame(rows=20000, extra_columns=90):
+    df = pd.DataFrame([base_row()] * rows)
+    df["patient_barcode"] = [f"p{i}" for i in range(rows)]
+    rng = np.random.default_rng(0)
+    for i in range(extra_columns):
+        df[f"extra_{i}"] = rng.random(rows)
+    return df
+
+def test_validate_does_not_mutate_input():
+    df = pd.DataFrame([base_row(height="180")])
+    before = df.copy()
+    validate.validate(df, write_rejects_path=None)
+    pd.testing.assert_frame_equal(df, before)
+
+def test_validate_peak_memory_stays_within_input_size():
+    df = wide_frame()
+    input_bytes = df.memory_usage(deep=True).sum()
+
+    tracemalloc.start()
+    validate.validate(df, write_rejects_path=None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Previously each step copied the frame (~2.5x the input at peak).
+    assert peak < 1.0 * input_bytes
+
+def reference_features(df):
+    # The masked .loc assignments that derive_features() replaced.
+    valid = df["height"].notna() & (df["height"] > 0) & df["weight"].notna()
+    df["bmi"] = pd.NA
+    df.loc[valid, "bmi"] = (df.loc[valid, "weight"] / ((df.loc[valid, "height"] / 100) ** 2)).round(2)
+    df["total_drinks_per_week"] = df["frequency_of_alcohol_consumption"] * df["amount_of_alcohol_consumption_per_day"]
+    for target, (source, bins, closed) in DERIVED_CATEGORIES.items():
+        values = pd.to_numeric(df[source], errors="coerce")
+        df[target] = pd.NA
+        # Earlier bins take precedence, so they are written last.
+        for (lo, hi), label in reversed(list(bins.items())):
+            if lo == hi:
+                mask = values == lo
+            elif closed == "left":
+                mask = (values >= lo) & (values < hi)
+            else:
+                mask = (values > lo) & (values <= hi)
+            df.loc[mask, target] = label
+    return df
+
+def test_derive_features_matches_masked_assignments():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        "height": rng.choice([0, -1, 150, 180.5, np.nan], n) + rng.random(n).round(1),
+        "weight": rng.choice([50, 81, 120, np.nan], n),
+        "frequency_of_alcohol_consumption": rng.choice([0, 1, 2, 7, np.nan], n),
+        "amount_of_alcohol_consumption_per_day": rng.choice([0, 1, 3.5, 5, 7, np.nan], n),
+    })
+    # BMI exactly on the bin edges.
+    df.loc[:3, ["height", "weight"]] = [[0.0, 60.0], [100.0, 18.0], [100.0, 25.0], [100.0, 30.0]]
+
+    derived = validate.derive_features(df.copy())
+    expected = reference_features(df.copy())
+
+    assert np.allclose(derived["bmi"], pd.to_numeric(expected["bmi"]), equal_nan=True)
+    assert derived["total_drinks_per_week"].equals(expected["total_drinks_per_week"])
+    for target, (_, bins, _) in DERIVED_CATEGORIES.items():
+        assert list(derived[target].cat.categories) == list(bins.values())
+        got = derived[target].astype(object)
+        assert got.where(got.notna(), None).tolist() == expected[target].where(expected[target].notna(), None).tolist()
+    assert derived["bmi_category"].iloc[1:4].tolist() == ["Normal", "Overweight", "Obese"]